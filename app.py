@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 import json
 import subprocess
 import threading
@@ -7,15 +7,35 @@ import os
 import signal
 import psutil
 from datetime import datetime
-import re
-import requests
-import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import shlex
+import math
 from urllib.parse import urlparse
 import logging
 import sys
 
 # Import configuration
 import config
+from hash_parsers import get_parser, parse_hash_rate
+from readiness import get_probe
+from hash_history import HashRateHistory
+from shares import ShareStats, get_share_parser
+from output_mux import OutputMultiplexer
+from reaper import ProcessReaper, describe_exit
+from supervisor import RestartPolicy
+from hashrate_watchdog import MinerWatchdog, config_fingerprint
+from output_ring import OutputRing
+from miner_events import MinerEventHub
+from downloader import Downloader, normalize_required_files
+from config_store import ConfigStore
+import process_group
+import escalation
+from owned_processes import OwnedProcessRegistry
+from resource_limits import CgroupManager, parse_resources, apply_priority
+from status_snapshot import StatusSnapshot
+from benchmark import BenchmarkJob, LAYOUTS as BENCHMARK_LAYOUTS, layout_cpus, physical_cores
+from cpu_topology import CpuTopology, allowed_cpus, partition, apply_affinity, parse_cpu_list, format_cpu_list
+from metrics import MetricsCollector, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 # Configure Flask app
 app = Flask(__name__)
@@ -52,10 +72,31 @@ class MiningManager:
     def __init__(self):
         self.miners = {}
         self.config_file = "mining_config.json"
+        self.config_store = ConfigStore(self.config_file, config.CONFIG_SAVE_DEBOUNCE, config.CONFIG_SAVE_MAX_DELAY, log=self.log_info)
         self.base_download_url = config.CDN_BASE_URL + "/"
         self.miners_dir = config.MINERS_DIR
         self.auto_start_enabled = config.AUTO_START_ON_BOOT
+        self.downloader = Downloader(self.base_download_url)  # Shared session + worker pool
+        self.reconcile_lock = threading.Lock()  # Serializes background stop/start after config updates
         self.last_sync_config = int(datetime(2025, 1, 1).timestamp())  # Default to oldest timestamp
+        self.hash_history = {}  # name -> HashRateHistory (kept across config updates)
+        self.share_stats = {}  # name -> ShareStats (kept across config updates)
+        self.watchdogs = {}  # name -> MinerWatchdog (baselines kept per config fingerprint)
+        self.output_rings = {}  # name -> OutputRing (recent output lines with seq numbers)
+        self.event_hubs = {}  # name -> MinerEventHub (SSE fan-out)
+        self.miner_locks = {}  # name -> RLock serializing start/stop of that miner
+        self.output_mux = OutputMultiplexer(log=self.log_info)  # One I/O thread for all miner pipes
+        self.owned = OwnedProcessRegistry(config.OWNED_PROCESS_FILE, config.OWNER_TAG, log=self.log_info)  # Processes we started (env-tagged)
+        self.reaper = ProcessReaper(log=self.log_info)  # Exit notifications (pidfd), single place for dead-process handling
+        self.exit_cleanup = ThreadPoolExecutor(max_workers=1, thread_name_prefix='exit-cleanup')  # Blocking work after an exit, off the reaper thread
+        self.cpu_topology = None  # CpuTopology, read on first use
+        self.affinity_lock = threading.Lock()  # Serializes core set rebalancing
+        self.status_snapshot = StatusSnapshot(
+            self.get_all_status, config.STATUS_SNAPSHOT_INTERVAL, dumps=app.json.dumps, log=self.log_info,
+            volatile=[('resources', 'cgroup')], volatile_interval=config.STATUS_VOLATILE_INTERVAL
+        )  # Served by /api/status; live cgroup counters don't bump the version
+        self.benchmarks = {}  # job id -> BenchmarkJob (most recent BENCHMARK_KEEP_JOBS)
+        self.cgroups = CgroupManager(config.CGROUP_ROOT, enabled=config.CGROUP_ENABLED, log=self.log_info)  # cpu.max / memory.max per miner
         self.load_config()
         
         # Ensure miners directory exists
@@ -79,24 +120,22 @@ class MiningManager:
             print(message)
         
     def load_config(self):
-        """Load mining configuration from file"""
-        if os.path.exists(self.config_file):
+        """Load mining configuration from file (falls back to the previous generation if corrupt)"""
+        data, source = self.config_store.load()
+        if data is not None:
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    # Support new format: {last_sync_config, auto_start, miners}
-                    if isinstance(data, dict) and 'miners' in data:
-                        # Convert to Unix timestamp
-                        self.last_sync_config = to_unix_timestamp(data.get('last_sync_config'))
-                        self.auto_start_enabled = data.get('auto_start', config.AUTO_START_ON_BOOT)
-                        self.miners = data.get('miners', {})
-                    else:
-                        # Old format: direct miners object - set oldest timestamp to trigger update
-                        self.miners = data
-                        self.last_sync_config = int(datetime(2025, 1, 1).timestamp())
+                # Support new format: {last_sync_config, auto_start, miners}
+                if isinstance(data, dict) and 'miners' in data:
+                    # Convert to Unix timestamp
+                    self.last_sync_config = to_unix_timestamp(data.get('last_sync_config'))
+                    self.auto_start_enabled = data.get('auto_start', config.AUTO_START_ON_BOOT)
+                    self.miners = data.get('miners', {})
+                else:
+                    # Old format: direct miners object - set oldest timestamp to trigger update
+                    self.miners = data
+                    self.last_sync_config = int(datetime(2025, 1, 1).timestamp())
             except Exception as e:
-                self.log_info(f"Lỗi khi tải config: {e}")
+                self.log_info(f"Lỗi khi tải config từ {source}: {e}")
                 self.miners = {}
                 self.last_sync_config = int(datetime(2025, 1, 1).timestamp())
         else:
@@ -104,171 +143,101 @@ class MiningManager:
             self.last_sync_config = int(datetime(2025, 1, 1).timestamp())
     
     def save_config(self):
-        """Save mining configuration to file in new format"""
-        try:
-            print("[SAVE-CONFIG] Bắt đầu lưu config...")
-            
-            # Ensure last_sync_config is Unix timestamp
-            timestamp = self.last_sync_config if isinstance(self.last_sync_config, (int, float)) else int(datetime(2025, 1, 1).timestamp())
-            print(f"[SAVE-CONFIG] Timestamp: {timestamp}")
-            
-            # Clean miners data - remove runtime fields that can't be serialized
-            clean_miners = {}
-            for name, miner in self.miners.items():
-                print(f"[SAVE-CONFIG] Cleaning miner: {name}")
-                print(f"[SAVE-CONFIG]   - coin_name: {miner.get('coin_name')}")
-                print(f"[SAVE-CONFIG]   - mining_tool: {miner.get('mining_tool')}")
-                print(f"[SAVE-CONFIG]   - config type: {type(miner.get('config'))}")
-                
-                # Check for problematic fields
-                problematic_fields = []
-                for key, value in miner.items():
-                    if hasattr(value, '__call__'):  # Function
-                        problematic_fields.append(f"{key}=<function>")
-                    elif value.__class__.__name__ == 'Popen':  # Subprocess
-                        problematic_fields.append(f"{key}=<Popen>")
-                    elif not isinstance(value, (str, int, float, bool, list, dict, type(None))):
-                        problematic_fields.append(f"{key}={type(value).__name__}")
-                
-                if problematic_fields:
-                    print(f"[SAVE-CONFIG]   ⚠️ Problematic fields in {name}: {problematic_fields}")
-                
-                clean_miner = {
-                    'coin_name': miner.get('coin_name'),
-                    'mining_tool': miner.get('mining_tool'),
-                    'coin_dir': miner.get('coin_dir'),
-                    'config_file': miner.get('config_file'),
-                    'config': miner.get('config'),
-                    'cmd': miner.get('cmd', ''),
-                    'required_files': miner.get('required_files', []),
-                    # Skip runtime fields: process, pid, status, hash_rate, etc.
-                }
-                # Add status as stopped (will be set to running when started)
-                clean_miner['status'] = 'stopped'
-                clean_miner['process'] = None
-                clean_miner['pid'] = None
-                clean_miner['start_time'] = None
-                clean_miner['hash_rate'] = 0
-                clean_miner['last_output'] = ''
-                
-                clean_miners[name] = clean_miner
-                print(f"[SAVE-CONFIG]   ✅ Cleaned successfully")
-            
-            config_data = {
-                'last_sync_config': int(timestamp),
-                'auto_start': self.auto_start_enabled,
-                'miners': clean_miners
+        """Queue a save of the mining configuration (debounced, atomic, written in background)"""
+        self.status_snapshot.invalidate()
+        self.config_store.schedule(self._config_snapshot)
+        return True
+    
+    def flush_config(self):
+        """Write any queued config change now (shutdown)"""
+        return self.config_store.flush()
+    
+    def _config_snapshot(self):
+        """Serializable config in new format - runtime fields (process, pid, status...) are reset"""
+        # Ensure last_sync_config is Unix timestamp
+        timestamp = self.last_sync_config if isinstance(self.last_sync_config, (int, float)) else int(datetime(2025, 1, 1).timestamp())
+        
+        clean_miners = {}
+        for name, miner in list(self.miners.items()):
+            clean_miners[name] = {
+                'coin_name': miner.get('coin_name'),
+                'mining_tool': miner.get('mining_tool'),
+                'coin_dir': miner.get('coin_dir'),
+                'config_file': miner.get('config_file'),
+                'config': miner.get('config'),
+                'cmd': miner.get('cmd', ''),
+                'required_files': miner.get('required_files', []),
+                'cpu_affinity': miner.get('cpu_affinity'),
+                'resources': miner.get('resources') or {},
+                # Status as stopped (will be set to running when started)
+                'status': 'stopped',
+                'process': None,
+                'pid': None,
+                'start_time': None,
+                'hash_rate': 0,
+                'last_output': ''
             }
-            
-            print(f"[SAVE-CONFIG] Config data prepared:")
-            print(f"[SAVE-CONFIG]   - last_sync_config: {config_data['last_sync_config']}")
-            print(f"[SAVE-CONFIG]   - auto_start: {config_data['auto_start']}")
-            print(f"[SAVE-CONFIG]   - miners count: {len(config_data['miners'])}")
-            
-            print(f"[SAVE-CONFIG] Writing to file: {self.config_file}")
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
-            
-            print("[SAVE-CONFIG] ✅ File written successfully")
-            return True
-        except Exception as e:
-            print(f"[SAVE-CONFIG] ❌ Lỗi khi lưu config: {e}")
-            import traceback
-            traceback.print_exc()
-            
-            # Additional debug: try to identify which field causes the error
-            try:
-                print(f"[SAVE-CONFIG] 🔍 Debugging - checking each miner individually...")
-                for name, miner in self.miners.items():
-                    try:
-                        test_miner = {
-                            'coin_name': miner.get('coin_name'),
-                            'mining_tool': miner.get('mining_tool'),
-                            'config': miner.get('config')
-                        }
-                        json.dumps(test_miner)
-                        print(f"[SAVE-CONFIG]   ✅ {name} is JSON serializable")
-                    except Exception as miner_e:
-                        print(f"[SAVE-CONFIG]   ❌ {name} is NOT serializable: {miner_e}")
-                        print(f"[SAVE-CONFIG]      Miner keys: {list(miner.keys())}")
-                        for key, value in miner.items():
-                            print(f"[SAVE-CONFIG]        - {key}: {type(value).__name__}")
-            except Exception as debug_e:
-                print(f"[SAVE-CONFIG] Debug failed: {debug_e}")
-            
-            return False
+        
+        self.log_debug(f"[SAVE-CONFIG] Lưu {len(clean_miners)} miners vào {self.config_file}")
+        return {
+            'last_sync_config': int(timestamp),
+            'auto_start': self.auto_start_enabled,
+            'miners': clean_miners
+        }
     
     def download_file(self, filename, coin_dir):
         """Download mining file from CDN"""
-        try:
-            url = self.base_download_url + filename
-            file_path = os.path.join(coin_dir, filename)
-            
-            # Skip if file already exists
-            if os.path.exists(file_path):
-                print(f"Tập tin {filename} đã tồn tại, bỏ qua tải xuống")
-                # Make sure it's executable on Linux
-                if os.name == 'posix' and not filename.endswith('.dll'):
-                    os.chmod(file_path, 0o755)
-                return True
-            
-            print(f"Đang tải xuống {filename} từ {url}...")
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            
-            # Create directory if it doesn't exist
-            os.makedirs(coin_dir, exist_ok=True)
-            
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            # Make executable on Linux (except for .dll files)
-            if os.name == 'posix' and not filename.endswith('.dll'):
-                os.chmod(file_path, 0o755)
-                print(f"Đã cấp quyền thực thi cho {filename}")
-            
-            print(f"Tải xuống {filename} thành công")
-            return True
-            
-        except Exception as e:
-            print(f"Lỗi khi tải xuống {filename}: {e}")
-            return False
+        return self.downloader.download(filename, coin_dir)
+    
+    def prefetch_files(self, miners_list):
+        """Download required files of many miners concurrently (before updating their configs)"""
+        jobs = []
+        for miner_config in miners_list:
+            coin_name = miner_config.get('coin_name')
+            mining_tool = miner_config.get('mining_tool')
+            if not coin_name or not mining_tool:
+                continue
+            required_files = miner_config.get('required_files')
+            if required_files is None:
+                required_files = self.get_default_files(mining_tool)
+            coin_dir = os.path.join(self.miners_dir, coin_name)
+            try:
+                jobs.extend((filename, coin_dir, sha256) for filename, sha256 in normalize_required_files(required_files))
+            except ValueError as e:
+                print(f"[DOWNLOAD] Bỏ qua {coin_name}: {e}")
+        
+        if not jobs:
+            return {}
+        
+        started = time.time()
+        results = self.downloader.download_all(jobs)
+        ok = len([r for r in results.values() if r])
+        print(f"[DOWNLOAD] Đã xử lý {ok}/{len(results)} files trong {time.time() - started:.1f}s")
+        return results
     
     def setup_coin_environment(self, coin_name, mining_tool, required_files):
         """Setup mining environment for a specific coin"""
         try:
             coin_dir = os.path.join(self.miners_dir, coin_name)
             
-            # Download required files
-            for filename in required_files:
-                if not self.download_file(filename, coin_dir):
-                    return False, f"Không thể tải xuống {filename}"
-            
-            # Make executable files executable (for mining tools)
-            mining_exe = os.path.join(coin_dir, f"{mining_tool}.exe")
-            if os.path.exists(mining_exe):
-                # On Windows, this is not needed but we can check if file exists
-                pass
+            # Download required files (concurrently, verified against optional sha256)
+            jobs = [(filename, coin_dir, sha256) for filename, sha256 in normalize_required_files(required_files)]
+            results = self.downloader.download_all(jobs)
+            for job in jobs:
+                if not results[job]:
+                    return False, f"Không thể tải xuống {job[0]}"
             
             return True, coin_dir
             
         except Exception as e:
             return False, str(e)
     
-    def update_miner_config(self, name, coin_name, mining_tool, config, required_files=None):
-        """Update miner configuration with auto-download support"""
+    def update_miner_config(self, name, coin_name, mining_tool, config, required_files=None, cpu_affinity=None, resources=None):
+        """Create a fresh miner entry with auto-download support
+        
+        Callers detach a previous entry themselves (update_config stops its process in the background)
+        """
         try:
-            # Check if miner exists and is running - stop it first
-            if name in self.miners and self.miners[name].get('status') == 'running':
-                print(f"[CẬP NHẬT] Miner {name} đang chạy, dừng lại để cập nhật...")
-                stop_result = self.stop_miner(name)
-                if stop_result['success']:
-                    print(f"[CẬP NHẬT] Đã dừng {name} thành công")
-                else:
-                    print(f"[CẬP NHẬT] Không thể dừng {name}: {stop_result['message']}")
-                    # Continue with config update anyway
-            
             # Default required files based on mining tool
             if required_files is None:
                 required_files = self.get_default_files(mining_tool)
@@ -299,7 +268,9 @@ class MiningManager:
                 'start_time': None,
                 'hash_rate': 0,
                 'last_output': '',
-                'required_files': required_files
+                'required_files': required_files,
+                'cpu_affinity': cpu_affinity,  # Explicit core set (None = partitioner decides)
+                'resources': resources or {}  # nice / ionice / cpu_max / memory_max
             }
             
             # Don't save here - let the endpoint save once after all miners are updated
@@ -311,6 +282,37 @@ class MiningManager:
         except Exception as e:
             return False, str(e)
     
+    def diff_miner_configs(self, desired):
+        """Compare desired {name: miner_config} with current miners
+        
+        Returns lists of names: added, removed, changed, unchanged. A miner is
+        changed when its mining_tool, config, required_files or resources differ
+        (a new cpu_affinity alone is applied live, without a restart).
+        """
+        diff = {'added': [], 'removed': [], 'changed': [], 'unchanged': []}
+        
+        for name, miner_config in desired.items():
+            current = self.miners.get(name)
+            if current is None:
+                diff['added'].append(name)
+                continue
+            
+            required_files = miner_config.get('required_files')
+            if required_files is None:
+                required_files = self.get_default_files(miner_config['mining_tool'])
+            
+            same = (
+                current.get('coin_name') == miner_config['coin_name']
+                and current.get('mining_tool') == miner_config['mining_tool']
+                and current.get('config') == miner_config['config']
+                and current.get('required_files') == required_files
+                and (current.get('resources') or {}) == (miner_config.get('resources') or {})
+            )
+            diff['unchanged' if same else 'changed'].append(name)
+        
+        diff['removed'] = [name for name in self.miners if name not in desired]
+        return diff
+    
     def get_default_files(self, mining_tool):
         """Get default required files for different mining tools"""
         default_files = {
@@ -343,23 +345,126 @@ class MiningManager:
         
         if stopped_miners:
             print(f"Tự động khởi động TẤT CẢ {len(stopped_miners)} miners: {stopped_miners}")
-            for name in stopped_miners:
-                result = self.start_miner(name)
+            for name, result in self.start_miners(stopped_miners):
                 if result['success']:
-                    print(f"✅ Đã tự động khởi động {name}")
+                    print(f"✅ Đã tự động khởi động {name} (time_to_ready: {result.get('time_to_ready')})")
                 else:
                     print(f"❌ Không thể tự động khởi động {name}: {result['message']}")
-                time.sleep(2)  # Delay between starts
         else:
             print("Không có miner nào cần tự động khởi động (tất cả đã chạy hoặc chưa config)")
     
+    def get_ready_timeout(self, mining_tool):
+        """Seconds to wait for a readiness signal from this mining tool"""
+        return config.STARTUP_READY_TIMEOUTS.get((mining_tool or '').lower(), config.STARTUP_READY_TIMEOUT)
+    
+    def start_miners(self, names):
+        """Start several miners concurrently (at most STARTUP_MAX_PARALLEL at a time)
+        
+        Each start returns as soon as that miner shows a readiness signal, so total
+        startup time no longer grows with a fixed delay per miner.
+        Returns [(name, result)] in the order of names.
+        """
+        names = list(names)
+        if not names:
+            return []
+        
+        started_at = time.time()
+        workers = max(1, min(config.STARTUP_MAX_PARALLEL, len(names)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='miner-start') as executor:
+            futures = [executor.submit(self.start_miner, name) for name in names]
+            results = []
+            for name, future in zip(names, futures):
+                try:
+                    results.append((name, future.result()))
+                except Exception as e:
+                    results.append((name, {'success': False, 'message': f'Không thể khởi động miner {name}: {str(e)}'}))
+        
+        ready = len([1 for _, result in results if result.get('ready')])
+        print(f"[STARTUP] Đã khởi động {len(names)} miners trong {time.time() - started_at:.2f}s ({ready} sẵn sàng, song song tối đa {workers})")
+        return results
+    
     def set_auto_start_global(self, enabled):
-        """Enable/disable auto-start globally"""
+        """Enable/disable auto-start globally (persisted)"""
         self.auto_start_enabled = enabled
+        self.save_config()
         return True
     
-    def start_miner(self, name):
-        """Start a mining process"""
+    def get_miner_lock(self, name):
+        """Per-miner lock held from the status check of a start/stop until the new state is registered"""
+        return self.miner_locks.setdefault(name, threading.RLock())
+    
+    def start_miner(self, name, wait_ready=True, supervised=False):
+        """Start a mining process (waits for a readiness signal unless wait_ready=False)
+        
+        supervised: restart issued by the crash supervisor or watchdog (keeps
+        backoff/crash-loop state, only proceeds from 'restarting'); any other start clears it
+        
+        Readiness (pool connected, difficulty or job received) usually comes before the first
+        hash rate line, so time_to_first_hashrate is not part of the result; it shows up in
+        /api/status once the first sample was parsed.
+        """
+        with self.get_miner_lock(name):
+            launched = self._launch_miner(name, supervised)
+        if isinstance(launched, dict):
+            return launched
+        miner, process, ctx = launched
+        
+        try:
+            # Wait for a real readiness signal in the output instead of a fixed sleep
+            if not wait_ready:
+                return {'success': True, 'message': f'Miner {name} started', 'pid': process.pid}
+            
+            ready_timeout = self.get_ready_timeout(miner.get('mining_tool'))
+            ctx['ready'].wait(ready_timeout)
+            
+            if not miner.get('ready'):
+                return_code = process.poll()
+                if return_code is not None:
+                    print(f"[LỖI] Process {name} died during startup! Return code: {return_code}")
+                    print(f"[LỖI] Error output: {ctx['output'].tail_text(1000).strip()}")
+                    return {'success': False, 'message': f'Process died during startup with code {return_code}', 'pid': process.pid}
+                print(f"[STARTUP-{name}] ⚠️ Chưa có tín hiệu sẵn sàng sau {ready_timeout}s, miner vẫn đang chạy")
+            else:
+                print(f"[STARTUP-{name}] ✅ Sẵn sàng sau {miner['time_to_ready']:.2f}s ({miner['ready_signal']})")
+            
+            # Worker threads spawned since the first pin still have the old mask / nice on Linux
+            if miner.get('process') is process:
+                if miner.get('cpu_set'):
+                    self.pin_miner(name)
+                self.apply_miner_priority(name)
+            
+            # Special check for astrominer - log process tree once it is up
+            if miner.get('mining_tool', '').lower() == 'astrominer':
+                try:
+                    proc = psutil.Process(process.pid)
+                    children = proc.children(recursive=True)
+                    self.log_debug(f"[DEBUG] Astrominer process tree:")
+                    self.log_debug(f"[DEBUG]   Parent PID {process.pid}: {proc.name()} - Status: {proc.status()}")
+                    for child in children:
+                        try:
+                            self.log_debug(f"[DEBUG]   Child PID {child.pid}: {child.name()} - Status: {child.status()}")
+                        except:
+                            pass
+                except Exception as e:
+                    self.log_debug(f"[DEBUG] Error checking astrominer process: {e}")
+            
+            return {
+                'success': True,
+                'message': f'Miner {name} started' if miner.get('ready') else f'Miner {name} started (chưa có tín hiệu sẵn sàng sau {ready_timeout}s)',
+                'pid': process.pid,
+                'ready': miner.get('ready', False),
+                'ready_signal': miner.get('ready_signal'),
+                'time_to_ready': miner.get('time_to_ready')
+            }
+            
+        except Exception as e:
+            return {'success': False, 'message': f'Không thể khởi động miner {name}: {str(e)}', 'pid': process.pid}
+    
+    def _launch_miner(self, name, supervised):
+        """Spawn and register the miner process (caller holds the miner lock)
+        
+        Returns (miner, process, ctx), or an error result dict
+        """
         if name not in self.miners:
             return {'success': False, 'message': f'Miner {name} không tồn tại'}
         
@@ -367,20 +472,27 @@ class MiningManager:
         
         if miner['status'] == 'running':
             return {'success': False, 'message': f'Miner {name} đã đang chạy'}
+        if supervised and (miner['status'] != 'restarting' or miner.get('stop_requested')):
+            return {'success': False, 'message': f'Miner {name} đã được dừng, hủy khởi động lại'}
+        
+        if not supervised:
+            self.get_restart_policy(miner).reset()
+        miner['stop_requested'] = False
         
         try:
             # Write config to file or prepare command args
-            config_is_json = isinstance(miner['config'], dict)
+            miner_config, _ = self.get_run_settings(miner)
+            config_is_json = isinstance(miner_config, dict)
             
             if config_is_json:
                 # Traditional JSON config file approach
-                if miner['config_file'] and miner['config']:
+                if miner['config_file'] and miner_config:
                     config_dir = os.path.dirname(miner['config_file'])
                     if config_dir and not os.path.exists(config_dir):
                         os.makedirs(config_dir)
                     
                     with open(miner['config_file'], 'w', encoding='utf-8') as f:
-                        json.dump(miner['config'], f, indent=2)
+                        json.dump(miner_config, f, indent=2)
                 
                 # Prepare command with config file
                 coin_dir = miner.get('coin_dir')
@@ -404,8 +516,8 @@ class MiningManager:
                 if not os.path.exists(config_file):
                     return {'success': False, 'message': f'File config không tồn tại: {config_file}'}
                 
-                # Create command with config file
-                cmd = f'"{mining_exe}" -c "{config_file}"'
+                # Create argv with config file (executed directly, no shell)
+                argv = [mining_exe, '-c', config_file]
                 
             else:
                 # Command line parameters approach (config is a string)
@@ -426,73 +538,62 @@ class MiningManager:
                     else:
                         return {'success': False, 'message': f'File thực thi mining không tồn tại: {mining_exe} hoặc {mining_exe_win}'}
                 
-                # Create command with parameters
-                config_params = str(miner['config']).strip()
-                cmd = f'"{mining_exe}" {config_params}'
+                # Create argv from parameters (tokenized like a shell would, but no shell is run)
+                config_params = str(miner_config).strip()
+                if os.name == 'nt':
+                    # CreateProcess parses the command line itself (no cmd.exe involved)
+                    argv = f'"{mining_exe}" {config_params}'
+                else:
+                    try:
+                        argv = [mining_exe] + shlex.split(config_params)
+                    except ValueError as e:
+                        return {'success': False, 'message': f'Tham số dòng lệnh không hợp lệ: {e}'}
+            
+            cmd = argv if isinstance(argv, str) else shlex.join(argv)
+            miner['cmd'] = cmd
             
             print(f"Đang khởi động miner {name}...")
             print(f"  Thư mục làm việc: {coin_dir}")
             print(f"  Lệnh: {cmd}")
             print(f"  Loại cấu hình: {'Tập tin JSON' if config_is_json else 'Tham số dòng lệnh'}")
             
-            # Start mining process
+            # Start mining process directly: the tracked PID is the miner itself
             process = subprocess.Popen(
-                cmd,
-                shell=True,
+                argv,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                cwd=coin_dir  # Set working directory to coin directory
+                cwd=coin_dir,  # Set working directory to coin directory
+                env=self.owned.env(name),  # Ownership marker: lets kill-all find it without name scans
+                **process_group.popen_group_kwargs()  # Own session: stop = one killpg for the whole tree
             )
             
+            if miner.get('start_time'):
+                miner['restart_count'] = miner.get('restart_count', 0) + 1
+            
             miner['process'] = process
             miner['pid'] = process.pid
+            miner['pgid'] = process.pid if os.name == 'posix' else None  # Session leader: pgid == pid
+            self.owned.add(name, process, miner['pgid'])
+            self.apply_resources(name, miner, process)
             miner['status'] = 'running'
             miner['start_time'] = time.time()  # Use timestamp for uptime calculation
-            miner['latest_output'] = ''
-            
-            # Debug: Check if process is actually running
-            time.sleep(0.5)  # Wait a bit for process to start
-            if process.poll() is not None:
-                print(f"[LỖI] Process {name} died immediately after start! Return code: {process.returncode}")
-                # Try to read any error output
-                try:
-                    error_output = process.stdout.read()
-                    if error_output:
-                        print(f"[LỖI] Error output: {error_output}")
-                except:
-                    pass
-                return {'success': False, 'message': f'Process died immediately with code {process.returncode}'}
-            
-            print(f"[DEBUG] Process {name} started successfully with PID {process.pid}")
-            
-            # Special check for astrominer - verify it's actually running
-            if miner.get('mining_tool', '').lower() == 'astrominer':
-                time.sleep(2)  # Wait a bit more for astrominer to initialize
-                try:
-                    proc = psutil.Process(process.pid)
-                    children = proc.children(recursive=True)
-                    print(f"[DEBUG] Astrominer process tree:")
-                    print(f"[DEBUG]   Parent PID {process.pid}: {proc.name()} - Status: {proc.status()}")
-                    for child in children:
-                        try:
-                            print(f"[DEBUG]   Child PID {child.pid}: {child.name()} - Status: {child.status()}")
-                        except:
-                            pass
-                except Exception as e:
-                    print(f"[DEBUG] Error checking astrominer process: {e}")
-            
-            # Start monitoring thread
-            thread = threading.Thread(target=self._monitor_miner, args=(name,))
-            thread.daemon = True
-            thread.start()
-            
-            return {'success': True, 'message': f'Miner {name} started', 'pid': process.pid}
+            miner['ready'] = False
+            miner['ready_signal'] = None
+            miner['time_to_ready'] = None
+            miner['time_to_first_hashrate'] = None
+            miner['cpu_pinned'] = None  # New process starts with the manager's mask
+            self.get_share_stats(name).new_run()
+            self.get_watchdog(name).new_run(config_fingerprint(dict(miner, config=miner_config)))
+            self.rebalance_cpu_affinity()  # Pin the new process (and re-split cores if partitioning)
+            
+            # Start monitoring output (registered with the shared output multiplexer)
+            ctx = self._monitor_miner(name, miner)
+            self._publish_status(name)
+            return miner, process, ctx
             
         except Exception as e:
             miner['status'] = 'error'
+            self._publish_status(name)
             return {'success': False, 'message': f'Không thể khởi động miner {name}: {str(e)}'}
     
     def kill_all_miners_by_name(self, process_names=None):
@@ -533,101 +634,30 @@ class MiningManager:
                 print("[KILL-ALL] No mining processes found")
                 return 0
             
-            # Step 2: Send multiple SIGINT (Ctrl+C) to handle confirmation prompts
-            import signal
-            print(f"[KILL-ALL] Sending multiple SIGINT to {len(found_processes)} mining processes...")
-            all_processes = []
-            
+            # Step 2: Escalate on all matches (and their children) at once:
+            # multiple SIGINT for tools that prompt for confirmation, then SIGTERM, then SIGKILL.
+            # Astrominer ignores SIGINT and respawns workers - SIGKILL straight away.
+            sigint_stages = process_group.stop_stages(3, config.SIGINT_WAIT_TIME, config.SIGTERM_WAIT_TIME)
+            kill_stages = [(process_group.SIGKILL, 3)]
+            targets = []
+            seen = set()
             for proc in found_processes:
                 try:
-                    # Collect all processes including children
-                    children = proc.children(recursive=True)
-                    all_processes.extend([proc] + children)
+                    tree = [proc] + proc.children(recursive=True)
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    all_processes.append(proc)
-            
-            # Send multiple SIGINT signals to handle tools that prompt for confirmation
-            for attempt in range(3):  # 3 attempts to handle y/n prompts
-                for proc in all_processes:
-                    try:
-                        proc.send_signal(signal.SIGINT)
-                        if attempt == 0:
-                            print(f"[KILL-ALL] Sent SIGINT attempt {attempt + 1} to {proc.name()} (PID: {proc.pid})")
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        pass
-                
-                # Progressive delays
-                if attempt == 0:
-                    time.sleep(2)  # Wait for initial prompt
-                elif attempt == 1:
-                    time.sleep(1)  # Quick response to confirmation
-                elif attempt == 2:
-                    time.sleep(1)  # Final confirmation
-            
-            # Step 3: Wait for graceful shutdown after multiple SIGINT
-            if all_processes:
-                print(f"[KILL-ALL] Waiting for graceful shutdown after multiple SIGINT...")
-                gone, still_alive = psutil.wait_procs(all_processes, timeout=6)
-                print(f"[KILL-ALL] After multiple SIGINT: {len(gone)} stopped, {len(still_alive)} still alive")
-                killed_count += len(gone)
-            
-            # Step 4: SIGTERM for remaining processes
-            if still_alive:
-                print(f"[KILL-ALL] Sending SIGTERM to {len(still_alive)} remaining processes...")
-                for proc in still_alive:
-                    try:
-                        proc.terminate()
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        pass
-                
-                # Wait after SIGTERM
-                gone, still_alive = psutil.wait_procs(still_alive, timeout=5)
-                print(f"[KILL-ALL] After SIGTERM: {len(gone)} stopped, {len(still_alive)} still alive")
-                killed_count += len(gone)
-            
-            # Step 5: Force kill remaining processes
-            if still_alive:
-                print(f"[KILL-ALL] Force killing {len(still_alive)} remaining processes...")
-                for proc in still_alive:
-                    try:
-                        proc.kill()
-                        killed_count += 1
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        pass
-                        
-            # Step 6: Special handling for stubborn astrominer processes
-            for mining_name in process_names:
-                if mining_name.lower() == 'astrominer':
-                    print("[KILL-ALL] Special astrominer cleanup...")
-                    time.sleep(2)
-                    
-                    # Find any remaining astrominer processes
-                    remaining_astrominer = []
-                    for proc in psutil.process_iter(['pid', 'name']):
-                        try:
-                            if 'astrominer' in proc.info['name'].lower():
-                                remaining_astrominer.append(proc)
-                        except:
-                            pass
-                    
-                    if remaining_astrominer:
-                        print(f"[KILL-ALL] Found {len(remaining_astrominer)} stubborn astrominer processes")
-                        for proc in remaining_astrominer:
-                            try:
-                                print(f"[KILL-ALL] Force killing stubborn astrominer PID {proc.pid}")
-                                proc.kill()
-                                killed_count += 1
-                                
-                                # Also use system command as backup
-                                import subprocess
-                                import os
-                                if os.name == 'nt':  # Windows
-                                    subprocess.run(f"taskkill /PID {proc.pid} /T /F", shell=True, capture_output=True)
-                                else:
-                                    subprocess.run(f"kill -9 {proc.pid}", shell=True, capture_output=True)
-                            except Exception as e:
-                                print(f"[KILL-ALL] Error killing stubborn astrominer {proc.pid}: {e}")
-                    break
+                    tree = [proc]
+                brute = 'astrominer' in proc.info['name'].lower()
+                for member in tree:
+                    if member.pid not in seen:
+                        seen.add(member.pid)
+                        targets.append(escalation.Target(member.pid, stages=kill_stages if brute else None, label=proc.info['name']))
+            
+            print(f"[KILL-ALL] Escalating on {len(targets)} processes...")
+            results = escalation.escalate(targets, sigint_stages, deadline=config.STOP_DEADLINE)
+            for result in results:
+                if result['stopped']:
+                    killed_count += 1
+                print(f"[KILL-ALL] {result['label']} (PID: {result['pid']}): {'stopped' if result['stopped'] else 'STILL ALIVE'} by {result['signal']} in {result['elapsed_ms']} ms")
                     
         except Exception as e:
             print(f"[KILL-ALL] Lỗi trong kill_all_miners_by_name: {e}")
@@ -635,6 +665,50 @@ class MiningManager:
         print(f"[KILL-ALL] Total processes handled: {killed_count}")
         return killed_count
 
+    def kill_owned_processes(self):
+        """Stop every process this manager started (current and left over from a previous run)
+        
+        Uses the owned-process registry only - no host-wide scan. All targets are escalated
+        concurrently; astrominer gets SIGKILL straight away like in stop_miner.
+        """
+        default_stages = process_group.stop_stages(config.SIGINT_RETRY_COUNT, config.SIGINT_WAIT_TIME, config.SIGTERM_WAIT_TIME)
+        targets = []
+        for entry in self.owned.entries():
+            miner = self.miners.get(entry['name']) or {}
+            stages = [(process_group.SIGKILL, 3)] if miner.get('mining_tool', '').lower() == 'astrominer' else None
+            for target in self._stop_targets(entry['name'], entry['pid'], entry.get('pgid')):
+                target.stages = stages
+                targets.append(target)
+        
+        if not targets:
+            print("[KILL-OWNED] Không có tiến trình nào do manager khởi động")
+            return []
+        
+        print(f"[KILL-OWNED] Dừng {len(targets)} tiến trình từ registry...")
+        results = escalation.escalate(targets, default_stages, deadline=config.STOP_DEADLINE)
+        for result in results:
+            print(f"[KILL-OWNED] {result['label']} (PID: {result['pid']}): {'stopped' if result['stopped'] else 'STILL ALIVE'} by {result['signal']} in {result['elapsed_ms']} ms")
+        return results
+    
+    def cleanup_leftover_processes(self):
+        """Boot: stop miners left running by a previous manager instance (before auto-start duplicates them)"""
+        leftovers = self.owned.load()
+        if config.OWNED_PROCESS_SCAN_ON_BOOT:
+            known = {entry['pid'] for entry in leftovers}
+            leftovers += [entry for entry in self.owned.scan() if entry['pid'] not in known]
+        if not leftovers:
+            return []
+        
+        print(f"[KILL-OWNED] Tìm thấy {len(leftovers)} miner còn chạy từ lần trước: {[(e['name'], e['pid']) for e in leftovers]}")
+        targets = []
+        for entry in leftovers:
+            targets.extend(self._stop_targets(entry['name'], entry['pid'], entry.get('pgid')))
+        default_stages = process_group.stop_stages(config.SIGINT_RETRY_COUNT, config.SIGINT_WAIT_TIME, config.SIGTERM_WAIT_TIME)
+        results = escalation.escalate(targets, default_stages, deadline=config.STOP_DEADLINE)
+        for entry in leftovers:
+            self.owned.remove(entry['pid'])
+        return results
+    
     def get_active_mining_tools(self):
         """Get list of active mining tools from current miners"""
         tools = set()
@@ -650,35 +724,21 @@ class MiningManager:
             try:
                 time.sleep(30)  # Check every 30 seconds
                 
+                # Dead miners are handled by the reaper when they exit; this loop only reports
                 active_miners = []
-                for name, miner in self.miners.items():
+                for name, miner in list(self.miners.items()):
                     if miner['status'] == 'running' and miner['pid']:
-                        try:
-                            proc = psutil.Process(miner['pid'])
-                            if proc.is_running():
-                                # Don't override hash_rate here, let the _monitor_miner thread handle it
-                                # hash_rate is already being updated in real-time by _monitor_miner
-                                
-                                active_miners.append({
-                                    'name': name,
-                                    'coin': miner.get('coin_name', ''),
-                                    'tool': miner.get('mining_tool', ''),
-                                    'hash_rate': miner.get('hash_rate', 0),
-                                    'pid': miner['pid'],
-                                    'uptime': time.time() - miner.get('start_time', time.time())
-                                })
-                            else:
-                                # Process died, update status
-                                miner['status'] = 'stopped'
-                                miner['pid'] = None
-                                miner['hash_rate'] = 0
-                                print(f"[THEO DÕI] Miner {name} đã dừng, reset trạng thái về stopped")
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
-                            # Process no longer exists
-                            miner['status'] = 'stopped'
-                            miner['pid'] = None
-                            miner['hash_rate'] = 0
-                            self.log_monitor(f"[THEO DÕI] Không tìm thấy tiến trình miner {name}, reset trạng thái về stopped")
+                        active_miners.append({
+                            'name': name,
+                            'coin': miner.get('coin_name', ''),
+                            'tool': miner.get('mining_tool', ''),
+                            'hash_rate': miner.get('hash_rate', 0),
+                            'pid': miner['pid'],
+                            'uptime': time.time() - (miner.get('start_time') or time.time())
+                        })
+                
+                # Hash rate degradation / stall detection
+                self.check_watchdogs()
                 
                 # Print periodic status
                 if active_miners:
@@ -695,287 +755,86 @@ class MiningManager:
                 self.log_info(f"[THEO DÕI] Lỗi trong monitor_miners: {e}")
                 time.sleep(10)
 
-    def force_kill_process_by_pid(self, pid):
-        """Force kill process using system command as fallback"""
-        try:
-            import subprocess
-            import os
-            
-            # Try multiple kill methods based on OS
-            if os.name == 'nt':  # Windows
-                commands = [
-                    f"taskkill /PID {pid} /T",           # Terminate process tree
-                    f"taskkill /PID {pid} /T /F",        # Force terminate process tree
-                    f"wmic process where processid={pid} delete",  # WMI delete
-                ]
-                check_cmd = f"tasklist /FI \"PID eq {pid}\""
-            else:  # Unix/Linux
-                commands = [
-                    f"kill -INT {pid}",    # SIGINT first
-                    f"kill -INT {pid}",    # SIGINT second time
-                    f"kill -TERM {pid}",   # SIGTERM
-                    f"kill -KILL {pid}"    # SIGKILL as last resort
-                ]
-                check_cmd = f"ps -p {pid}"
-            
-            for cmd in commands:
-                try:
-                    print(f"[FORCE-KILL] Running: {cmd}")
-                    result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=10)
-                    print(f"[FORCE-KILL] Result: {result.returncode}, stdout: {result.stdout.strip()}, stderr: {result.stderr.strip()}")
-                    
-                    # Wait a bit for process to die
-                    time.sleep(2)
-                    
-                    # Check if process still exists after each command
-                    check_result = subprocess.run(check_cmd, shell=True, capture_output=True, text=True)
-                    if os.name == 'nt':
-                        # On Windows, if no output or error, process is gone
-                        if not check_result.stdout.strip() or "INFO: No tasks are running" in check_result.stdout:
-                            print(f"[FORCE-KILL] Tiến trình {pid} đã được kết thúc thành công với {cmd}")
-                            return True
-                    else:
-                        # On Unix, non-zero return code means process is gone
-                        if check_result.returncode != 0:
-                            print(f"[FORCE-KILL] Tiến trình {pid} đã được kết thúc thành công với {cmd}")
-                            return True
-                    
-                except subprocess.TimeoutExpired:
-                    print(f"[FORCE-KILL] Command timeout: {cmd}")
-                except Exception as e:
-                    print(f"[FORCE-KILL] Lỗi khi chạy {cmd}: {e}")
-            
-            # Final check
-            final_check = subprocess.run(check_cmd, shell=True, capture_output=True, text=True)
-            if os.name == 'nt':
-                process_gone = not final_check.stdout.strip() or "INFO: No tasks are running" in final_check.stdout
-            else:
-                process_gone = final_check.returncode != 0
-                
-            if process_gone:
-                print(f"[FORCE-KILL] Process {pid} is gone")
-                return True
-            else:
-                print(f"[FORCE-KILL] Process {pid} still exists")
-                return False
-                
-        except Exception as e:
-            print(f"[FORCE-KILL] Exception in force_kill_process_by_pid: {e}")
-            return False
-
-    def stop_miner(self, name):
-        """Stop a mining process"""
-        if name not in self.miners:
-            return {'success': False, 'message': f'Miner {name} không tồn tại'}
+    def stop_miner(self, name, miner=None):
+        """Stop a mining process
+        
+        miner: optional miner dict that is no longer in self.miners (replaced or
+        removed by a config update) but whose process is still running
+        """
+        with self.get_miner_lock(name):
+            return self._stop_miner(name, miner)
+    
+    def _stop_miner(self, name, miner):
+        if miner is None:
+            if name not in self.miners:
+                return {'success': False, 'message': f'Miner {name} không tồn tại'}
+            miner = self.miners[name]
         
-        miner = self.miners[name]
+        # Requested stop - the supervisor must not bring it back
+        self.hold_restarts(miner)
+        
+        if miner['status'] in ('restarting', 'crashloop'):
+            miner['status'] = 'stopped'
+            self._publish_status(name)
+            return {'success': True, 'message': f'Miner {name} stopped (đã hủy tự khởi động lại)'}
         
         if miner['status'] != 'running':
             return {'success': False, 'message': f'Miner {name} không đang chạy'}
 
-        # Special handling for astrominer - kill immediately with brute force
+        # Astrominer ignores/mishandles SIGINT and leaves worker processes behind:
+        # kill its whole process group immediately instead of escalating
         mining_tool = miner.get('mining_tool', '').lower()
         if mining_tool == 'astrominer':
-            print(f"[DEBUG] Detected astrominer - using aggressive kill strategy for {name}")
-            
-            # Step 1: Try normal kill first
-            try:
-                if miner['pid']:
-                    proc = psutil.Process(miner['pid'])
-                    proc.kill()
-                    print(f"[DEBUG] Killed astrominer parent process {miner['pid']}")
-            except:
-                pass
-            
-            # Step 2: Kill all astrominer processes by name immediately
-            kill_count = self.kill_all_miners_by_name(['astrominer'])
-            print(f"[DEBUG] Aggressive astrominer kill completed: {kill_count} processes")
-            
-            # Reset miner status
-            miner['status'] = 'stopped'
-            miner['process'] = None
-            miner['pid'] = None
-            miner['hash_rate'] = 0
-            
-            return {'success': True, 'message': f'Astrominer {name} force stopped'}
-
+            stages = [(process_group.SIGKILL, 3)]
+        else:
+            stages = process_group.stop_stages(config.SIGINT_RETRY_COUNT, config.SIGINT_WAIT_TIME, config.SIGTERM_WAIT_TIME)
+        
         try:
-            if miner['pid']:
-                # Try to terminate gracefully first
-                try:
-                    parent = psutil.Process(miner['pid'])
-                    print(f"[DEBUG] Stopping miner {name} (PID: {miner['pid']})")
-                    print(f"[DEBUG] Process name: {parent.name()}")
-                    print(f"[DEBUG] Process status: {parent.status()}")
-                    print(f"[DEBUG] Process cmdline: {parent.cmdline()}")
-                    
-                    # Handle permission issues - try to get children but don't fail if can't
-                    children = []
-                    try:
-                        children = parent.children(recursive=True)
-                        print(f"[DEBUG] Found {len(children)} child processes")
-                    except (psutil.AccessDenied, PermissionError) as e:
-                        print(f"[DEBUG] Cannot access children due to permission: {e}")
-                        # Try to find children by scanning all processes
-                        try:
-                            for proc in psutil.process_iter(['pid', 'ppid']):
-                                if proc.info['ppid'] == miner['pid']:
-                                    children.append(psutil.Process(proc.info['pid']))
-                            print(f"[DEBUG] Found {len(children)} children via process scan")
-                        except Exception as scan_e:
-                            print(f"[DEBUG] Process scan also failed: {scan_e}")
-                    
-                    # Step 1: Send SIGINT (Ctrl+C) multiple times to handle confirmation prompts
-                    print(f"[DEBUG] Sending SIGINT (Ctrl+C) to mining process...")
-                    import signal
-                    
-                    # Send multiple SIGINT signals to handle tools that ask for confirmation
-                    for attempt in range(4):  # Increased from 2 to 4 attempts
-                        try:
-                            parent.send_signal(signal.SIGINT)
-                            print(f"[DEBUG] Sent SIGINT attempt {attempt + 1} to parent {parent.pid}")
-                            
-                            for child in children:
-                                try:
-                                    child.send_signal(signal.SIGINT)
-                                    print(f"[DEBUG] Sent SIGINT attempt {attempt + 1} to child {child.pid}")
-                                except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                                    print(f"[DEBUG] Không thể gửi SIGINT tới tiến trình con {child.pid}: {e}")
-                            
-                            # Progressive delays to handle confirmation prompts
-                            if attempt == 0:
-                                time.sleep(2)  # Wait for first prompt
-                            elif attempt == 1:
-                                time.sleep(1)  # Quick response to y/n prompt
-                            elif attempt == 2:
-                                time.sleep(1)  # Another quick response
-                            elif attempt == 3:
-                                time.sleep(1)  # Final attempt
-                                
-                        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                            print(f"[DEBUG] Không thể gửi SIGINT lần thử {attempt + 1}: {e}")
-                    
-                    # Wait for graceful shutdown after multiple SIGINT
-                    print(f"[DEBUG] Waiting for graceful shutdown after multiple SIGINT...")
-                    all_processes = [parent] + children
-                    
-                    try:
-                        gone, still_alive = psutil.wait_procs(all_processes, timeout=12)
-                        print(f"[DEBUG] After SIGINT: {len(gone)} processes stopped, {len(still_alive)} still alive")
-                        
-                        # If all processes stopped gracefully, we're done
-                        if not still_alive:
-                            print(f"[DEBUG] All processes stopped gracefully with SIGINT")
-                            miner['status'] = 'stopped'
-                            miner['process'] = None
-                            miner['pid'] = None
-                            miner['hash_rate'] = 0
-                            print(f"[DEBUG] Miner {name} status reset to stopped")
-                            return {'success': True, 'message': f'Miner {name} stopped gracefully'}
-                        
-                        # Update lists for next steps
-                        children = [p for p in still_alive if p.pid != miner['pid']]
-                        parent = None
-                        for proc in still_alive:
-                            if proc.pid == miner['pid']:
-                                parent = proc
-                                break
-                                
-                    except Exception as wait_e:
-                        print(f"[DEBUG] Lỗi chờ tiến trình: {wait_e}")
-                        # Assume they are still alive
-                        still_alive = all_processes
-                    
-                    # Step 2: If SIGINT didn't work, use SIGTERM on remaining processes
-                    if still_alive:
-                        print(f"[DEBUG] Sending SIGTERM to {len(still_alive)} remaining processes...")
-                        for proc in still_alive:
-                            try:
-                                print(f"[DEBUG] Terminating process {proc.pid} ({proc.name() if hasattr(proc, 'name') else 'unknown'})")
-                                proc.terminate()
-                            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                                print(f"[DEBUG] Không thể kết thúc {proc.pid}: {e}")
-                        
-                        # Step 3: Wait for graceful shutdown after SIGTERM
-                        print(f"[DEBUG] Waiting for graceful shutdown after SIGTERM...")
-                        try:
-                            gone, still_alive = psutil.wait_procs(still_alive, timeout=6)
-                            print(f"[DEBUG] After SIGTERM: {len(gone)} processes stopped, {len(still_alive)} still alive")
-                        except Exception as wait_e:
-                            print(f"[DEBUG] Lỗi chờ sau SIGTERM: {wait_e}")
-                    
-                    # Step 4: Force kill any remaining processes with SIGKILL
-                    if still_alive:
-                        print(f"[DEBUG] Force killing {len(still_alive)} remaining processes...")
-                        for proc in still_alive:
-                            try:
-                                print(f"[DEBUG] Force killing process {proc.pid}")
-                                proc.kill()
-                            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                                print(f"[DEBUG] Không thể buộc kết thúc {proc.pid}: {e}")
-                        
-                        # Step 5: Final wait to ensure all are dead
-                        try:
-                            print(f"[DEBUG] Final wait for {len(still_alive)} processes...")
-                            psutil.wait_procs(still_alive, timeout=3)
-                        except Exception as wait_e:
-                            print(f"[DEBUG] Lỗi chờ cuối cùng: {wait_e}")
-                        
-                except psutil.NoSuchProcess:
-                    print(f"[DEBUG] Process {miner['pid']} already terminated")
-                except Exception as e:
-                    print(f"[DEBUG] Lỗi khi dừng tiến trình {miner['pid']}: {type(e).__name__}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    
-                    # Try fallback kill using system commands
-                    print(f"[DEBUG] Trying fallback system kill for PID {miner['pid']}")
-                    if self.force_kill_process_by_pid(miner['pid']):
-                        print(f"[DEBUG] Đã kết thúc thành công {miner['pid']} bằng lệnh hệ thống")
-                    else:
-                        print(f"[DEBUG] Không thể kết thúc {miner['pid']} ngay cả với lệnh hệ thống")
-                        
-                        # Last resort: kill by process name
-                        print(f"[DEBUG] Last resort: killing by process name...")
-                        mining_tool = miner.get('mining_tool', '')
-                        if mining_tool:
-                            kill_count = self.kill_all_miners_by_name([mining_tool])
-                            print(f"[DEBUG] Killed {kill_count} processes by name {mining_tool}")
-                            
-                            # Wait a bit and check if any astrominer processes still exist
-                            if mining_tool.lower() == 'astrominer':
-                                time.sleep(2)
-                                astrominer_procs = []
-                                for proc in psutil.process_iter(['pid', 'name']):
-                                    try:
-                                        if 'astrominer' in proc.info['name'].lower():
-                                            astrominer_procs.append(proc)
-                                    except:
-                                        pass
-                                
-                                if astrominer_procs:
-                                    print(f"[DEBUG] Found {len(astrominer_procs)} remaining astrominer processes, force killing...")
-                                    for proc in astrominer_procs:
-                                        try:
-                                            proc.kill()
-                                            print(f"[DEBUG] Force killed remaining astrominer PID {proc.pid}")
-                                        except:
-                                            pass
+            pid = miner['pid']
+            pgid = miner.get('pgid')
+            result = {'stopped': True, 'signal': None, 'elapsed_ms': 0}
+            if pid:
+                print(f"[STOP-{name}] Dừng miner PID {pid} (process group {pgid})...")
+                results = escalation.escalate(self._stop_targets(name, pid, pgid), stages, deadline=config.STOP_DEADLINE)
+                result = results[0]
+                result['stopped'] = all(r['stopped'] for r in results)
+                print(f"[STOP-{name}] {'✅' if result['stopped'] else '❌'} signal={result['signal']}, {result['elapsed_ms']:.0f} ms")
+            
+            if not result['stopped']:
+                # Still alive after SIGKILL (e.g. uninterruptible I/O); the reaper resets state when it exits
+                return {'success': False, 'message': f'Miner {name} vẫn còn chạy sau SIGKILL (PID {pid})'}
             
             miner['status'] = 'stopped'
             miner['process'] = None
             miner['pid'] = None
+            miner['pgid'] = None
             miner['hash_rate'] = 0
+            self._publish_status(name)
             
-            print(f"[DEBUG] Miner {name} status reset to stopped")
+            if mining_tool == 'astrominer':
+                return {'success': True, 'message': f'Astrominer {name} force stopped'}
+            if result['signal'] == 'SIGINT':
+                return {'success': True, 'message': f'Miner {name} stopped gracefully'}
             return {'success': True, 'message': f'Miner {name} stopped'}
             
         except Exception as e:
-            print(f"[DEBUG] Không thể dừng miner {name}: {type(e).__name__}: {e}")
+            print(f"[STOP-{name}] Không thể dừng miner {name}: {type(e).__name__}: {e}")
             import traceback
             traceback.print_exc()
             return {'success': False, 'message': f'Không thể dừng miner {name}: {str(e)}'}
     
+    def _stop_targets(self, name, pid, pgid):
+        """Escalation targets for one miner: its process group, or its known process tree (no groups)"""
+        if pgid and os.name == 'posix':
+            return [escalation.Target(pid, pgid=pgid, label=name)]
+        targets = [escalation.Target(pid, label=name)]
+        try:
+            for child in psutil.Process(pid).children(recursive=True):
+                targets.append(escalation.Target(child.pid, label=name))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+        return targets
+    
     def get_miner_status(self, name):
         """Get status of a specific miner"""
         if name not in self.miners:
@@ -983,16 +842,7 @@ class MiningManager:
         
         miner = self.miners[name]
         
-        # Check if process is still running
-        if miner['status'] == 'running' and miner['pid']:
-            try:
-                psutil.Process(miner['pid'])
-            except psutil.NoSuchProcess:
-                miner['status'] = 'stopped'
-                miner['process'] = None
-                miner['pid'] = None
-                miner['hash_rate'] = 0
-        
+        # Dead processes are marked stopped by the reaper as soon as they exit
         return {
             'success': True,
             'name': name,
@@ -1002,11 +852,139 @@ class MiningManager:
             'hash_rate': miner['hash_rate'] * 1_000_000 if miner['hash_rate'] is not None else 0,  # Always return H/s for API
             'coin_name': miner.get('coin_name', ''),
             'mining_tool': miner.get('mining_tool', ''),
+            'shares': self.get_share_stats(name).to_dict(),
+            'pipe_stalls': miner.get('pipe_stalls', 0),
+            'ready': miner.get('ready', False),
+            'time_to_first_hashrate': miner.get('time_to_first_hashrate'),
+            'last_exit_code': miner.get('last_exit_code'),
+            'last_exit_time': miner.get('last_exit_time'),
+            'last_exit_reason': miner.get('last_exit_reason'),
+            'restart_count': miner.get('restart_count', 0),
+            'cpu_affinity': format_cpu_list(miner['cpu_affinity']) if miner.get('cpu_affinity') else None,
+            'cpu_set': format_cpu_list(miner['cpu_set']) if miner.get('cpu_set') else None,
+            'resources': self.get_resource_state(name, miner),
+            'supervisor': self.get_restart_policy(miner).to_dict(),
+            'watchdog': self.get_watchdog_state(name, max_events=5),
             'last_output': miner['last_output'][-1000:] if miner['last_output'] else ''  # Last 1000 chars
         }
     
+    def get_history(self, name):
+        """Get (or create) hash rate history ring buffer for a miner"""
+        history = self.hash_history.get(name)
+        if history is None:
+            history = HashRateHistory(config.HASH_RATE_HISTORY_SIZE)
+            self.hash_history[name] = history
+        return history
+    
+    def get_output_ring(self, name):
+        """Get (or create) recent output buffer for a miner"""
+        ring = self.output_rings.get(name)
+        if ring is None:
+            ring = OutputRing(config.OUTPUT_BUFFER_BYTES)
+            self.output_rings[name] = ring
+        return ring
+    
+    def get_event_hub(self, name):
+        """Get (or create) SSE fan-out hub for a miner"""
+        hub = self.event_hubs.get(name)
+        if hub is None:
+            hub = MinerEventHub(self.get_output_ring(name))
+            self.event_hubs[name] = hub
+        return hub
+    
+    def _publish_status(self, name):
+        """Push a status event to stream subscribers if the status changed"""
+        miner = self.miners.get(name)
+        if miner is None:
+            return
+        hub = self.get_event_hub(name)
+        status = miner.get('status')
+        if getattr(hub, 'last_status', None) != status:
+            hub.last_status = status
+            hub.publish('status', {'status': status, 'pid': miner.get('pid'), 'timestamp': time.time()})
+            self.status_snapshot.invalidate()
+    
+    def get_share_stats(self, name):
+        """Get (or create) share counters for a miner"""
+        stats = self.share_stats.get(name)
+        if stats is None:
+            stats = ShareStats(config.SHARE_RATIO_WINDOW)
+            self.share_stats[name] = stats
+        return stats
+    
+    def get_watchdog(self, name):
+        """Get (or create) hash rate watchdog for a miner"""
+        watchdog = self.watchdogs.get(name)
+        if watchdog is None:
+            watchdog = MinerWatchdog(
+                config.WATCHDOG_LOW_FRACTION,
+                config.WATCHDOG_LOW_SECONDS,
+                config.WATCHDOG_STALL_SECONDS,
+                config.WATCHDOG_WARMUP_SECONDS,
+                config.WATCHDOG_BASELINE_TAU,
+                config.WATCHDOG_CURRENT_TAU,
+                config.WATCHDOG_MIN_SAMPLES,
+                config.WATCHDOG_COOLDOWN,
+                config.WATCHDOG_MAX_EVENTS
+            )
+            self.watchdogs[name] = watchdog
+        return watchdog
+    
+    def get_watchdog_state(self, name, max_events=None):
+        """Watchdog state for the API (hash rates in H/s)"""
+        state = self.get_watchdog(name).to_dict(max_events)
+        for key in ('baseline', 'current'):
+            if state[key] is not None:
+                state[key] = state[key] * 1_000_000
+        return state
+    
+    def check_watchdogs(self):
+        """Run the hash rate watchdog of every running miner; act on degraded/stalled ones"""
+        if not config.WATCHDOG_ENABLED:
+            return
+        for name, miner in list(self.miners.items()):
+            # Benchmark trials change threads/layout on purpose
+            if miner.get('status') != 'running' or miner.get('benchmark'):
+                continue
+            watchdog = self.get_watchdog(name)
+            trigger = watchdog.check()
+            if not trigger:
+                continue
+            
+            action = config.WATCHDOG_ACTION
+            event = dict(trigger)
+            event['action'] = action
+            event['pid'] = miner.get('pid')
+            for key in ('baseline', 'current'):
+                if event[key] is not None:
+                    event[key] = event[key] * 1_000_000  # H/s for API
+            watchdog.record(event)
+            self.get_event_hub(name).publish('watchdog', event)
+            print(f"[WATCHDOG-{name}] ⚠️ {trigger['type']}: {trigger['message']} -> {action}")
+            
+            if action == 'restart':
+                thread = threading.Thread(target=self._watchdog_restart, args=(name, miner), name=f'watchdog-restart-{name}')
+                thread.daemon = True
+                thread.start()
+    
+    def _watchdog_restart(self, name, miner):
+        """Restart a degraded miner (keeps crash-restart backoff state)"""
+        try:
+            with self.get_miner_lock(name):
+                result = self.stop_miner(name, miner=miner)
+                print(f"[WATCHDOG-{name}] Dừng: {result['message']}")
+                if self.miners.get(name) is not miner or not result['success']:
+                    return  # Config replaced meanwhile (reconcile owns it now) or still alive
+                # A user stop before the start below turns this back into 'stopped'
+                miner['status'] = 'restarting'
+                miner['stop_requested'] = False
+            result = self.start_miner(name, supervised=True)
+            print(f"[WATCHDOG-{name}] {'✅' if result['success'] else '❌'} Khởi động lại: {result['message']}")
+        except Exception as e:
+            print(f"[WATCHDOG-{name}] ❌ Lỗi khi khởi động lại: {e}")
+    
     def get_all_status(self):
-        """Get status of all miners"""
+        """Build status of all miners (live; the API serves the cached status_snapshot)"""
         status_list = []
         for name in self.miners:
             status = self.get_miner_status(name)
@@ -1020,92 +998,436 @@ class MiningManager:
             'miners': status_list
         }
     
-    def _monitor_miner(self, name):
-        """Monitor mining process output for hash rate"""
-        miner = self.miners[name]
+    def _monitor_miner(self, name, miner):
+        """Monitor mining process output for hash rate (shared I/O thread on POSIX)
+        and watch for its exit with the reaper
+        
+        Returns the monitor context (its 'ready' event fires on the first readiness
+        signal or when the process exits), or None if there is no process.
+        """
         process = miner['process']
         
         if not process:
             print(f"[MONITOR-{name}] ⚠️ No process object to monitor")
+            return None
+        
+        mining_tool = miner.get('mining_tool', '').lower()
+        ctx = {
+            'miner': miner,
+            'process': process,
+            'parser': get_parser(mining_tool),
+            'history': self.get_history(name),
+            'share_parser': get_share_parser(mining_tool),
+            'share_stats': self.get_share_stats(name),
+            'watchdog': self.get_watchdog(name),
+            'output': self.get_output_ring(name),
+            'events': self.get_event_hub(name),
+            'probe': get_probe(mining_tool),
+            'cgroup': miner.get('cgroup'),  # Removed once this process has exited
+            'ready': threading.Event(),  # Set on first readiness signal or when the process exits
+            'line_count': 0,
+        }
+        
+        print(f"[MONITOR-{name}] 🔍 Bắt đầu monitor PID {process.pid}, tool={mining_tool}")
+        
+        # Exit detection (also covers a process that died before we got here)
+        self.reaper.watch(process, lambda return_code, exit_time: self._handle_process_exit(name, ctx, return_code, exit_time))
+        
+        if self.output_mux.supported:
+            self.output_mux.register(
+                name,
+                process.stdout,
+                on_line=lambda line: self._handle_output_line(name, ctx, line),
+                on_eof=lambda: self._handle_output_eof(name, ctx),
+                on_stall=lambda size: self._handle_pipe_stall(name, ctx, size)
+            )
+        else:
+            # Windows: selectors can't wait on pipes, fall back to one reader thread per miner
+            thread = threading.Thread(target=self._read_output_blocking, args=(name, ctx))
+            thread.daemon = True
+            thread.start()
+        
+        return ctx
+    
+    def _read_output_blocking(self, name, ctx):
+        """Fallback reader: blocking readline loop in a dedicated thread"""
+        try:
+            for raw in iter(ctx['process'].stdout.readline, b''):
+                self._handle_output_line(name, ctx, raw.decode('utf-8', errors='replace'))
+        except Exception as e:
+            print(f"[MONITOR-{name}] ❌ Lỗi khi theo dõi miner: {e}")
+            ctx['miner']['status'] = 'error'
+            ctx['miner']['last_output'] = f"Monitor error: {str(e)}"
             return
+        self._handle_output_eof(name, ctx)
+    
+    def _handle_output_line(self, name, ctx, line):
+        """Process one line of miner output"""
+        miner = ctx['miner']
+        ctx['line_count'] += 1
+        line_count = ctx['line_count']
+        
+        # Debug: Print first 20 lines for ALL miners to see what's happening
+        if line_count <= 20:
+            print(f"[{name}] [LINE-{line_count}] {line.strip()}")
+        
+        # Store latest output for monitoring (byte-budgeted ring, no string copies)
+        ctx['output'].append(line)
+        ctx['events'].notify()
+        
+        # Extract hash rate from output (tool-specific parser with prefilter)
+        hash_rate = ctx['parser'].parse(line)
+        if hash_rate:
+            if hash_rate != miner.get('hash_rate'):
+                ctx['events'].publish('hash_rate', {'hash_rate': hash_rate * 1_000_000, 'timestamp': time.time()})
+            miner['hash_rate'] = hash_rate
+            ctx['history'].append(hash_rate)
+            ctx['watchdog'].observe(hash_rate)
+            if miner.get('time_to_first_hashrate') is None and miner.get('process') is ctx['process']:
+                miner['time_to_first_hashrate'] = round(time.time() - miner['start_time'], 3)
+        
+        # Startup readiness: first pool connection / job / hash rate line
+        if not ctx['ready'].is_set():
+            signal_name = 'hash_rate' if hash_rate else ctx['probe'].check(line)
+            if signal_name:
+                if miner.get('process') is ctx['process']:
+                    miner['ready'] = True
+                    miner['ready_signal'] = signal_name
+                    miner['time_to_ready'] = round(time.time() - miner['start_time'], 3)
+                ctx['ready'].set()
+        
+        # Share counters (accepted/rejected/reasons)
+        if ctx['share_parser']:
+            shares = ctx['share_parser'].parse(line)
+            if shares:
+                ctx['share_stats'].update(shares)
+        
+        line_lower = line.lower()
+        
+        # Print important mining output
+        if any(keyword in line_lower for keyword in ['accepted', 'rejected', 'error', 'connected', 'difficulty', 'hashrate']):
+            print(f"[{name}] {line.strip()}")
+    
+    def _handle_output_eof(self, name, ctx):
+        """Miner closed its stdout (state is updated by the reaper when the process exits)"""
+        line_count = ctx['line_count']
+        if line_count == 0:
+            print(f"[MONITOR-{name}] ⚠️ Output đã đóng mà KHÔNG có dòng nào!")
+        else:
+            print(f"[MONITOR-{name}] Output của miner đã đóng (đã đọc {line_count} dòng)")
+    
+    def _handle_process_exit(self, name, ctx, return_code, exit_time):
+        """Reaper callback: the miner process has exited - the one place that marks miners dead
+        
+        Runs on the single reaper thread, so it only records the exit, resets state and
+        wakes waiters; signalling leftovers, cgroup removal and rebalancing go to exit_cleanup.
+        """
+        miner = ctx['miner']
+        process = ctx['process']
+        reason = describe_exit(return_code)
+        
+        miner['last_exit_code'] = return_code
+        miner['last_exit_time'] = exit_time
+        miner['last_exit_reason'] = reason
+        self.owned.remove(process.pid)
+        stop_requested = miner.get('stop_requested')
+        
+        # Only reset state if the miner hasn't been restarted with a new process meanwhile
+        crashed = False
+        if miner.get('process') is process:
+            miner['status'] = 'stopped'
+            miner['process'] = None
+            miner['pid'] = None
+            miner['pgid'] = None
+            miner['hash_rate'] = 0
+            crashed = not miner.get('stop_requested')
+            self._publish_status(name)
+        
+        if ctx['line_count'] == 0:
+            print(f"[MONITOR-{name}] ⚠️ Tiến trình kết thúc mà KHÔNG có output nào! ({reason})")
+            miner['last_output'] = f"Process exited with code {return_code}, no output captured"
+        else:
+            print(f"[MONITOR-{name}] Tiến trình mining PID {process.pid} đã kết thúc: {reason} (đã đọc {ctx['line_count']} dòng)")
+        
+        # Exited on its own (not via stop_miner / kill-all) - hand over to the supervisor
+        if crashed and config.SUPERVISOR_ENABLED and self.miners.get(name) is miner:
+            uptime = exit_time - miner['start_time'] if miner.get('start_time') else 0
+            self._schedule_restart(name, miner, reason, uptime)
         
+        ctx['ready'].set()  # Release a start_miner() still waiting for readiness
+        self.exit_cleanup.submit(self._cleanup_after_exit, name, ctx, stop_requested)
+    
+    def _cleanup_after_exit(self, name, ctx, stop_requested):
+        """exit_cleanup worker: leftover group members, the miner's cgroup, core sets"""
+        pid = ctx['process'].pid
         try:
-            mining_tool = miner.get('mining_tool', '').lower()
-            line_count = 0
+            # Leader gone but members of its process group left behind (e.g. shell killed,
+            # miner orphaned) - don't let them keep mining untracked. A requested stop
+            # is escalating over the group itself.
+            if os.name == 'posix' and not stop_requested and process_group.group_alive(pid):
+                print(f"[MONITOR-{name}] ⚠️ Còn tiến trình sót lại trong group {pid}, gửi SIGKILL")
+                escalation.escalate([escalation.Target(pid, pgid=pid, label=name)], [(process_group.SIGKILL, 1)])
             
-            print(f"[MONITOR-{name}] 🔍 Bắt đầu monitor PID {process.pid}, tool={mining_tool}")
+            self.cgroups.remove(ctx.get('cgroup'))
             
-            # Check if process is still alive before reading
-            if process.poll() is not None:
-                print(f"[MONITOR-{name}] ⚠️ Process đã chết trước khi monitor! Return code: {process.returncode}")
-                miner['status'] = 'error'
-                miner['last_output'] = f"Process exited immediately with code {process.returncode}"
-                return
+            # Free the cores of a miner that is gone for good ('restarting' keeps its set)
+            self.rebalance_cpu_affinity()
+        except Exception as e:
+            print(f"[MONITOR-{name}] ❌ Lỗi khi dọn dẹp sau khi tiến trình {pid} kết thúc: {e}")
+    
+    # ==================== Benchmark ====================
+    def start_benchmark(self, job):
+        """Register a tuning job and run it in the background (one job at a time)"""
+        self.benchmarks[job.id] = job
+        for old_id in sorted(self.benchmarks, key=lambda job_id: self.benchmarks[job_id].created_at)[:-config.BENCHMARK_KEEP_JOBS]:
+            if self.benchmarks[old_id].state not in ('pending', 'running'):
+                self.benchmarks.pop(old_id)
+        thread = threading.Thread(target=self.run_benchmark, args=(job,), name=f'benchmark-{job.name}')
+        thread.daemon = True
+        thread.start()
+    
+    def get_running_benchmark(self):
+        for job in self.benchmarks.values():
+            if job.state in ('pending', 'running'):
+                return job
+        return None
+    
+    def get_run_settings(self, miner):
+        """(config, cpu_affinity) the next process runs with: a benchmark trial overrides the saved ones"""
+        trial = miner.get('benchmark_trial')
+        if trial:
+            return trial['config'], trial['cpu_affinity']
+        return miner['config'], miner.get('cpu_affinity')
+    
+    def run_benchmark(self, job):
+        """Run every trial: start with trial threads/CPU set, warm up, measure, stop
+        
+        Trials run through miner['benchmark_trial'] (never saved), so the miner's own
+        config and core set are untouched unless job.apply replaces them with the
+        winner; it is restarted if it was running before. While miner['benchmark'] is
+        set, config updates don't start it and a replaced entry ends the job.
+        """
+        name = job.name
+        miner = self.miners.get(name)
+        if miner is None:
+            job.finish(f'Miner {name} không tồn tại')
+            return
+        
+        was_running = miner.get('status') in ('running', 'restarting')
+        topology = self.get_cpu_topology()
+        usable = self.get_usable_cpus()
+        miner['benchmark'] = job.id
+        job.start()
+        print(f"[BENCHMARK-{name}] Bắt đầu {len(job.trials)} lượt đo (warmup {job.warmup}s, đo {job.duration}s)")
+        error = None
+        
+        try:
+            if was_running:
+                self.stop_miner(name, miner=miner)
             
-            for line in iter(process.stdout.readline, ''):
-                if not line:
+            for trial in job.trials:
+                if job.cancelled or self.miners.get(name) is not miner:
                     break
+                cpus = layout_cpus(topology, usable, trial['layout'], trial['threads'])
+                cores = physical_cores(topology, cpus, usable, trial['threads'])
+                job.current = {'threads': trial['threads'], 'layout': trial['layout']}
+                miner['benchmark_trial'] = {'config': trial['config'], 'cpu_affinity': cpus}
                 
-                line_count += 1
-                
-                # Debug: Print first 20 lines for ALL miners to see what's happening
-                if line_count <= 20:
-                    print(f"[{name}] [LINE-{line_count}] {line.strip()}")
-                
-                # Store latest output for monitoring
-                if 'latest_output' not in miner:
-                    miner['latest_output'] = ''
-                miner['latest_output'] += line
-                
-                # Keep only last 5000 characters to prevent memory issues
-                if len(miner['latest_output']) > 5000:
-                    miner['latest_output'] = miner['latest_output'][-5000:]
-                
-                # Extract hash rate from output (tool-specific patterns)
-                # Different extraction logic for different tools
-                line_lower = line.lower()
-                tool_name = miner.get('mining_tool', '').lower()
-                
-                # Astrominer: extract from any line with "Hashrate"
-                if tool_name == 'astrominer':
-                    if 'hashrate' in line_lower:
-                        hash_rate = self._extract_hash_rate(line, tool_name)
-                        if hash_rate:
-                            miner['hash_rate'] = hash_rate
-                # CCMiner/XMRig: extract only from accepted lines
-                elif 'accepted:' in line_lower or 'accepted ' in line_lower:
-                    hash_rate = self._extract_hash_rate(line, tool_name)
-                    if hash_rate:
-                        miner['hash_rate'] = hash_rate
-                
-                # Print important mining output
-                if any(keyword in line_lower for keyword in ['accepted', 'rejected', 'error', 'connected', 'difficulty', 'hashrate']):
-                    print(f"[{name}] {line.strip()}")
-                
-                # Check if process is still running
-                if process.poll() is not None:
-                    print(f"[MONITOR-{name}] ⚠️ Process died during monitoring! Return code: {process.returncode}, Lines read: {line_count}")
+                result = self.start_miner(name)
+                if not result['success']:
+                    job.record(trial, cpus, cores, error=result['message'])
+                    continue
+                if job.wait(job.warmup):
                     break
-            
-            # Process has ended
-            return_code = process.poll()
-            miner['status'] = 'stopped'
-            miner['process'] = None
-            miner['pid'] = None
-            miner['hash_rate'] = 0
-            
-            if line_count == 0:
-                print(f"[MONITOR-{name}] ⚠️ Tiến trình kết thúc mà KHÔNG có output nào! Return code: {return_code}")
-                miner['last_output'] = f"Process exited with code {return_code}, no output captured"
+                window_start = time.time()
+                if job.wait(job.duration):
+                    break
+                samples = self.get_history(name).samples(window_start, time.time())
+                died = miner.get('status') != 'running'
+                self.stop_miner(name, miner=miner)
+                job.record(trial, cpus, cores, samples, error=f"Miner dừng trong lúc đo ({miner.get('last_exit_reason')})" if died else None)
+                print(f"[BENCHMARK-{name}] threads={trial['threads']} layout={trial['layout']}: {job.results[-1]['hash_rate']:.4f} MH/s ({len(samples)} mẫu)")
+        except Exception as e:
+            error = str(e)
+            print(f"[BENCHMARK-{name}] ❌ Lỗi: {e}")
+        finally:
+            if miner.get('status') == 'running':
+                self.stop_miner(name, miner=miner)
+            miner.pop('benchmark_trial', None)
+            
+            replaced = self.miners.get(name) is not miner
+            winner = job.winner()
+            if job.apply and winner and not error and not job.cancelled and not replaced:
+                miner['config'] = winner['config']
+                miner['cpu_affinity'] = parse_cpu_list(winner['cpus']) if winner['cpus'] else None
+                job.applied = True
+                self.save_config()
+                print(f"[BENCHMARK-{name}] ✅ Áp dụng cấu hình tốt nhất: threads={winner['threads']} layout={winner['layout']}")
+            miner.pop('benchmark', None)
+            job.finish(error)
+            
+            if was_running and not replaced:
+                self.start_miner(name)
+    
+    # ==================== Resource Limits ====================
+    def get_miner_resources(self, miner):
+        """Effective resource settings: DEFAULT_MINER_RESOURCES overridden by the miner's own"""
+        resources = parse_resources(config.DEFAULT_MINER_RESOURCES)
+        resources.update(miner.get('resources') or {})
+        return resources
+    
+    def apply_resources(self, name, miner, process):
+        """Freshly started miner: move it into its own cgroup (cpu.max / memory.max), set nice / ionice"""
+        resources = self.get_miner_resources(miner)
+        miner['cgroup'] = None
+        if resources.get('cpu_max') or resources.get('memory_max'):
+            if not self.cgroups.enabled:
+                self.log_debug(f"[RESOURCES-{name}] CGROUP_ENABLED=False, bỏ qua cpu_max/memory_max")
+            else:
+                try:
+                    miner['cgroup'] = self.cgroups.create(name, process.pid, resources.get('cpu_max'), resources.get('memory_max'))
+                except OSError as e:
+                    print(f"[RESOURCES-{name}] ❌ Không thể tạo cgroup: {e}")
+        self.apply_miner_priority(name, resources)
+    
+    def apply_miner_priority(self, name, resources=None):
+        """Set nice / ionice on every thread of a miner's process tree"""
+        miner = self.miners.get(name)
+        if not miner or not miner.get('pid'):
+            return False
+        resources = resources or self.get_miner_resources(miner)
+        try:
+            apply_priority(miner['pid'], resources.get('nice'), resources.get('ionice'))
+        except psutil.NoSuchProcess:
+            return False
+        except (psutil.AccessDenied, OSError, ValueError) as e:
+            print(f"[RESOURCES-{name}] ❌ Không thể đặt nice/ionice: {e}")
+            return False
+        return True
+    
+    def get_resource_state(self, name, miner):
+        """Configured limits plus live cgroup usage / throttling (cpu.stat) of a miner"""
+        return {
+            'settings': self.get_miner_resources(miner),
+            'cgroup': self.cgroups.stats(miner.get('cgroup')) if miner.get('status') == 'running' else None
+        }
+    
+    # ==================== CPU Affinity ====================
+    def get_cpu_topology(self):
+        """CPU topology (cores, SMT siblings, L3 and NUMA domains), read once"""
+        if self.cpu_topology is None:
+            self.cpu_topology = CpuTopology.read()
+        return self.cpu_topology
+    
+    def get_usable_cpus(self):
+        """CPUs miners may use: what the manager itself may run on, minus CPU_RESERVED"""
+        reserved = set(parse_cpu_list(config.CPU_RESERVED) or [])
+        return [cpu for cpu in allowed_cpus() if cpu not in reserved]
+    
+    def rebalance_cpu_affinity(self):
+        """Compute core sets of active miners and (re)pin every process whose set or PID changed
+        
+        Explicit per-miner cpu_affinity is always honoured. With CPU_PARTITION_ENABLED
+        the other running/restarting miners get disjoint, cache-local core sets.
+        """
+        with self.affinity_lock:
+            active = {
+                name: self.get_run_settings(miner)[1]
+                for name, miner in list(self.miners.items())
+                if miner.get('status') in ('running', 'restarting')
+            }
+            if config.CPU_PARTITION_ENABLED:
+                assignment = partition(self.get_cpu_topology(), active, self.get_usable_cpus())
             else:
-                print(f"[MONITOR-{name}] Tiến trình mining đã kết thúc (đã đọc {line_count} dòng, return code: {return_code})")
+                assignment = {name: cpus for name, cpus in active.items() if cpus}
             
-        except Exception as e:
-            print(f"[MONITOR-{name}] ❌ Lỗi khi theo dõi miner: {e}")
-            import traceback
-            traceback.print_exc()
-            miner['status'] = 'error'
-            miner['last_output'] = f"Monitor error: {str(e)}"
+            for name, miner in list(self.miners.items()):
+                cpus = assignment.get(name)
+                miner['cpu_set'] = cpus
+                if miner.get('status') != 'running' or not miner.get('pid'):
+                    continue
+                pinned = miner.get('cpu_pinned')
+                # Nothing to do: same set already applied to this very process, or never pinned
+                if pinned == (miner['pid'], cpus) or (pinned is None and cpus is None):
+                    continue
+                self.pin_miner(name)
+    
+    def pin_miner(self, name):
+        """Apply a miner's core set to its whole process tree (no set = back to all usable CPUs)"""
+        miner = self.miners.get(name)
+        if not miner or not miner.get('pid'):
+            return False
+        pid = miner['pid']
+        cpus = miner.get('cpu_set')
+        try:
+            tasks = apply_affinity(pid, cpus or self.get_usable_cpus())
+        except psutil.NoSuchProcess:
+            return False
+        except (psutil.AccessDenied, OSError, ValueError) as e:
+            print(f"[AFFINITY-{name}] ❌ Không thể đặt CPU affinity {cpus}: {e}")
+            return False
+        miner['cpu_pinned'] = (pid, cpus)
+        if cpus:
+            self.log_debug(f"[AFFINITY-{name}] PID {pid} -> CPU {format_cpu_list(cpus)} ({tasks} threads)")
+        return True
+    
+    def get_restart_policy(self, miner):
+        """Get (or create) crash-restart policy of a miner (reset when its config is replaced)"""
+        policy = miner.get('restart_policy')
+        if policy is None:
+            policy = RestartPolicy(
+                config.RESTART_BACKOFF_BASE,
+                config.RESTART_BACKOFF_MAX,
+                config.RESTART_BACKOFF_JITTER,
+                config.CRASH_LOOP_MAX_FAILURES,
+                config.CRASH_LOOP_WINDOW,
+                config.RESTART_STABLE_SECONDS
+            )
+            miner['restart_policy'] = policy
+        return policy
+    
+    def hold_restarts(self, miner):
+        """Mark a miner as deliberately stopped and drop any pending supervisor restart"""
+        miner['stop_requested'] = True
+        policy = miner.get('restart_policy')
+        if policy:
+            policy.cancel()
+    
+    def _schedule_restart(self, name, miner, reason, uptime):
+        """Supervisor: restart a miner that died on its own, with backoff, or park it"""
+        policy = self.get_restart_policy(miner)
+        delay = policy.record_exit(reason, uptime)
+        if delay is None:
+            miner['status'] = 'crashloop'
+            self._publish_status(name)
+            print(f"[SUPERVISOR-{name}] ⛔ Crash loop: {config.CRASH_LOOP_MAX_FAILURES} lần lỗi trong {config.CRASH_LOOP_WINDOW}s, tạm dừng tự khởi động lại (lý do cuối: {reason})")
+            return
+        
+        miner['status'] = 'restarting'
+        self._publish_status(name)
+        print(f"[SUPERVISOR-{name}] 🔁 Khởi động lại sau {delay:.1f}s (lần {policy.attempt}, lý do: {reason})")
+        policy.schedule(delay, lambda: self._supervised_restart(name, miner))
+    
+    def _supervised_restart(self, name, miner):
+        """Timer callback of the supervisor"""
+        # Config replaced/removed, stopped by the user or already started by someone else
+        if self.miners.get(name) is not miner or miner.get('stop_requested') or miner.get('status') != 'restarting':
+            return
+        policy = self.get_restart_policy(miner)
+        crashes_before = policy.crash_count
+        result = self.start_miner(name, supervised=True)
+        if result['success']:
+            print(f"[SUPERVISOR-{name}] ✅ Đã khởi động lại (PID {result.get('pid')})")
+        elif policy.crash_count == crashes_before and not miner.get('stop_requested'):
+            # Failed before a process existed (missing binary, bad config) - the reaper won't see it
+            self._schedule_restart(name, miner, result['message'], 0)
+    
+    def _handle_pipe_stall(self, name, ctx, size):
+        """Pipe was found full - the miner may have blocked writing its output"""
+        miner = ctx['miner']
+        miner['pipe_stalls'] = miner.get('pipe_stalls', 0) + 1
+        miner['last_pipe_stall'] = time.time()
+        self.log_info(f"[MONITOR-{name}] ⚠️ Pipe đầy ({size} bytes trong 1 lần đọc), miner có thể bị chặn khi ghi output (lần {miner['pipe_stalls']})")
     
     def _format_hash_rate(self, hash_rate_mh):
         """Format hash rate with smart unit selection (KH/s, MH/s, GH/s)"""
@@ -1122,74 +1444,11 @@ class MiningManager:
     
     def _extract_hash_rate(self, line, mining_tool=''):
         """Extract hash rate from miner output based on mining tool"""
-        
-        # Remove ANSI color codes that some miners use (like astrominer)
-        import re
-        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-        clean_line = ansi_escape.sub('', line)
-        
-        # Tool-specific patterns
-        if mining_tool.lower() == 'ccminer':
-            # CCMiner patterns: 
-            # "accepted: 7/7 (diff 436900.000), 2451.53 kH/s yes!"
-            # "GPU #0: GeForce GTX 1080, 25.50 MH/s"
-            patterns = [
-                r'accepted:\s*\d+\/\d+\s*\(diff\s*[\d\.]+\),\s*(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]\/s)\s*yes!',
-                r'GPU #\d+:.*?(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
-                r'[Tt]otal:\s*(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
-                r'(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
-            ]
-        elif mining_tool.lower() == 'xmrig':
-            # XMRig patterns: "speed 10s/60s/15m 1000.0 1000.0 1000.0 H/s"
-            patterns = [
-                r'speed\s+\S+\s+(\d+\.?\d*)\s+\d+\.?\d*\s+\d+\.?\d*\s*([kmgtKMGT]?[Hh]/s)',
-                r'(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
-            ]
-        elif mining_tool.lower() == 'astrominer':
-            # Astrominer patterns: 
-            # "[dero] 16-10-2025 03:29:57 [dero.rabidmining.com:10300] Accepted 159 | Rejected 0 | Height 6076878 | Diff 20000 | Uptime 00:03:01 | Hashrate 0.956KH/s"
-            patterns = [
-                r'Hashrate\s+(\d+\.?\d*)([kmgtKMGT]?[Hh]/s)',  # Hashrate 1.179KH/s (no space before unit)
-                r'hashrate\s+(\d+\.?\d*)([kmgtKMGT]?[Hh]/s)',
-                r'\|\s*Hashrate\s+(\d+\.?\d*)([kmgtKMGT]?[Hh]/s)',
-                r'(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
-            ]
-        else:
-            # Generic patterns for unknown tools
-            patterns = [
-                r'(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
-                r'[Hh]ashrate[:\s]+(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
-                r'[Ss]peed[:\s]+(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
-                r'(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/[Ss])',
-            ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, clean_line, re.IGNORECASE)
-            if match:
-                try:
-                    value = float(match.group(1))
-                    unit = match.group(2).lower() if len(match.groups()) > 1 else ''
-                    
-                    # Convert to MH/s for display consistency
-                    if 'k' in unit:
-                        value = value / 1000  # kH/s to MH/s
-                    elif 'm' in unit:
-                        value = value  # MH/s stays the same
-                    elif 'g' in unit:
-                        value = value * 1000  # GH/s to MH/s
-                    elif 't' in unit:
-                        value = value * 1000000  # TH/s to MH/s
-                    else:
-                        value = value / 1000000  # H/s to MH/s
-                    
-                    return value
-                except Exception as e:
-                    continue
-        
-        return None
+        return parse_hash_rate(line, mining_tool)
 
 # Global mining manager instance
 mining_manager = MiningManager()
+metrics_collector = MetricsCollector(mining_manager)
 
 @app.route('/api/update-config', methods=['POST'])
 def update_config():
@@ -1246,25 +1505,13 @@ def update_config():
         else:
             return jsonify({'success': False, 'message': 'Config phải là object với field "miners" hoặc array'}), 400
         
-        # Save old miners list for background restart to stop
-        print(f"[UPDATE-CONFIG-{request_id}] � Lưu danh sách miners cũ để background restart xử lý...")
-        old_miners_to_stop = []
-        for name, miner in mining_manager.miners.items():
-            if miner.get('status') == 'running':
-                old_miners_to_stop.append({
-                    'name': name,
-                    'tool': miner.get('mining_tool', '')
-                })
-        print(f"[UPDATE-CONFIG-{request_id}] Miners đang chạy (sẽ stop trong background): {[m['name'] for m in old_miners_to_stop]}")
-        
-        # Clear all old miners from memory (don't stop yet - let background do it)
-        mining_manager.miners.clear()
-        print(f"[UPDATE-CONFIG-{request_id}] ✅ Đã xóa miners cũ khỏi memory")
+        # Download files for ALL miners concurrently before touching miner state
+        mining_manager.prefetch_files([m for m in miners_list if isinstance(m, dict)])
         
-        # Process each miner config (will create new miners)
+        # Validate incoming miners (use coin_name as identifier)
         results = []
+        desired = {}
         for miner_config in miners_list:
-            # Validate required fields (use coin_name as identifier)
             required_fields = ['coin_name', 'mining_tool', 'config']
             missing_fields = [f for f in required_fields if f not in miner_config]
             
@@ -1279,8 +1526,7 @@ def update_config():
                 continue
             
             # Validate config type (must be dict or string)
-            config = miner_config['config']
-            if not isinstance(config, (dict, str)):
+            if not isinstance(miner_config['config'], (dict, str)):
                 results.append({
                     'coin_name': coin_name,
                     'success': False,
@@ -1288,97 +1534,149 @@ def update_config():
                 })
                 continue
             
+            # Optional core set: [0, 1, 2] or "0-3,8"
+            try:
+                miner_config['cpu_affinity'] = parse_cpu_list(miner_config.get('cpu_affinity')) or None
+            except ValueError as e:
+                results.append({
+                    'coin_name': coin_name,
+                    'success': False,
+                    'message': f'Field "cpu_affinity" không hợp lệ: {e}'
+                })
+                continue
+            
+            # Optional resource limits: nice / ionice / cpu_max / memory_max
+            try:
+                miner_config['resources'] = parse_resources(miner_config.get('resources'))
+            except ValueError as e:
+                results.append({
+                    'coin_name': coin_name,
+                    'success': False,
+                    'message': f'Field "resources" không hợp lệ: {e}'
+                })
+                continue
+            
+            desired[coin_name] = miner_config
+        
+        # Diff against current state: only added/changed/removed miners are touched
+        diff = mining_manager.diff_miner_configs(desired)
+        print(f"[UPDATE-CONFIG-{request_id}] Reconcile: added={diff['added']}, changed={diff['changed']}, removed={diff['removed']}, unchanged={diff['unchanged']}")
+        
+        # Detach running miners that must stop (changed/removed); background thread stops them
+        miners_to_stop = []
+        for name in diff['changed'] + diff['removed']:
+            miner = mining_manager.miners.get(name)
+            if miner and miner.get('status') == 'running':
+                miners_to_stop.append((name, miner))
+        for name in diff['removed']:
+            mining_manager.miners.pop(name, None)
+        
+        for name in diff['unchanged']:
+            mining_manager.miners[name]['cpu_affinity'] = desired[name]['cpu_affinity']
+            results.append({
+                'coin_name': name,
+                'success': True,
+                'message': 'Không thay đổi'
+            })
+        
+        # Apply new/changed configs (creates fresh miner entries)
+        for name in diff['added'] + diff['changed']:
+            miner_config = desired[name]
+            old_miner = mining_manager.miners.pop(name, None)  # Old entry (if running) is stopped in background
             success, message = mining_manager.update_miner_config(
-                coin_name,  # Use coin_name as the identifier
-                coin_name,
+                name,
+                miner_config['coin_name'],
                 miner_config['mining_tool'],
-                config,
-                miner_config.get('required_files')
+                miner_config['config'],
+                miner_config.get('required_files'),
+                miner_config['cpu_affinity'],
+                miner_config['resources']
             )
+            if not success and old_miner is not None:
+                # Provisioning failed: keep the old entry (and its running process)
+                mining_manager.miners[name] = old_miner
+                miners_to_stop = [(stop_name, miner) for stop_name, miner in miners_to_stop if miner is not old_miner]
+                message = f'{message} (giữ cấu hình cũ)'
             
             results.append({
-                'coin_name': coin_name,
+                'coin_name': name,
                 'success': success,
                 'message': message
             })
         
-        # Save config with new format (BEFORE auto-restart to ensure it's saved)
-        print("[CẬP NHẬT] 📝 Chuẩn bị lưu config...")
-        print(f"[CẬP NHẬT] - last_sync_config: {mining_manager.last_sync_config}")
-        print(f"[CẬP NHẬT] - auto_start: {mining_manager.auto_start_enabled}")
-        print(f"[CẬP NHẬT] - Số miners: {len(mining_manager.miners)}")
-        for name, miner in mining_manager.miners.items():
-            print(f"[CẬP NHẬT]   + {name}: coin={miner.get('coin_name')}, tool={miner.get('mining_tool')}, status={miner.get('status')}")
+        # New core sets of unchanged running miners take effect without a restart
+        mining_manager.rebalance_cpu_affinity()
         
-        config_saved = mining_manager.save_config()
-        if not config_saved:
-            print("[CẬP NHẬT] ⚠️ Cảnh báo: Không thể lưu config!")
-        else:
-            print("[CẬP NHẬT] ✅ Config đã được lưu thành công")
+        # Save config with new format (queued; written atomically by the background writer)
+        mining_manager.save_config()
+        print(f"[CẬP NHẬT] 📝 Đã xếp lịch lưu config ({len(mining_manager.miners)} miners, auto_start={mining_manager.auto_start_enabled})")
         
         # Check if auto-restart is needed
         should_auto_restart = mining_manager.auto_start_enabled
         
-        # Return response immediately (simple, no stop/start info)
+        # Return response immediately
         response = {
             'success': True,
             'updated': len([r for r in results if r['success']]),
             'total': len(results),
             'last_sync_config': mining_manager.last_sync_config,
             'auto_start_enabled': mining_manager.auto_start_enabled,
+            'reconcile': diff,
             'results': results
         }
         
-        # Trigger auto-restart in background thread if enabled (client không cần biết chi tiết này)
-        if should_auto_restart:
-            print("[CẬP NHẬT] 🔄 auto_start=true, khởi động background thread để stop miners cũ và start miners mới...")
-            
-            # Capture old_miners_to_stop for background thread
-            old_miners_snapshot = old_miners_to_stop.copy()
+        # Stop replaced/removed miners and (if auto_start) start new/changed ones in background
+        if miners_to_stop or should_auto_restart:
+            to_start = diff['added'] + diff['changed'] + diff['unchanged'] if should_auto_restart else []
             
             def background_restart():
-                """Background thread to stop old miners and start new miners"""
+                """Background thread: stop only changed/removed miners, start what isn't running"""
                 try:
                     time.sleep(1)  # Small delay to ensure response is sent
-                    
-                    # Step 1: Stop all OLD running miners
-                    if old_miners_snapshot:
-                        print(f"[BG-RESTART] Bắt đầu stop {len(old_miners_snapshot)} miners cũ...")
-                        
-                        # Collect all tools to force kill
-                        old_tools = set([m['tool'] for m in old_miners_snapshot if m['tool']])
-                        
-                        if old_tools:
-                            print(f"[BG-RESTART] Force kill processes cũ: {list(old_tools)}")
-                            kill_count = mining_manager.kill_all_miners_by_name(list(old_tools))
-                            print(f"[BG-RESTART] Đã kill {kill_count} processes cũ")
-                            time.sleep(3)  # Wait for clean shutdown
-                    else:
-                        print("[BG-RESTART] Không có miners cũ đang chạy")
-                    
-                    # Step 2: Start all NEW miners (from updated config)
-                    print(f"[BG-RESTART] Đang khởi động {len(mining_manager.miners)} miners mới...")
-                    started_miners = []
-                    for name in mining_manager.miners.keys():
-                        result = mining_manager.start_miner(name)
-                        started_miners.append({
-                            'name': name,
-                            'started': result['success'],
-                            'message': result.get('message', '')
-                        })
-                        if result['success']:
-                            print(f"[BG-RESTART] ✅ Đã khởi động {name}")
-                        else:
-                            print(f"[BG-RESTART] ❌ Không thể khởi động {name}: {result['message']}")
-                        time.sleep(2)  # Delay between starts
-                    
-                    print(f"[BG-RESTART] ✅ Hoàn thành restart: {len([m for m in started_miners if m['started']])}/{len(started_miners)} miners started")
-                    
+                    with mining_manager.reconcile_lock:
+                        run_reconcile()
                 except Exception as e:
                     print(f"[BG-RESTART] ❌ Lỗi trong background restart: {e}")
                     import traceback
                     traceback.print_exc()
             
+            def run_reconcile():
+                """Stop/start steps (one config update at a time)"""
+                # Step 1: Stop detached old processes of changed/removed miners
+                for name, old_miner in miners_to_stop:
+                    print(f"[BG-RESTART] Dừng miner cũ {name} (PID {old_miner.get('pid')})...")
+                    result = mining_manager.stop_miner(name, miner=old_miner)
+                    print(f"[BG-RESTART] {'✅' if result['success'] else '❌'} {result['message']}")
+                
+                # Step 2: Start miners that aren't running (unchanged running miners are left alone),
+                # concurrently and gated on readiness signals instead of fixed delays
+                pending = {}
+                for name in to_start:
+                    miner = mining_manager.miners.get(name)
+                    # Supervisor owns restarting/crash-looping miners, a running benchmark owns its miner
+                    if miner and miner.get('status') not in ('running', 'restarting', 'crashloop') and not miner.get('benchmark'):
+                        pending[name] = miner
+                
+                started_miners = []
+                for name, result in mining_manager.start_miners(pending):
+                    miner = pending[name]
+                    # Replaced by a newer config update while starting - don't leave it orphaned
+                    if result['success'] and mining_manager.miners.get(name) is not miner:
+                        print(f"[BG-RESTART] {name} đã bị thay thế trong lúc khởi động, dừng lại")
+                        mining_manager.stop_miner(name, miner=miner)
+                        continue
+                    started_miners.append({
+                        'name': name,
+                        'started': result['success'],
+                        'message': result.get('message', '')
+                    })
+                    if result['success']:
+                        print(f"[BG-RESTART] ✅ Đã khởi động {name} (time_to_ready: {result.get('time_to_ready')})")
+                    else:
+                        print(f"[BG-RESTART] ❌ Không thể khởi động {name}: {result['message']}")
+                
+                print(f"[BG-RESTART] ✅ Hoàn thành reconcile: dừng {len(miners_to_stop)}, khởi động {len([m for m in started_miners if m['started']])}/{len(started_miners)} miners")
+            
             # Start background thread
             restart_thread = threading.Thread(target=background_restart)
             restart_thread.daemon = True
@@ -1409,10 +1707,9 @@ def start_mining():
             result = mining_manager.start_miner(data['name'])
             return jsonify(result)
         elif 'names' in data:
-            # Start multiple miners
+            # Start multiple miners concurrently
             results = []
-            for name in data['names']:
-                result = mining_manager.start_miner(name)
+            for name, result in mining_manager.start_miners(data['names']):
                 result['name'] = name
                 results.append(result)
             return jsonify({'success': True, 'results': results})
@@ -1450,7 +1747,9 @@ def stop_mining():
 
 @app.route('/api/force-stop-all', methods=['POST'])
 def force_stop_all():
-    """Force stop all mining processes - comprehensive cleanup"""
+    """Force stop all mining processes started by this manager
+    Optional payload: {"full_scan": true} to also kill mining tools by name host-wide
+    """
     try:
         print("[FORCE-STOP] Bắt đầu force stop tất cả mining processes...")
         
@@ -1458,36 +1757,34 @@ def force_stop_all():
         active_tools = mining_manager.get_active_mining_tools()
         print(f"[FORCE-STOP] Active tools detected: {active_tools}")
         
-        # Step 2: Try normal stop first
-        stopped_miners = []
-        for name, miner in mining_manager.miners.items():
-            if miner.get('status') == 'running':
-                print(f"[FORCE-STOP] Trying normal stop for {name}...")
-                stop_result = mining_manager.stop_miner(name)
-                stopped_miners.append({
-                    'name': name,
-                    'normal_stop_success': stop_result['success'],
-                    'message': stop_result['message']
-                })
-        
-        # Step 3: Wait a bit
-        time.sleep(3)
-        
-        # Step 4: Force kill all mining processes by name
-        print(f"[FORCE-STOP] Force killing all mining processes...")
-        common_mining_tools = ['ccminer', 'cpuminer', 'xmrig', 'astrominer', 't-rex', 'teamredminer', 'nbminer', 'gminer']
-        all_tools = list(set(active_tools + common_mining_tools))
-        
-        killed_count = mining_manager.kill_all_miners_by_name(all_tools)
+        # No supervisor restarts while (and after) everything is being killed
+        for miner in mining_manager.miners.values():
+            mining_manager.hold_restarts(miner)
+        
+        # Step 2: Stop every process we started, all at once (SIGINT -> SIGTERM -> SIGKILL)
+        data = request.get_json(silent=True) or {}
+        full_scan = bool(data.get('full_scan', False))
+        results = mining_manager.kill_owned_processes()
+        killed_count = len([r for r in results if r['stopped']])
+        
+        # Step 3 (opt-in): host-wide scan by process name for miners we didn't start
+        all_tools = []
+        if full_scan:
+            print(f"[FORCE-STOP] full_scan: force killing all mining processes by name...")
+            common_mining_tools = ['ccminer', 'cpuminer', 'xmrig', 'astrominer', 't-rex', 'teamredminer', 'nbminer', 'gminer']
+            all_tools = list(set(active_tools + common_mining_tools))
+            killed_count += mining_manager.kill_all_miners_by_name(all_tools)
         print(f"[FORCE-STOP] Force killed {killed_count} processes")
         
-        # Step 5: Reset all miner statuses
+        # Step 4: Reset all miner statuses
         for miner_name in mining_manager.miners:
             miner = mining_manager.miners[miner_name]
             miner['status'] = 'stopped'
             miner['process'] = None
             miner['pid'] = None
+            miner['pgid'] = None
             miner['hash_rate'] = 0
+            mining_manager._publish_status(miner_name)
         
         print("[FORCE-STOP] Đã reset tất cả miner status")
         
@@ -1495,8 +1792,9 @@ def force_stop_all():
             'success': True,
             'message': f'Force stopped all mining. Killed {killed_count} processes.',
             'details': {
-                'stopped_miners': stopped_miners,
+                'processes': results,
                 'killed_count': killed_count,
+                'full_scan': full_scan,
                 'target_tools': all_tools,
                 'active_tools_before': active_tools
             }
@@ -1507,17 +1805,26 @@ def force_stop_all():
 
 @app.route('/api/kill-all', methods=['POST'])
 def kill_all_mining():
-    """Force kill all mining processes by process name (brute force method)
-    Expected payload: {"process_names": ["ccminer", "cpuminer"]} (optional)
+    """Force kill all mining processes started by this manager (owned-process registry)
+    Optional payload: {"full_scan": true, "process_names": ["ccminer", "cpuminer"]}
+    full_scan additionally kills matching process names host-wide (brute force method)
     """
     try:
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         process_names = data.get('process_names', None)
+        full_scan = bool(data.get('full_scan', False))
         
         # Get current active mining tools before killing
         active_tools = mining_manager.get_active_mining_tools()
         
-        killed_count = mining_manager.kill_all_miners_by_name(process_names)
+        # No supervisor restarts for miners killed here
+        for miner in mining_manager.miners.values():
+            mining_manager.hold_restarts(miner)
+        
+        results = mining_manager.kill_owned_processes()
+        killed_count = len([r for r in results if r['stopped']])
+        if full_scan:
+            killed_count += mining_manager.kill_all_miners_by_name(process_names)
         
         # Also reset all miner statuses
         for miner_name in mining_manager.miners:
@@ -1525,14 +1832,18 @@ def kill_all_mining():
             miner['status'] = 'stopped'
             miner['process'] = None
             miner['pid'] = None
+            miner['pgid'] = None
             miner['hash_rate'] = 0
+            mining_manager._publish_status(miner_name)
         
         return jsonify({
             'success': True, 
             'message': f'Force killed {killed_count} mining processes',
             'killed_count': killed_count,
+            'processes': results,
+            'full_scan': full_scan,
             'active_tools_before_kill': active_tools,
-            'target_process_names': list(process_names) if process_names else 'auto-detected from miners'
+            'target_process_names': (list(process_names) if process_names else 'auto-detected from miners') if full_scan else None
         })
         
     except Exception as e:
@@ -1540,24 +1851,289 @@ def kill_all_mining():
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
-    """Get mining status
+    """Get mining status (from the versioned status snapshot, not rebuilt per request)
     Optional query params: ?name=miner1 (for specific miner)
+    Long-poll: ?wait_for_change=<version>&timeout=30 holds the request until the
+    version differs from <version>. Responses carry an ETag (If-None-Match -> 304)
+    and the snapshot version in X-Status-Version.
     """
     try:
+        snapshot = mining_manager.status_snapshot
         miner_name = request.args.get('name')
         
-        if miner_name:
-            # Get status of specific miner
-            result = mining_manager.get_miner_status(miner_name)
-            return jsonify(result)
+        wait_for = request.args.get('wait_for_change')
+        if wait_for is not None:
+            try:
+                wait_for = int(wait_for)
+                timeout = float(request.args.get('timeout', config.STATUS_LONG_POLL_TIMEOUT))
+            except ValueError:
+                return jsonify({'success': False, 'message': 'wait_for_change và timeout phải là số'}), 400
+            timeout = min(max(timeout, 0), config.STATUS_LONG_POLL_MAX)
+            version, etag, body, _ = snapshot.wait_for_change(wait_for, timeout)
         else:
-            # Get status of all miners
-            result = mining_manager.get_all_status()
-            return jsonify(result)
+            version, etag, body, _ = snapshot.get()
+        
+        if miner_name:
+            entry = snapshot.get_miner(miner_name)
+            if entry is None:
+                # Unknown miner (or added since the last rebuild)
+                return jsonify(mining_manager.get_miner_status(miner_name))
+            status, etag = entry
+            body = app.json.dumps(status)
+        
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['X-Status-Version'] = str(version)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
             
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition (served from a pre-built snapshot)"""
+    return Response(metrics_collector.get(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/downloads', methods=['GET'])
+def get_downloads():
+    """Progress of active and recent file downloads"""
+    try:
+        downloads = mining_manager.downloader.get_progress()
+        return jsonify({
+            'success': True,
+            'active': len([d for d in downloads if d['status'] == 'downloading']),
+            'downloads': downloads
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/miners/<name>/history', methods=['GET'])
+def get_miner_history(name):
+    """Get downsampled hash rate history
+    Optional query params: ?from=<unix>&to=<unix>&step=<seconds>
+    Default: last 1 hour, 60s buckets. Values in H/s.
+    """
+    try:
+        if name not in mining_manager.miners and name not in mining_manager.hash_history:
+            return jsonify({'success': False, 'message': f'Miner {name} không tồn tại'}), 404
+        
+        try:
+            end = float(request.args.get('to', time.time()))
+            start = float(request.args.get('from', end - 3600))
+            step = float(request.args.get('step', 60))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'from/to/step phải là số'}), 400
+        
+        if not all(math.isfinite(value) for value in (start, end, step)):
+            return jsonify({'success': False, 'message': 'from/to/step phải là số hữu hạn'}), 400
+        if step <= 0 or end < start:
+            return jsonify({'success': False, 'message': 'Yêu cầu step > 0 và from <= to'}), 400
+        if (end - start) / step > config.HASH_RATE_HISTORY_MAX_BUCKETS:
+            return jsonify({'success': False, 'message': f'Quá nhiều buckets (tối đa {config.HASH_RATE_HISTORY_MAX_BUCKETS}), tăng step'}), 400
+        
+        buckets = mining_manager.get_history(name).downsample(start, end, step)
+        
+        # Always return H/s for API (internal unit is MH/s)
+        for bucket in buckets:
+            bucket['min'] *= 1_000_000
+            bucket['avg'] *= 1_000_000
+            bucket['max'] *= 1_000_000
+        
+        return jsonify({
+            'success': True,
+            'name': name,
+            'from': start,
+            'to': end,
+            'step': step,
+            'buckets': buckets
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/miners/<name>/watchdog', methods=['GET'])
+def get_miner_watchdog(name):
+    """Get hash rate watchdog baseline, current rate and recorded events (H/s)"""
+    try:
+        if name not in mining_manager.miners and name not in mining_manager.watchdogs:
+            return jsonify({'success': False, 'message': f'Miner {name} không tồn tại'}), 404
+        
+        return jsonify({
+            'success': True,
+            'name': name,
+            'enabled': config.WATCHDOG_ENABLED,
+            'action': config.WATCHDOG_ACTION,
+            'watchdog': mining_manager.get_watchdog_state(name)
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/benchmark', methods=['POST'])
+def start_benchmark():
+    """Start a tuning job for a miner (runs in background, poll GET /api/benchmark/<id>)
+    Expected payload: {"name": "vrsc", "threads": [4, 6, 8], "layouts": ["unpinned", "compact", "spread"],
+                       "warmup": 60, "duration": 120, "config": {...} (optional), "apply": false}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        name = data.get('name')
+        if name not in mining_manager.miners:
+            return jsonify({'success': False, 'message': f'Miner {name} không tồn tại'}), 404
+        
+        threads = data.get('threads')
+        if not isinstance(threads, list) or not threads or not all(isinstance(t, int) and not isinstance(t, bool) and t > 0 for t in threads):
+            return jsonify({'success': False, 'message': 'Field "threads" phải là danh sách số nguyên dương'}), 400
+        
+        layouts = data.get('layouts') or ['unpinned']
+        for layout in layouts:
+            if layout in BENCHMARK_LAYOUTS:
+                continue
+            try:
+                cpus = parse_cpu_list(layout)
+            except ValueError:
+                cpus = None
+            if not isinstance(layout, str) or not cpus:
+                return jsonify({'success': False, 'message': f'Layout không hợp lệ: {layout!r} (dùng {", ".join(BENCHMARK_LAYOUTS)} hoặc danh sách CPU như "0-3")'}), 400
+        
+        if len(threads) * len(layouts) > config.BENCHMARK_MAX_TRIALS:
+            return jsonify({'success': False, 'message': f'Quá nhiều lượt đo ({len(threads) * len(layouts)} > {config.BENCHMARK_MAX_TRIALS})'}), 400
+        
+        miner = mining_manager.miners[name]
+        base_config = data.get('config', miner['config'])
+        if not isinstance(base_config, (dict, str)):
+            return jsonify({'success': False, 'message': 'Field "config" phải là object (JSON) hoặc string (CLI params)'}), 400
+        
+        warmup = data.get('warmup', config.BENCHMARK_WARMUP)
+        duration = data.get('duration', config.BENCHMARK_DURATION)
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) and v > 0 for v in (warmup, duration)):
+            return jsonify({'success': False, 'message': 'warmup/duration phải là số giây > 0'}), 400
+        
+        running = mining_manager.get_running_benchmark()
+        if running:
+            return jsonify({'success': False, 'message': f'Đang có benchmark {running.id} cho {running.name}'}), 409
+        
+        try:
+            job = BenchmarkJob(name, miner.get('mining_tool', ''), base_config, threads, layouts, warmup, duration, apply=bool(data.get('apply', False)))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        mining_manager.start_benchmark(job)
+        
+        return jsonify({'success': True, 'job': job.to_dict(unit_scale=1_000_000)}), 202
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/benchmark', methods=['GET'])
+def list_benchmarks():
+    """List benchmark jobs (hash rates in H/s)"""
+    try:
+        jobs = sorted(mining_manager.benchmarks.values(), key=lambda job: job.created_at, reverse=True)
+        return jsonify({'success': True, 'jobs': [job.to_dict(unit_scale=1_000_000) for job in jobs]})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/benchmark/<job_id>', methods=['GET'])
+def get_benchmark(job_id):
+    """Get progress and ranked results of a benchmark job (hash rates in H/s)"""
+    job = mining_manager.benchmarks.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': f'Benchmark {job_id} không tồn tại'}), 404
+    return jsonify({'success': True, 'job': job.to_dict(unit_scale=1_000_000)})
+
+@app.route('/api/benchmark/<job_id>/cancel', methods=['POST'])
+def cancel_benchmark(job_id):
+    """Cancel a running benchmark (the miner's original config is restored)"""
+    job = mining_manager.benchmarks.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': f'Benchmark {job_id} không tồn tại'}), 404
+    job.cancel()
+    return jsonify({'success': True, 'message': f'Đã yêu cầu hủy benchmark {job_id}', 'state': job.state})
+
+@app.route('/api/miners/<name>/affinity', methods=['POST'])
+def set_miner_affinity(name):
+    """Set (or clear) the explicit core set of a miner, applied live
+    Expected payload: {"cpu_affinity": "0-3,8"} or {"cpu_affinity": [0, 1]} or {"cpu_affinity": null}
+    """
+    try:
+        if name not in mining_manager.miners:
+            return jsonify({'success': False, 'message': f'Miner {name} không tồn tại'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        try:
+            cpus = parse_cpu_list(data.get('cpu_affinity')) or None
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'cpu_affinity không hợp lệ: {e}'}), 400
+        
+        unknown = [cpu for cpu in cpus or [] if cpu not in mining_manager.get_cpu_topology().cpus]
+        if unknown:
+            return jsonify({'success': False, 'message': f'CPU không tồn tại: {unknown}'}), 400
+        
+        miner = mining_manager.miners[name]
+        miner['cpu_affinity'] = cpus
+        mining_manager.rebalance_cpu_affinity()
+        mining_manager.save_config()
+        
+        return jsonify({
+            'success': True,
+            'name': name,
+            'cpu_affinity': format_cpu_list(cpus) if cpus else None,
+            'cpu_set': format_cpu_list(miner['cpu_set']) if miner.get('cpu_set') else None
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/cpu/topology', methods=['GET'])
+def get_cpu_topology():
+    """Get CPU topology and the core set assigned to each miner"""
+    try:
+        return jsonify({
+            'success': True,
+            'partition_enabled': config.CPU_PARTITION_ENABLED,
+            'usable_cpus': format_cpu_list(mining_manager.get_usable_cpus()),
+            'topology': mining_manager.get_cpu_topology().to_dict(),
+            'assignments': {
+                name: format_cpu_list(miner['cpu_set'])
+                for name, miner in mining_manager.miners.items() if miner.get('cpu_set')
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/miners/<name>/stream', methods=['GET'])
+def stream_miner(name):
+    """Server-Sent Events stream of output lines, hash rate and status changes
+    Optional query params: ?since=<seq> (or Last-Event-ID header) to resume output
+    """
+    if name not in mining_manager.miners:
+        return jsonify({'success': False, 'message': f'Miner {name} không tồn tại'}), 404
+    
+    hub = mining_manager.get_event_hub(name)
+    since = request.args.get('since', request.headers.get('Last-Event-ID'))
+    try:
+        line_cursor = int(since) if since is not None else hub.output_ring.last_seq
+    except ValueError:
+        return jsonify({'success': False, 'message': 'since phải là số nguyên'}), 400
+    
+    miner = mining_manager.miners[name]
+    initial_state = {
+        'status': miner.get('status'),
+        'pid': miner.get('pid'),
+        'hash_rate': (miner.get('hash_rate') or 0) * 1_000_000,
+        'last_seq': hub.output_ring.last_seq,
+        'timestamp': time.time()
+    }
+    
+    return Response(
+        stream_with_context(hub.stream(line_cursor, config.SSE_KEEPALIVE_INTERVAL, initial_state)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/miners', methods=['GET'])
 def list_miners():
     """List all configured miners"""
@@ -1626,6 +2202,11 @@ def get_server_info():
             'cpu_percent': proc.cpu_percent(interval=0.1),
             'memory_mb': proc.memory_info().rss / 1024 / 1024,
             'num_threads': proc.num_threads(),
+            'output_mux': mining_manager.output_mux.stats(),
+            'reaper': {'pidfd': mining_manager.reaper.supported, 'watched': mining_manager.reaper.watched()},
+            'cgroups': mining_manager.cgroups.to_dict(),
+            'status_snapshot': mining_manager.status_snapshot.to_dict(),
+            'config_store': mining_manager.config_store.stats(),
             'config': {
                 'host': config.SERVER_HOST,
                 'port': config.SERVER_PORT,
@@ -1638,12 +2219,38 @@ def get_server_info():
 
 @app.route('/api/debug/output/<miner_name>', methods=['GET'])
 def get_miner_output(miner_name):
-    """Get raw output from miner for debugging"""
+    """Get raw output from miner for debugging
+    Optional query params: ?since=<seq>&limit=<n> - only return lines newer than seq
+    """
     try:
         if miner_name not in mining_manager.miners:
             return jsonify({'success': False, 'message': f'Miner {miner_name} not found'}), 404
         
         miner = mining_manager.miners[miner_name]
+        ring = mining_manager.get_output_ring(miner_name)
+        
+        # Incremental mode: cheap response with only new lines, no process inspection
+        since = request.args.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+                limit = request.args.get('limit')
+                limit = int(limit) if limit is not None else None
+            except ValueError:
+                return jsonify({'success': False, 'message': 'since/limit phải là số nguyên'}), 400
+            
+            entries, first_seq, last_seq = ring.read_since(since, limit)
+            return jsonify({
+                'success': True,
+                'name': miner_name,
+                'status': miner['status'],
+                'hash_rate': miner.get('hash_rate', 0),
+                'lines': [{'seq': seq, 'line': line} for seq, line in entries],
+                'first_seq': first_seq,
+                'last_seq': last_seq,
+                'next_since': entries[-1][0] if entries else min(max(since, 0), last_seq),
+                'gap': since + 1 < first_seq and since < last_seq  # Lines between since and first_seq were evicted
+            })
         
         # Check process status if PID exists
         process_info = None
@@ -1696,7 +2303,8 @@ def get_miner_output(miner_name):
             'config': miner.get('config'),
             'cmd': miner.get('cmd'),
             'coin_dir': miner.get('coin_dir'),
-            'latest_output': miner.get('latest_output', ''),
+            'latest_output': ring.text(),
+            'last_seq': ring.last_seq,
             'last_output': miner.get('last_output', ''),
             'hash_rate': miner.get('hash_rate', 0),
             'process_info': process_info
@@ -1823,22 +2431,30 @@ if __name__ == '__main__':
     
     # Register cleanup
     atexit.register(remove_pid_file)
+    atexit.register(mining_manager.flush_config)
+    atexit.register(mining_manager.owned.flush)
     
     # Simple signal handler
     def signal_handler(sig, frame):
         print('\n\n🛑 Stopping server...')
-        # Stop all running miners
+        # Stop all miners at once: every owned process group is signalled together
+        # and the escalation waits a single STOP_DEADLINE for all of them
         try:
-            stopped = []
-            for name, miner in mining_manager.miners.items():
-                if miner.get('status') == 'running':
-                    mining_manager.stop_miner(name)
-                    stopped.append(name)
+            for miner in list(mining_manager.miners.values()):
+                mining_manager.hold_restarts(miner)
+            results = mining_manager.kill_owned_processes()
+            stopped = sorted({r['label'] for r in results if r['stopped']})
+            alive = sorted({r['label'] for r in results if not r['stopped']})
             if stopped:
                 print(f'✅ Stopped miners: {", ".join(stopped)}')
+            if alive:
+                print(f'⚠️  Still running: {", ".join(alive)}')
         except Exception as e:
             print(f'⚠️  Error stopping miners: {e}')
         
+        # Write queued config changes before exiting
+        mining_manager.flush_config()
+        
         # Remove PID file
         remove_pid_file()
         print('✅ Server stopped\n')
@@ -1857,6 +2473,13 @@ if __name__ == '__main__':
     print(f"🎯 Auto-Start: {'Enabled' if config.AUTO_START_ON_BOOT else 'Disabled'}")
     print("=" * 60)
     
+    # Miners left running by a previous instance of the manager (crash, kill -9)
+    try:
+        mining_manager.cleanup_leftover_processes()
+        mining_manager.cgroups.cleanup_stale()
+    except Exception as e:
+        print(f"⚠️  Lỗi khi dọn tiến trình cũ: {e}")
+    
     # Start auto-start in a separate thread after a delay
     def delayed_auto_start():
         time.sleep(5)  # Wait 5 seconds for server to fully start
@@ -1882,6 +2505,9 @@ if __name__ == '__main__':
     monitor_thread.daemon = True
     monitor_thread.start()
     
+    # Background refresh of /metrics snapshot
+    metrics_collector.start()
+    
     try:
         app.run(
             host=config.SERVER_HOST, 
@@ -0,0 +1,207 @@
+"""
+Mining Management API - Miner tuning benchmark
+Runs one miner config across a matrix of thread counts and CPU layouts and ranks the results
+"""
+
+import copy
+import itertools
+import shlex
+import statistics
+import threading
+import time
+import uuid
+
+from cpu_topology import format_cpu_list, parse_cpu_list
+
+# Command line flag that sets the number of mining threads
+THREAD_FLAGS = {
+    'ccminer': '-t',
+    'cpuminer': '-t',
+    'xmrig': '-t',
+    'astrominer': '-m',
+}
+# Tools whose JSON config keys map to their long options, so a top-level "threads" is honoured
+# (xmrig reads threads from cpu.rx / max-threads-hint and ignores it)
+JSON_THREADS_TOOLS = ('ccminer', 'cpuminer')
+LAYOUTS = ('unpinned', 'compact', 'spread')
+
+
+def with_threads(mining_tool, miner_config, threads):
+    """Copy of a miner config with the thread count set ('threads' key or the tool's CLI flag)
+
+    Raises ValueError for JSON configs of tools that don't read a top-level "threads" key.
+    """
+    if isinstance(miner_config, dict):
+        if (mining_tool or '').lower() not in JSON_THREADS_TOOLS:
+            raise ValueError(f'Không thể đặt số threads trong config JSON của {mining_tool}; '
+                             f'dùng config dạng tham số dòng lệnh ({THREAD_FLAGS.get((mining_tool or "").lower(), "-t")} N)')
+        miner_config = copy.deepcopy(miner_config)
+        miner_config['threads'] = threads
+        return miner_config
+
+    flag = THREAD_FLAGS.get((mining_tool or '').lower(), '-t')
+    tokens = shlex.split(str(miner_config))
+    kept = []
+    skip = False
+    for token in tokens:
+        if skip:
+            skip = False
+            continue
+        if token in (flag, '--threads'):
+            skip = True  # Drop the old value too
+            continue
+        if token.startswith('--threads=') or (token.startswith(flag) and token[len(flag):].isdigit()):
+            continue
+        kept.append(token)
+    return shlex.join(kept + [flag, str(threads)])
+
+
+def layout_cpus(topology, usable, layout, threads):
+    """CPU set for a layout: None (unpinned), 'compact' (fill SMT siblings of
+    neighbouring cores, one L3 first), 'spread' (one CPU per physical core
+    across domains, siblings last) or an explicit list like '0-3'"""
+    if layout == 'unpinned':
+        return None
+    domains = topology.domains(usable)
+    if layout == 'compact':
+        order = [cpu for cores in domains.values() for siblings in cores for cpu in siblings]
+    elif layout == 'spread':
+        # Round robin over domains, first sibling of every core before any second sibling
+        order = []
+        depth = max((len(siblings) for cores in domains.values() for siblings in cores), default=0)
+        for level in range(depth):
+            columns = [[siblings[level] for siblings in cores if len(siblings) > level] for cores in domains.values()]
+            for row in itertools.zip_longest(*columns):
+                order.extend(cpu for cpu in row if cpu is not None)
+    else:
+        return parse_cpu_list(layout)
+    return sorted(order[:max(1, threads)])
+
+
+def physical_cores(topology, cpus, usable, threads):
+    """Physical cores a trial could use (per-core hash rate divisor)"""
+    if cpus is None:
+        total = sum(len(cores) for cores in topology.domains(usable).values())
+        return max(1, min(threads, total))
+    return max(1, len({topology.cpus[cpu]['core'] for cpu in cpus if cpu in topology.cpus}))
+
+
+def summarize(samples):
+    """Steady-state statistics of hash rate samples (same unit as the samples)"""
+    if not samples:
+        return {'samples': 0, 'mean': 0.0, 'stdev': 0.0, 'cv': None, 'min': 0.0, 'max': 0.0}
+    mean = statistics.fmean(samples)
+    stdev = statistics.pstdev(samples) if len(samples) > 1 else 0.0
+    return {
+        'samples': len(samples),
+        'mean': mean,
+        'stdev': stdev,
+        'cv': stdev / mean if mean else None,
+        'min': min(samples),
+        'max': max(samples),
+    }
+
+
+class BenchmarkJob:
+    """One tuning run: trials (threads x layout) of a miner, executed in order
+
+    The manager drives the miner (start, warm-up, measure, stop) and reports
+    each trial with record(); the job keeps results, progress and ranking.
+    """
+
+    def __init__(self, name, mining_tool, base_config, threads, layouts, warmup, duration, apply=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.mining_tool = mining_tool
+        self.base_config = copy.deepcopy(base_config)
+        self.warmup = warmup
+        self.duration = duration
+        self.apply = apply
+        self.trials = [
+            {'threads': count, 'layout': layout, 'config': with_threads(mining_tool, base_config, count)}
+            for count, layout in itertools.product(threads, layouts)
+        ]
+        self.results = []
+        self.state = 'pending'
+        self.current = None
+        self.error = None
+        self.applied = False
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    def start(self):
+        self.state = 'running'
+        self.started_at = time.time()
+
+    def wait(self, seconds):
+        """Sleep unless cancelled; True if the job was cancelled"""
+        return self._cancel.wait(seconds)
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def record(self, trial, cpus, cores, samples=None, error=None):
+        stats = summarize(samples or [])
+        self.results.append({
+            'threads': trial['threads'],
+            'layout': trial['layout'],
+            'cpus': format_cpu_list(cpus) if cpus else None,
+            'cores': cores,
+            'config': trial['config'],
+            'hash_rate': stats['mean'],
+            'hash_rate_per_core': stats['mean'] / cores if cores else None,
+            'stats': stats,
+            'error': error,
+        })
+
+    def ranking(self):
+        """Successful trials, best steady-state hash rate first (lower variance breaks ties)"""
+        ok = [result for result in self.results if not result['error'] and result['stats']['samples']]
+        return sorted(ok, key=lambda result: (-result['hash_rate'], result['stats']['cv'] or 0.0))
+
+    def winner(self):
+        ranking = self.ranking()
+        return ranking[0] if ranking else None
+
+    def finish(self, error=None):
+        self.error = error
+        self.state = 'failed' if error else ('cancelled' if self.cancelled else 'done')
+        self.current = None
+        self.finished_at = time.time()
+
+    def to_dict(self, unit_scale=1):
+        """unit_scale converts stored hash rates (MH/s) for the API (1_000_000 = H/s)"""
+        def scaled(result):
+            result = copy.deepcopy(result)
+            result['hash_rate'] *= unit_scale
+            if result['hash_rate_per_core'] is not None:
+                result['hash_rate_per_core'] *= unit_scale
+            for key in ('mean', 'stdev', 'min', 'max'):
+                result['stats'][key] *= unit_scale
+            return result
+
+        winner = self.winner()
+        return {
+            'id': self.id,
+            'name': self.name,
+            'mining_tool': self.mining_tool,
+            'state': self.state,
+            'error': self.error,
+            'warmup': self.warmup,
+            'duration': self.duration,
+            'apply': self.apply,
+            'applied': self.applied,
+            'progress': {'done': len(self.results), 'total': len(self.trials), 'current': self.current},
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'ranking': [scaled(result) for result in self.ranking()],
+            'failed_trials': [scaled(result) for result in self.results if result['error']],
+            'winner': scaled(winner) if winner else None,
+        }
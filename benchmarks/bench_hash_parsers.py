@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: hash rate parsing throughput (lines/second)
+
+Replays captured ccminer/xmrig/astrominer logs from benchmarks/logs and
+compares the legacy per-line parsing (as in the old MiningManager._extract_hash_rate)
+with the precompiled parser registry in hash_parsers.py.
+
+Usage: python benchmarks/bench_hash_parsers.py [--repeat 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from hash_parsers import get_parser  # noqa: E402
+
+LOGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+TOOLS = ['ccminer', 'xmrig', 'astrominer']
+
+
+def legacy_extract_hash_rate(line, mining_tool=''):
+    """Copy of the old _extract_hash_rate (regex compiled on every call)"""
+    import re
+    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+    clean_line = ansi_escape.sub('', line)
+
+    if mining_tool.lower() == 'ccminer':
+        patterns = [
+            r'accepted:\s*\d+\/\d+\s*\(diff\s*[\d\.]+\),\s*(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]\/s)\s*yes!',
+            r'GPU #\d+:.*?(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
+            r'[Tt]otal:\s*(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
+            r'(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
+        ]
+    elif mining_tool.lower() == 'xmrig':
+        patterns = [
+            r'speed\s+\S+\s+(\d+\.?\d*)\s+\d+\.?\d*\s+\d+\.?\d*\s*([kmgtKMGT]?[Hh]/s)',
+            r'(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
+        ]
+    else:
+        patterns = [
+            r'Hashrate\s+(\d+\.?\d*)([kmgtKMGT]?[Hh]/s)',
+            r'hashrate\s+(\d+\.?\d*)([kmgtKMGT]?[Hh]/s)',
+            r'\|\s*Hashrate\s+(\d+\.?\d*)([kmgtKMGT]?[Hh]/s)',
+            r'(\d+\.?\d*)\s*([kmgtKMGT]?[Hh]/s)',
+        ]
+
+    for pattern in patterns:
+        match = re.search(pattern, clean_line, re.IGNORECASE)
+        if match:
+            value = float(match.group(1))
+            unit = match.group(2).lower()
+            if 'k' in unit:
+                value = value / 1000
+            elif 'g' in unit:
+                value = value * 1000
+            elif 't' in unit:
+                value = value * 1000000
+            elif 'm' not in unit:
+                value = value / 1000000
+            return value
+    return None
+
+
+def legacy_monitor_line(line, tool_name):
+    """Old gating logic from _monitor_miner"""
+    line_lower = line.lower()
+    if tool_name == 'astrominer':
+        if 'hashrate' in line_lower:
+            return legacy_extract_hash_rate(line, tool_name)
+    elif 'accepted:' in line_lower or 'accepted ' in line_lower:
+        return legacy_extract_hash_rate(line, tool_name)
+    return None
+
+
+def load_lines(tool):
+    with open(os.path.join(LOGS_DIR, f'{tool}.log'), 'r', encoding='utf-8') as f:
+        return f.readlines()
+
+
+def run(lines, fn, repeat):
+    start = time.perf_counter()
+    hits = 0
+    for _ in range(repeat):
+        for line in lines:
+            if fn(line) is not None:
+                hits += 1
+    elapsed = time.perf_counter() - start
+    return len(lines) * repeat / elapsed, hits // repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hash rate parser microbenchmark')
+    parser.add_argument('--repeat', type=int, default=2000, help='replays of each log file')
+    args = parser.parse_args()
+
+    print(f"{'tool':<12}{'before (lines/s)':>18}{'after (lines/s)':>18}{'speedup':>10}{'hits b/a':>10}")
+    for tool in TOOLS:
+        lines = load_lines(tool)
+        registry_parser = get_parser(tool)
+        before, hits_before = run(lines, lambda line: legacy_monitor_line(line, tool), args.repeat)
+        after, hits_after = run(lines, registry_parser.parse, args.repeat)
+        print(f"{tool:<12}{before:>18,.0f}{after:>18,.0f}{after / before:>9.1f}x{hits_before:>5}/{hits_after}")
+
+
+if __name__ == '__main__':
+    main()
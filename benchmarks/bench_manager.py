@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark: MiningManager overhead with 1-64 concurrent fake miners
+
+Runs entirely offline in a temporary working directory. Every miner is a
+fake_miner.py launcher installed at miners/<coin>/<tool>, started through
+MiningManager.start_miners exactly like a real one. Per scenario it reports:
+
+- lines/s the manager actually consumed vs. what the fakes produced
+- manager CPU time per 1k output lines (and total CPU %)
+- RSS at start/end of the window and its growth rate
+- start wall time and time-to-first-hashrate (p50 / max)
+
+A parser-only pass (no processes) gives the upper bound for parsing alone.
+
+Usage: python benchmarks/bench_manager.py [--miners 1,4,16,64] [--rate 100] [--duration 10] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import psutil  # noqa: E402
+
+import fake_miner  # noqa: E402
+from bench_hash_parsers import load_lines, run as run_parser  # noqa: E402
+from hash_parsers import get_parser  # noqa: E402
+
+TOOLS = ['ccminer', 'xmrig', 'astrominer']
+
+
+def parser_throughput(repeat):
+    """Lines/s of the registry parsers alone (no pipes, no processes)"""
+    return {tool: run_parser(load_lines(tool), get_parser(tool).parse, repeat)[0] for tool in TOOLS}
+
+
+def growth_per_minute(samples):
+    """Least-squares slope of (t, rss) samples in bytes/minute"""
+    if len(samples) < 2:
+        return 0.0
+    ts = [t for t, _ in samples]
+    values = [v for _, v in samples]
+    mean_t = statistics.fmean(ts)
+    mean_v = statistics.fmean(values)
+    denominator = sum((t - mean_t) ** 2 for t in ts)
+    if not denominator:
+        return 0.0
+    return sum((t - mean_t) * (v - mean_v) for t, v in samples) / denominator * 60
+
+
+def run_scenario(manager, count, rate, duration, tools):
+    """Start `count` fake miners, measure for `duration` seconds, stop them"""
+    import config
+
+    names = [f'bench{count}-{i}' for i in range(count)]
+    for i, name in enumerate(names):
+        tool = tools[i % len(tools)]
+        fake_miner.install(config.MINERS_DIR, name, tool, rate)
+        ok, message = manager.update_miner_config(name, name, tool, '--bench', required_files=[])
+        if not ok:
+            raise RuntimeError(f'{name}: {message}')
+
+    me = psutil.Process()
+    started = time.monotonic()
+    results = manager.start_miners(names)
+    start_wall = time.monotonic() - started
+    failed = [name for name, result in results if not result['success']]
+
+    seq_before = sum(manager.get_output_ring(name).last_seq for name in names)
+    cpu_before = me.cpu_times()
+    window_start = time.monotonic()
+    rss = [(0.0, me.memory_info().rss)]
+    while time.monotonic() - window_start < duration:
+        time.sleep(min(1.0, duration / 10))
+        rss.append((time.monotonic() - window_start, me.memory_info().rss))
+    elapsed = time.monotonic() - window_start
+    cpu_after = me.cpu_times()
+    seq_after = sum(manager.get_output_ring(name).last_seq for name in names)
+
+    ttfh = [manager.miners[name].get('time_to_first_hashrate') for name in names]
+    ttfh = sorted(t for t in ttfh if t is not None)
+    threads = me.num_threads()
+
+    for name in names:
+        manager.hold_restarts(manager.miners[name])
+    manager.kill_owned_processes()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline and any(manager.miners[name].get('status') == 'running' for name in names):
+        time.sleep(0.05)
+    for name in names:
+        manager.miners.pop(name, None)
+
+    lines = seq_after - seq_before
+    cpu = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    return {
+        'miners': count,
+        'failed_starts': failed,
+        'lines_expected_per_s': count * rate,
+        'lines_per_s': lines / elapsed,
+        'cpu_ms_per_1k_lines': cpu * 1000 / (lines / 1000) if lines else None,
+        'cpu_percent': cpu / elapsed * 100,
+        'rss_start_mb': rss[0][1] / 2 ** 20,
+        'rss_end_mb': rss[-1][1] / 2 ** 20,
+        'rss_growth_kb_per_min': growth_per_minute(rss) / 1024,
+        'threads': threads,
+        'start_wall_s': start_wall,
+        'ttfh_p50_s': statistics.median(ttfh) if ttfh else None,
+        'ttfh_max_s': ttfh[-1] if ttfh else None,
+    }
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MiningManager end-to-end benchmark with fake miners')
+    parser.add_argument('--miners', default='1,4,16,64', help='comma separated concurrent miner counts')
+    parser.add_argument('--rate', type=float, default=100.0, help='output lines/s per fake miner')
+    parser.add_argument('--duration', type=float, default=10.0, help='measurement window per scenario (seconds)')
+    parser.add_argument('--tools', default=','.join(TOOLS), help='fake tools to cycle through')
+    parser.add_argument('--parser-repeat', type=int, default=500, help='log replays for the parser-only pass')
+    parser.add_argument('--json', default=None, help='also write results to this file')
+    parser.add_argument('--keep', action='store_true', help='keep the temporary working directory')
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.miners.split(',') if n]
+    tools = [tool for tool in args.tools.split(',') if tool]
+
+    print('Parser only (lines/s):')
+    parsers = parser_throughput(args.parser_repeat)
+    for tool, throughput in parsers.items():
+        print(f"  {tool:<12}{throughput:>14,.0f}")
+
+    # The manager reads/writes mining_config.json and miners/ relative to cwd
+    workdir = tempfile.mkdtemp(prefix='mining-bench-')
+    json_path = os.path.abspath(args.json) if args.json else None
+    os.chdir(workdir)
+    out = sys.stdout
+    # Manager logs (from all its threads) go to a file, like a service writing to its journal
+    log = open(os.path.join(workdir, 'manager.log'), 'w', encoding='utf-8')
+    sys.stdout = log
+    import app
+    manager = app.mining_manager
+
+    print(f"\nEnd to end ({args.rate:g} lines/s per miner, {args.duration:g}s window, workdir {workdir}):", file=out)
+    print(f"{'miners':>6}{'lines/s':>10}{'expected':>10}{'cpu ms/1k':>11}{'cpu %':>8}{'rss MB':>14}{'KB/min':>9}"
+          f"{'threads':>8}{'start s':>9}{'ttfh p50':>9}{'ttfh max':>9}", file=out)
+    scenarios = []
+    try:
+        for count in counts:
+            result = run_scenario(manager, count, args.rate, args.duration, tools)
+            scenarios.append(result)
+            print(f"{result['miners']:>6}{result['lines_per_s']:>10,.0f}{result['lines_expected_per_s']:>10,.0f}"
+                  f"{_fmt(result['cpu_ms_per_1k_lines'], '>11.2f')}{result['cpu_percent']:>8.1f}"
+                  f"{result['rss_start_mb']:>7.1f}->{result['rss_end_mb']:<5.1f}{result['rss_growth_kb_per_min']:>9.0f}"
+                  f"{result['threads']:>8}{result['start_wall_s']:>9.2f}{_fmt(result['ttfh_p50_s'], '>9.2f')}{_fmt(result['ttfh_max_s'], '>9.2f')}", file=out)
+            if result['failed_starts']:
+                print(f"       failed to start: {result['failed_starts']}", file=out)
+    finally:
+        manager.flush_config()
+        sys.stdout = out
+        log.close()
+        if not args.keep:
+            os.chdir(REPO_DIR)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'parser_lines_per_s': parsers, 'scenarios': scenarios}, f, indent=2)
+        print(f"\nWrote {json_path}")
+
+
+if __name__ == '__main__':
+    main()
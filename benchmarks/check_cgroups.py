@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Check: CgroupManager against a fake cgroupfs (a plain temporary directory)
+
+Starts a throwaway process tree and verifies that create() writes cpu.max,
+memory.max and cgroup.procs, that a failing create() removes its directory
+again and that cleanup_stale() removes children without live members while
+keeping the ones that still have processes.
+
+Usage: python benchmarks/check_cgroups.py
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from resource_limits import CgroupManager, parse_resources  # noqa: E402
+
+
+def read(path, filename):
+    with open(os.path.join(path, filename), 'r') as f:
+        return f.read().split()
+
+
+def check(condition, message):
+    print(f"  {'OK  ' if condition else 'FAIL'} {message}")
+    return condition
+
+
+def main():
+    root = tempfile.mkdtemp(prefix='fake-cgroup-')
+    # Parent with one child, both long-lived until we kill them
+    proc = subprocess.Popen(['sh', '-c', 'sleep 60 & wait'])
+    ok = True
+    try:
+        time.sleep(0.2)
+        cgroups = CgroupManager(root, log=lambda message: None)
+        resources = parse_resources({'cpu_max': 1.5, 'memory_max': '512M'})
+
+        print(f"Fake cgroupfs: {root}")
+        path = cgroups.create('test miner', proc.pid, resources['cpu_max'], resources['memory_max'])
+        members = [int(pid) for pid in read(path, 'cgroup.procs')]
+        ok &= check(not cgroups.real, 'plain directory detected as fake cgroupfs')
+        ok &= check(read(root, 'cgroup.subtree_control') == ['+cpu', '+memory'], 'root delegates cpu and memory')
+        ok &= check(os.path.basename(path) == f'test_miner.{proc.pid}', 'child named <miner>.<pid>')
+        ok &= check(read(path, 'cpu.max') == ['150000', '100000'], 'cpu.max = 1.5 cores')
+        ok &= check(read(path, 'memory.max') == [str(512 * 1024 ** 2)], 'memory.max = 512M')
+        ok &= check(proc.pid in members and len(members) >= 2, 'cgroup.procs holds the process and its child')
+
+        # cpu.max as a directory makes the write fail half way through create()
+        broken = os.path.join(root, 'broken.1')
+        os.makedirs(os.path.join(broken, 'cpu.max'))
+        try:
+            cgroups.create('broken', 1)
+            failed = False
+        except OSError:
+            failed = True
+        ok &= check(failed and not os.path.exists(broken), 'failed create() removes its directory')
+
+        stale = cgroups.create('stale', 2 ** 22 + 1)  # PID that cannot exist
+        ok &= check(cgroups.cleanup_stale() == 1, 'cleanup_stale() removes one empty child')
+        ok &= check(not os.path.exists(stale) and os.path.exists(path), 'empty child gone, live child kept')
+
+        cgroups.remove(path)
+        ok &= check(not os.path.exists(path), 'remove() deletes the child')
+    finally:
+        subprocess.run(['pkill', '-P', str(proc.pid)], check=False)
+        proc.kill()
+        proc.wait()
+        shutil.rmtree(root, ignore_errors=True)
+
+    print('All checks passed' if ok else 'Some checks FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Fake miner: replays a captured ccminer/xmrig/astrominer log at a fixed line rate
+
+The startup part of the log (everything before the first hash rate line) is
+printed once, the rest is looped until the process is stopped. Arguments
+meant for the real miner (-c config.json, -t 8, ...) are accepted and
+ignored, so install() can drop a launcher at miners/<coin>/<tool> and
+MiningManager.start_miner runs it unchanged - no pool, no network.
+
+Usage: fake_miner.py --fake-tool ccminer [--fake-rate 100] [--fake-log path] [miner args...]
+"""
+
+import argparse
+import itertools
+import os
+import signal
+import stat
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+from hash_parsers import get_parser  # noqa: E402
+
+LOGS_DIR = os.path.join(BENCH_DIR, 'logs')
+
+
+def split_log(tool, path=None):
+    """(startup lines, steady-state lines) of a captured log"""
+    with open(path or os.path.join(LOGS_DIR, f'{tool}.log'), 'r', encoding='utf-8') as f:
+        lines = [line if line.endswith('\n') else line + '\n' for line in f]
+    parser = get_parser(tool)
+    for i, line in enumerate(lines):
+        if parser.parse(line):
+            return lines[:i], lines[i:]
+    return [], lines
+
+
+def replay(out, startup, steady, rate, startup_delay=0.0):
+    """Write startup lines, then loop steady lines at `rate` lines/second (0 = as fast as possible)"""
+    for line in startup:
+        out.write(line)
+    out.flush()
+    if startup_delay:
+        time.sleep(startup_delay)
+
+    interval = 1.0 / rate if rate else 0.0
+    next_at = time.monotonic()
+    for line in itertools.cycle(steady):
+        out.write(line)
+        if not interval:
+            continue
+        next_at += interval
+        delay = next_at - time.monotonic()
+        if delay > 0:
+            out.flush()  # Lines that fell behind schedule go out as one batch
+            time.sleep(delay)
+
+
+def install(miners_dir, coin, tool, rate, log=None, startup_delay=0.0):
+    """Write an executable launcher miners/<coin>/<tool> that runs this fake miner"""
+    coin_dir = os.path.join(miners_dir, coin)
+    os.makedirs(coin_dir, exist_ok=True)
+    path = os.path.join(coin_dir, tool)
+    args = ['--fake-tool', tool, '--fake-rate', str(rate), '--fake-startup-delay', str(startup_delay)]
+    if log:
+        args += ['--fake-log', os.path.abspath(log)]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"#!{sys.executable}\n")
+        f.write("import sys\n")
+        f.write(f"sys.path.insert(0, {BENCH_DIR!r})\n")
+        f.write("import fake_miner\n")
+        f.write(f"fake_miner.main({args!r} + sys.argv[1:])\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a captured miner log', allow_abbrev=False)
+    parser.add_argument('--fake-tool', required=True, choices=['ccminer', 'xmrig', 'astrominer'])
+    parser.add_argument('--fake-rate', type=float, default=100.0, help='lines per second (0 = unthrottled)')
+    parser.add_argument('--fake-log', default=None, help='log to replay (default: benchmarks/logs/<tool>.log)')
+    parser.add_argument('--fake-startup-delay', type=float, default=0.0, help='pause after the startup lines (seconds)')
+    args, _ = parser.parse_known_args(argv)
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    startup, steady = split_log(args.fake_tool, args.fake_log)
+    try:
+        replay(sys.stdout, startup, steady, args.fake_rate, args.fake_startup_delay)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -27,16 +27,109 @@ HASH_RATE_CHECK_INTERVAL = 5
 # Monitor status print interval (seconds)
 MONITOR_STATUS_INTERVAL = 30
 
+# Hash rate history ring buffer (samples per miner, fixed memory)
+HASH_RATE_HISTORY_SIZE = 8640  # ~12h at one sample every 5s
+HASH_RATE_HISTORY_MAX_BUCKETS = 2000  # Max buckets per /history response
+
+# Recent miner output kept in memory per miner (bytes, line-oriented ring)
+OUTPUT_BUFFER_BYTES = 64 * 1024
+
+# SSE stream keep-alive comment interval (seconds)
+SSE_KEEPALIVE_INTERVAL = 15
+
+# Hash rate watchdog: miner is degraded when its hash rate stays below
+# LOW_FRACTION of its learned baseline (per miner and config) for LOW_SECONDS,
+# or stalled when no hash rate line arrives for STALL_SECONDS
+WATCHDOG_ENABLED = True
+WATCHDOG_ACTION = 'restart'  # 'restart' or 'alert' (record event only)
+WATCHDOG_LOW_FRACTION = 0.5
+WATCHDOG_LOW_SECONDS = 300
+WATCHDOG_STALL_SECONDS = 600
+WATCHDOG_WARMUP_SECONDS = 120  # Ignore the first minutes after a start
+WATCHDOG_BASELINE_TAU = 1800  # Baseline averaging time constant (seconds)
+WATCHDOG_CURRENT_TAU = 60  # Current rate averaging time constant (seconds)
+WATCHDOG_MIN_SAMPLES = 10  # Samples before the baseline is trusted
+WATCHDOG_COOLDOWN = 900  # Min seconds between two actions on the same miner
+WATCHDOG_MAX_EVENTS = 50  # Events kept per miner
+
+# Rolling window for share acceptance ratio (seconds)
+SHARE_RATIO_WINDOW = 900
+
+# Prometheus /metrics snapshot refresh interval (seconds)
+METRICS_REFRESH_INTERVAL = 5
+
+# /api/status snapshot: rebuilt on state changes and at least this often (seconds)
+STATUS_SNAPSHOT_INTERVAL = 1.0
+STATUS_LONG_POLL_TIMEOUT = 30  # Default ?timeout for ?wait_for_change (seconds)
+STATUS_LONG_POLL_MAX = 120  # Upper bound for ?timeout (seconds)
+STATUS_VOLATILE_INTERVAL = 30  # Min seconds between versions caused only by ticking counters (cgroup cpu.stat)
+
 # ==================== Process Management ====================
+# Startup: miners are launched concurrently and considered up on the first
+# readiness signal in their output (pool connected, new job or hash rate)
+STARTUP_MAX_PARALLEL = 4  # Miners starting at the same time
+STARTUP_READY_TIMEOUT = 20  # Default wait for a readiness signal (seconds)
+STARTUP_READY_TIMEOUTS = {  # Per mining tool overrides (seconds)
+    'ccminer': 20,
+    'xmrig': 30,
+    'astrominer': 30,
+}
+
+# Crash-restart supervisor: miners that exit on their own are restarted with
+# exponential backoff (base, 2x, 4x ... up to max, +/- jitter)
+SUPERVISOR_ENABLED = True
+RESTART_BACKOFF_BASE = 5  # First restart delay (seconds)
+RESTART_BACKOFF_MAX = 300  # Max restart delay (seconds)
+RESTART_BACKOFF_JITTER = 0.2  # +/- fraction of the delay
+RESTART_STABLE_SECONDS = 300  # A run this long resets the backoff
+CRASH_LOOP_MAX_FAILURES = 5  # Park the miner after this many crashes...
+CRASH_LOOP_WINDOW = 600  # ...within this many seconds (until started manually)
+
 # Graceful shutdown timeouts
 SIGINT_WAIT_TIME = 2  # Wait after first SIGINT (seconds)
 SIGINT_RETRY_COUNT = 4  # Number of SIGINT retries
 SIGTERM_WAIT_TIME = 3  # Wait after SIGTERM (seconds)
+STOP_DEADLINE = 15  # Overall limit for one stop/kill-all; stragglers get SIGKILL (seconds)
+
+# Owned-process registry: every miner is started with an environment marker and
+# recorded here, so kill-all / force-stop-all never scan the host by name
+OWNED_PROCESS_FILE = 'miners/.owned_processes.json'
+OWNER_TAG = None  # None = derived from the working directory (stable across restarts)
+OWNED_PROCESS_SCAN_ON_BOOT = False  # Also scan all processes for our marker at startup (slow)
+
+# CPU affinity: per-miner "cpu_affinity" (e.g. "0-3") is always applied; the
+# partitioner gives every other running miner a disjoint, L3/NUMA-local core set
+CPU_PARTITION_ENABLED = False
+CPU_RESERVED = ''  # CPUs kept free for the OS / manager, e.g. '0' or '0,1'
+
+# Resource governance: miners run below the API / node agent so a saturated host
+# stays responsive. Per-miner "resources" in the config override these defaults:
+# {"nice": 10, "ionice": "idle", "cpu_max": 2.0 (cores), "memory_max": "2G"}
+DEFAULT_MINER_RESOURCES = {'nice': 10}
+CGROUP_ENABLED = False  # cpu_max / memory_max need a delegated cgroup v2 subtree
+CGROUP_ROOT = '/sys/fs/cgroup/mining-manager'  # One child cgroup per miner process (a plain directory works as a fake cgroupfs)
+
+# Tuning benchmark (/api/benchmark): threads x CPU layout matrix per miner
+BENCHMARK_WARMUP = 60  # Seconds after start before measuring (miners ramp up)
+BENCHMARK_DURATION = 120  # Measurement window per trial (seconds)
+BENCHMARK_MAX_TRIALS = 24  # Max threads x layouts combinations per job
+BENCHMARK_KEEP_JOBS = 20  # Finished jobs kept for GET /api/benchmark
 
 # ==================== File Download ====================
 CDN_BASE_URL = 'http://cdn.dndvina.com/minings'
 DOWNLOAD_CHUNK_SIZE = 8192  # bytes
-DOWNLOAD_TIMEOUT = 300  # seconds
+DOWNLOAD_TIMEOUT = 300  # seconds (per file)
+DOWNLOAD_WORKERS = 4  # Concurrent downloads (shared keep-alive session)
+DOWNLOAD_RETRIES = 5  # Resume attempts (HTTP Range) per file on flaky links
+DOWNLOAD_HISTORY_SIZE = 50  # Finished downloads kept for /api/downloads
+BINARY_CACHE_DIR = 'miners/.cache'  # Content-addressed store (sha256), hard-linked into coin dirs
+BINARY_REVALIDATE_INTERVAL = 60  # Skip ETag revalidation if checked within this many seconds
+
+# ==================== Config Persistence ====================
+# mining_config.json is written atomically (temp file + fsync + rename, previous
+# generation kept as .bak) by a background writer that coalesces bursts of changes
+CONFIG_SAVE_DEBOUNCE = 1.0  # Write after this many quiet seconds
+CONFIG_SAVE_MAX_DELAY = 5.0  # ...but no later than this after the first change
 
 # ==================== Paths ====================
 MINERS_DIR = 'miners'  # Base directory for all miners
@@ -0,0 +1,191 @@
+"""
+Mining Management API - Config persistence
+Atomic, debounced writes of mining_config.json from a background thread
+"""
+
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+# Process umask, read once at import (os.umask can only be queried by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class ConfigStore:
+    """Writes a JSON document atomically and keeps the previous generation
+
+    A write goes to a temp file in the same directory, is fsynced and then
+    renamed over the target, so readers see either the old or the new file,
+    never a torn one. The file being replaced is kept as <path>.bak.
+
+    schedule() only marks the store dirty; a writer thread calls the snapshot
+    function once changes have been quiet for `debounce` seconds (or at most
+    `max_delay` after the first change), so bursts coalesce into one write and
+    callers never wait for the disk.
+    """
+
+    def __init__(self, path, debounce=1.0, max_delay=5.0, log=print):
+        self.path = path
+        self.backup_path = path + '.bak'
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.log = log
+        self.generation = 0
+        self.last_write = None
+        self.last_error = None
+        self._snapshot = None
+        self._first_dirty = None
+        self._last_dirty = None
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+
+    # ==================== Reading ====================
+    def load(self):
+        """Return (data, source_path); falls back to the backup if the main file is unreadable"""
+        for path in (self.path, self.backup_path):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if path != self.path:
+                    self.log(f"[CONFIG-STORE] ⚠️ {self.path} hỏng hoặc thiếu, đã khôi phục từ {path}")
+                return data, path
+            except Exception as e:
+                self.log(f"[CONFIG-STORE] ❌ Không đọc được {path}: {e}")
+        return None, None
+
+    # ==================== Writing ====================
+    def schedule(self, snapshot):
+        """Request a write; snapshot() is called on the writer thread to build the data"""
+        now = time.monotonic()
+        with self._cond:
+            self._snapshot = snapshot
+            if self._first_dirty is None:
+                self._first_dirty = now
+            self._last_dirty = now
+            self._ensure_started()
+            self._cond.notify()
+
+    def flush(self):
+        """Write pending changes now (shutdown path). Returns False if the write failed."""
+        with self._cond:
+            snapshot = self._take_pending()
+        if snapshot is None:
+            return True
+        return self._write_snapshot(snapshot)
+
+    def write(self, data):
+        """Atomically replace the file with data (blocking)"""
+        with self._write_lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + '.', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # mkstemp creates 0600: keep the mode of the file being replaced (umask default if new)
+                os.chmod(tmp_path, _target_mode(self.path))
+                if os.path.exists(self.path):
+                    self._keep_previous()
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            _fsync_dir(directory)
+            self.generation += 1
+            self.last_write = time.time()
+
+    def _keep_previous(self):
+        """Current file becomes <path>.bak (hard link, copy where links aren't supported)"""
+        tmp_backup = self.backup_path + '.tmp'
+        try:
+            if os.path.exists(tmp_backup):
+                os.unlink(tmp_backup)
+            os.link(self.path, tmp_backup)
+        except OSError:
+            shutil.copy2(self.path, tmp_backup)
+        os.replace(tmp_backup, self.backup_path)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='config-writer', daemon=True)
+            self._thread.start()
+
+    def _take_pending(self):
+        snapshot = self._snapshot
+        self._snapshot = None
+        self._first_dirty = None
+        self._last_dirty = None
+        return snapshot
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._snapshot is None:
+                    self._cond.wait()
+                # Debounce: wait for a quiet period, bounded by max_delay
+                while True:
+                    now = time.monotonic()
+                    due = min(self._last_dirty + self.debounce, self._first_dirty + self.max_delay)
+                    if now >= due or self._snapshot is None:
+                        break
+                    self._cond.wait(due - now)
+                snapshot = self._take_pending()
+            if snapshot is not None:
+                self._write_snapshot(snapshot)
+
+    def _write_snapshot(self, snapshot):
+        try:
+            self.write(snapshot())
+            self.last_error = None
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            self.log(f"[CONFIG-STORE] ❌ Lỗi khi lưu {self.path}: {e}")
+            return False
+
+    def stats(self):
+        with self._cond:
+            pending = self._snapshot is not None
+        return {
+            'path': self.path,
+            'generation': self.generation,
+            'last_write': self.last_write,
+            'pending': pending,
+            'last_error': self.last_error,
+        }
+
+
+def _target_mode(path):
+    """Permission bits the written file should have"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def _fsync_dir(directory):
+    """Persist the rename itself (POSIX); not possible on Windows"""
+    if os.name != 'posix':
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,231 @@
+"""
+Mining Management API - CPU topology and affinity
+Reads cores / SMT siblings / L3 / NUMA layout and splits it into disjoint core sets per miner
+"""
+
+import glob
+import os
+
+import psutil
+
+SYSFS_ROOT = '/sys/devices/system'
+
+
+def parse_cpu_list(value):
+    """'0-3,8,10-11' (or a list of ints) -> sorted list of CPU numbers"""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        cpus = set()
+        for cpu in value:
+            if isinstance(cpu, bool) or not isinstance(cpu, int) or cpu < 0:
+                raise ValueError(f'CPU không hợp lệ: {cpu!r}')
+            cpus.add(cpu)
+        return sorted(cpus)
+    if not isinstance(value, str):
+        raise ValueError(f'Danh sách CPU không hợp lệ: {value!r}')
+    cpus = set()
+    for part in value.replace(' ', '').split(','):
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            first, last = int(first), int(last)
+            if first > last:
+                raise ValueError(f'Khoảng CPU không hợp lệ: {part}')
+            cpus.update(range(first, last + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus):
+    """[0, 1, 2, 3, 8] -> '0-3,8'"""
+    parts = []
+    cpus = sorted(cpus)
+    i = 0
+    while i < len(cpus):
+        j = i
+        while j + 1 < len(cpus) and cpus[j + 1] == cpus[j] + 1:
+            j += 1
+        parts.append(str(cpus[i]) if i == j else f'{cpus[i]}-{cpus[j]}')
+        i = j + 1
+    return ','.join(parts)
+
+
+def _read(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def allowed_cpus():
+    """CPUs this process may run on (respects taskset / cgroup cpusets)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    try:
+        return sorted(psutil.Process().cpu_affinity())
+    except (AttributeError, psutil.Error):
+        return list(range(psutil.cpu_count() or 1))
+
+
+class CpuTopology:
+    """Logical CPUs grouped into physical cores and cache/memory domains
+
+    cpus: {cpu: {'core': (package, core_id), 'l3': id, 'node': id}}. A
+    domain is one (NUMA node, L3 cache) pair; cores of one domain share the
+    last-level cache, so a miner kept inside a domain doesn't thrash another
+    miner's cache.
+    """
+
+    def __init__(self, cpus, source):
+        self.cpus = cpus
+        self.source = source
+
+    @classmethod
+    def read(cls, root=SYSFS_ROOT):
+        """Topology from sysfs (Linux); one core per CPU in a single domain elsewhere"""
+        cpus = {}
+        online = _read(os.path.join(root, 'cpu', 'online'))
+        if online:
+            for cpu in parse_cpu_list(online):
+                base = os.path.join(root, 'cpu', f'cpu{cpu}')
+                package = _read(os.path.join(base, 'topology', 'physical_package_id')) or '0'
+                core_id = _read(os.path.join(base, 'topology', 'core_id'))
+                l3 = None
+                for index in glob.glob(os.path.join(base, 'cache', 'index*')):
+                    if _read(os.path.join(index, 'level')) == '3':
+                        shared = _read(os.path.join(index, 'shared_cpu_list'))
+                        l3 = min(parse_cpu_list(shared)) if shared else None
+                        break
+                cpus[cpu] = {
+                    'core': (int(package), int(core_id) if core_id is not None else cpu),
+                    'l3': l3 if l3 is not None else int(package),
+                    'node': 0,
+                }
+            for node_dir in glob.glob(os.path.join(root, 'node', 'node[0-9]*')):
+                cpulist = _read(os.path.join(node_dir, 'cpulist'))
+                node = int(os.path.basename(node_dir)[4:])
+                for cpu in parse_cpu_list(cpulist or ''):
+                    if cpu in cpus:
+                        cpus[cpu]['node'] = node
+            if cpus:
+                return cls(cpus, 'sysfs')
+
+        count = psutil.cpu_count() or 1
+        return cls({cpu: {'core': (0, cpu), 'l3': 0, 'node': 0} for cpu in range(count)}, 'psutil')
+
+    def domains(self, usable):
+        """{(node, l3): [[sibling cpus of a core], ...]} restricted to usable CPUs"""
+        cores = {}
+        for cpu in sorted(usable):
+            info = self.cpus.get(cpu)
+            if info is None:
+                continue
+            cores.setdefault((info['node'], info['l3'], info['core']), []).append(cpu)
+        domains = {}
+        for (node, l3, _), siblings in sorted(cores.items()):
+            domains.setdefault((node, l3), []).append(siblings)
+        return domains
+
+    def to_dict(self):
+        domains = self.domains(self.cpus)
+        return {
+            'source': self.source,
+            'logical_cpus': len(self.cpus),
+            'physical_cores': sum(len(cores) for cores in domains.values()),
+            'smt': any(len(siblings) > 1 for cores in domains.values() for siblings in cores),
+            'domains': [
+                {'node': node, 'l3': l3, 'cpus': format_cpu_list([cpu for siblings in cores for cpu in siblings])}
+                for (node, l3), cores in domains.items()
+            ],
+        }
+
+
+def partition(topology, miners, usable):
+    """Split usable CPUs between miners -> {name: [cpus]}
+
+    miners: {name: explicit cpu list or None}. Explicit sets are kept as
+    given and removed from the pool. The remaining physical cores are shared
+    out evenly among the other miners, whole cores at a time (SMT siblings
+    stay together). Each miner is placed in the single L3/NUMA domain that
+    fits its share most tightly; shares bigger than any free domain spill
+    over within one NUMA node if possible, emptiest domains first. With more
+    miners than cores the cores are handed out round robin (sets then overlap).
+    """
+    assignment = {}
+    taken = set()
+    for name, cpus in miners.items():
+        if cpus:
+            assignment[name] = sorted(cpus)
+            taken.update(cpus)
+
+    auto = sorted(name for name, cpus in miners.items() if not cpus)
+    domains = topology.domains([cpu for cpu in usable if cpu not in taken])
+    total = sum(len(cores) for cores in domains.values())
+    if not auto or total == 0:
+        return assignment
+
+    if total < len(auto):
+        all_cores = [siblings for cores in domains.values() for siblings in cores]
+        for i, name in enumerate(auto):
+            assignment[name] = list(all_cores[i % total])
+        return assignment
+
+    base, extra = divmod(total, len(auto))
+    free = {key: list(cores) for key, cores in domains.items()}
+    for i, name in enumerate(auto):
+        share = base + (1 if i < extra else 0)
+        order = _placement(free, share)
+        cpus = []
+        for key in order:
+            while share and free[key]:
+                cpus.extend(free[key].pop(0))
+                share -= 1
+        assignment[name] = sorted(cpus)
+    return assignment
+
+
+def _placement(free, share):
+    """Domains to take a share of cores from: tightest single domain, else one NUMA node, else anywhere"""
+    fitting = [key for key, cores in free.items() if len(cores) >= share]
+    if fitting:
+        return [min(fitting, key=lambda key: (len(free[key]), key))]
+    by_node = {}
+    for (node, l3), cores in free.items():
+        by_node[node] = by_node.get(node, 0) + len(cores)
+    nodes = [node for node, count in by_node.items() if count >= share]
+    if nodes:
+        node = min(nodes, key=lambda node: (by_node[node], node))
+        candidates = [key for key in free if key[0] == node]
+    else:
+        candidates = list(free)
+    return sorted(candidates, key=lambda key: (-len(free[key]), key))
+
+
+def apply_affinity(pid, cpus):
+    """Pin every thread of a process and its descendants to cpus; returns the number of tasks pinned"""
+    root = psutil.Process(pid)
+    pinned = 0
+    for proc in [root] + root.children(recursive=True):
+        try:
+            if hasattr(os, 'sched_setaffinity'):
+                # Linux affinity is per thread: threads created before this call keep the old mask
+                for thread in proc.threads():
+                    try:
+                        os.sched_setaffinity(thread.id, cpus)
+                        pinned += 1
+                    except ProcessLookupError:
+                        pass
+            else:
+                proc.cpu_affinity(list(cpus))
+                pinned += 1
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            pass
+    return pinned
+
+
+def affinity_supported():
+    return hasattr(os, 'sched_setaffinity') or hasattr(psutil.Process, 'cpu_affinity')
@@ -0,0 +1,471 @@
+"""
+Mining Management API - File downloader
+Concurrent CDN downloads over a shared keep-alive HTTP session, backed by a
+content-addressed (SHA-256) binary cache that is hard-linked into coin directories
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+
+class DownloadError(Exception):
+    """Download failed, exceeded its time budget or failed checksum verification"""
+
+
+def is_sha256(value):
+    """True for a lowercase hex SHA-256 digest (the only thing allowed in cache paths)"""
+    return isinstance(value, str) and re.fullmatch(r'[0-9a-f]{64}', value) is not None
+
+
+def normalize_required_files(required_files):
+    """Turn required_files into [(filename, sha256 or None), ...]
+
+    Entries may be plain names ("ccminer") or objects
+    ({"name": "ccminer", "sha256": "<hex>"}).
+    """
+    normalized = []
+    for item in required_files or []:
+        if isinstance(item, dict):
+            name = item.get('name') or item.get('filename')
+            if not name:
+                raise ValueError(f'required_files entry thiếu "name": {item}')
+            sha256 = item.get('sha256')
+            if sha256:
+                sha256 = str(sha256).lower()
+                if not is_sha256(sha256):
+                    raise ValueError(f'required_files entry có sha256 không hợp lệ: {item}')
+            normalized.append((name, sha256 or None))
+        else:
+            normalized.append((str(item), None))
+    return normalized
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BinaryCache:
+    """Content-addressed store: objects/<sha256> plus a url -> metadata index"""
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.index_file = os.path.join(root, 'index.json')
+        self._lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.index-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self.index_file)
+
+    def object_path(self, sha256):
+        if not is_sha256(sha256):
+            raise ValueError(f'sha256 không hợp lệ: {sha256!r}')
+        return os.path.join(self.objects_dir, sha256)
+
+    def has(self, sha256):
+        return is_sha256(sha256) and os.path.exists(self.object_path(sha256))
+
+    def lookup(self, url):
+        with self._lock:
+            entry = self._index.get(url)
+            return dict(entry) if entry else None
+
+    def record(self, url, **fields):
+        with self._lock:
+            entry = self._index.setdefault(url, {})
+            entry.update(fields)
+            self._save_index()
+
+    def add(self, tmp_path, sha256, executable):
+        """Move a verified temp file into the store (dedup if already present)"""
+        target = self.object_path(sha256)
+        os.chmod(tmp_path, 0o755 if executable else 0o644)
+        if os.path.exists(target):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, target)
+        return target
+
+    def adopt(self, file_path, sha256, executable):
+        """Put an existing, already hashed file into the store"""
+        if self.has(sha256):
+            return
+        tmp_path = os.path.join(self.tmp_dir, f'adopt-{sha256}')
+        try:
+            os.link(file_path, tmp_path)
+        except OSError:
+            shutil.copy2(file_path, tmp_path)
+        self.add(tmp_path, sha256, executable)
+
+    def link_into(self, sha256, file_path):
+        """Place object at file_path via hard link (copy if linking isn't possible)"""
+        source = self.object_path(sha256)
+        try:
+            if os.path.exists(file_path) and os.path.samefile(source, file_path):
+                return
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        tmp_path = f'{file_path}.link-{os.getpid()}-{threading.get_ident()}'
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copy2(source, tmp_path)
+        # Atomic replace - a running miner keeps its old inode
+        os.replace(tmp_path, file_path)
+
+
+class Downloader:
+    """Downloads mining files from the CDN on a bounded worker pool"""
+
+    def __init__(self, base_url, max_workers=None, timeout=None, cache_dir=None, log=print):
+        self.base_url = base_url
+        self.max_workers = max_workers or config.DOWNLOAD_WORKERS
+        self.timeout = timeout or config.DOWNLOAD_TIMEOUT
+        self.log = log
+        self.cache = BinaryCache(cache_dir or config.BINARY_CACHE_DIR)
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._url_locks = {}
+        self._url_locks_lock = threading.Lock()
+        self._progress = []
+        self._progress_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='download')
+
+    @property
+    def session(self):
+        """Shared requests.Session (connection pool sized to the worker pool)"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def _url_lock(self, url):
+        with self._url_locks_lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def download(self, filename, coin_dir, sha256=None):
+        """Make coin_dir/filename a verified copy of the CDN file. Returns True on success."""
+        try:
+            url = self.base_url + filename
+            file_path = os.path.join(coin_dir, filename)
+            executable = _is_executable_name(filename)
+
+            # One fetch per URL at a time; other coins wait and reuse the cached object
+            with self._url_lock(url):
+                digest = self._resolve(url, filename, file_path, sha256, executable)
+
+            self.cache.link_into(digest, file_path)
+            return True
+
+        except Exception as e:
+            self.log(f"Lỗi khi tải xuống {filename}: {e}")
+            return False
+
+    def _resolve(self, url, filename, file_path, expected, executable):
+        """Return sha256 of a cached object that is valid for url"""
+        # Expected hash already in the store: no network needed
+        if expected and self.cache.has(expected):
+            self.log(f"Tập tin {filename} đã có trong cache ({expected[:12]}), bỏ qua tải xuống")
+            return expected
+
+        # File from before the cache existed: adopt it if it matches the expected hash
+        if expected and os.path.exists(file_path) and sha256_file(file_path) == expected:
+            self.cache.adopt(file_path, expected, executable)
+            self.cache.record(url, sha256=expected, size=os.path.getsize(file_path))
+            self.log(f"Tập tin {filename} đã tồn tại và đúng checksum, đưa vào cache")
+            return expected
+
+        entry = self.cache.lookup(url)
+        cached = entry.get('sha256') if entry and self.cache.has(entry.get('sha256')) else None
+
+        # Recently validated against the CDN - trust it
+        if cached and not expected and time.time() - entry.get('validated_at', 0) < config.BINARY_REVALIDATE_INTERVAL:
+            return cached
+
+        headers = {}
+        if cached and not expected:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            digest = self._fetch(url, filename, headers, expected, executable)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if cached and not expected:
+                self.log(f"Không kết nối được CDN cho {filename} ({e}), dùng bản cache {cached[:12]}")
+                return cached
+            if not expected and os.path.exists(file_path):
+                # Can't verify without CDN or hash - keep the miner usable but say so
+                digest = sha256_file(file_path)
+                self.cache.adopt(file_path, digest, executable)
+                self.log(f"⚠️ Không kết nối được CDN cho {filename} ({e}), dùng file có sẵn CHƯA XÁC MINH ({digest[:12]})")
+                return digest
+            raise
+
+        if digest is None:  # 304 Not Modified
+            self.cache.record(url, validated_at=time.time())
+            self.log(f"Tập tin {filename} không đổi trên CDN (304), dùng bản cache")
+            return cached
+        return digest
+
+    def _fetch(self, url, filename, headers, expected, executable):
+        """Download url into the cache, verifying SHA-256. Returns digest or None on 304.
+
+        Data goes to tmp/<hash(url)>.part first. Interrupted transfers are retried
+        and resumed with HTTP Range (guarded by If-Range), also across restarts of
+        the manager. Only a complete, verified file is renamed into the store.
+        """
+        if headers:
+            self.log(f"Đang kiểm tra {filename} trên CDN (If-None-Match/If-Modified-Since)...")
+        else:
+            self.log(f"Đang tải xuống {filename} từ {url}...")
+
+        part_path = os.path.join(self.cache.tmp_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.part')
+        progress = self._progress_start(url, filename)
+        deadline = time.monotonic() + self.timeout
+        attempt = 0
+
+        try:
+            while True:
+                attempt += 1
+                progress['attempts'] = attempt
+                try:
+                    result = self._fetch_once(url, part_path, headers, progress, deadline)
+                    break
+                except _RETRYABLE_ERRORS as e:
+                    if attempt > config.DOWNLOAD_RETRIES or time.monotonic() > deadline:
+                        raise
+                    delay = min(2 ** attempt, 10)
+                    self.log(f"Tải {filename} bị gián đoạn ({e}), thử lại lần {attempt} sau {delay}s (tiếp tục từ byte {_size(part_path)})")
+                    time.sleep(delay)
+
+            if result is None:  # 304 Not Modified
+                self._progress_finish(progress, 'not_modified')
+                return None
+
+            total, etag, last_modified = result
+            size = _size(part_path)
+            if total is not None and size != total:
+                _remove_part(part_path)
+                raise DownloadError(f'tải về {size}/{total} bytes (bị cắt ngang)')
+
+            sha256 = sha256_file(part_path)
+            if expected and sha256 != expected:
+                _remove_part(part_path)
+                raise DownloadError(f'sai checksum: mong đợi {expected}, nhận {sha256}')
+
+            self.cache.add(part_path, sha256, executable)
+            _remove_part(part_path)  # Metadata sidecar
+            self.cache.record(
+                url,
+                sha256=sha256,
+                size=size,
+                etag=etag,
+                last_modified=last_modified,
+                validated_at=time.time()
+            )
+        except BaseException as e:
+            self._progress_finish(progress, 'failed', error=str(e))
+            raise
+
+        self._progress_finish(progress, 'done', sha256=sha256)
+        self.log(f"Tải xuống {filename} thành công ({size} bytes, sha256 {sha256[:12]})")
+        return sha256
+
+    def _fetch_once(self, url, part_path, headers, progress, deadline):
+        """One HTTP attempt. Returns (total, etag, last_modified) or None on 304."""
+        request_headers = dict(headers)
+        # Byte offsets must match what is on disk - no transparent compression
+        request_headers['Accept-Encoding'] = 'identity'
+
+        offset = _size(part_path)
+        meta = _load_part_meta(part_path) if offset else {}
+        validator = meta.get('etag') or meta.get('last_modified')
+        if offset and validator:
+            request_headers.pop('If-None-Match', None)
+            request_headers.pop('If-Modified-Since', None)
+            request_headers['Range'] = f'bytes={offset}-'
+            request_headers['If-Range'] = validator
+        elif offset:
+            # No validator: can't prove the partial file belongs to the current version
+            _remove_part(part_path)
+            offset = 0
+
+        # (connect timeout, read timeout per socket operation)
+        with self.session.get(url, stream=True, headers=request_headers, timeout=(10, min(60, self.timeout))) as response:
+            if response.status_code == 304:
+                return None
+            if response.status_code == 416:
+                # Range not satisfiable - stale partial file, start over
+                _remove_part(part_path)
+                raise _RestartDownload('HTTP 416, tải lại từ đầu')
+            response.raise_for_status()
+
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+            if response.status_code == 206:
+                total = _content_range_total(response.headers.get('Content-Range'))
+                mode = 'ab'
+                progress['resumed_from'] = offset
+                self.log(f"Tiếp tục tải {progress['filename']} từ byte {offset}")
+            else:
+                length = response.headers.get('Content-Length')
+                total = int(length) if length is not None else None
+                mode = 'wb'
+                offset = 0
+
+            _save_part_meta(part_path, {'etag': etag, 'last_modified': last_modified, 'total': total})
+            progress['total'] = total
+            progress['bytes'] = offset
+
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=config.DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    progress['bytes'] += len(chunk)
+                    progress['updated_at'] = time.time()
+                    if time.monotonic() > deadline:
+                        raise DownloadError(f'quá thời gian {self.timeout}s')
+
+        return total, etag, last_modified
+
+    def _progress_start(self, url, filename):
+        progress = {
+            'url': url,
+            'filename': filename,
+            'status': 'downloading',
+            'bytes': 0,
+            'total': None,
+            'resumed_from': 0,
+            'attempts': 0,
+            'started_at': time.time(),
+            'updated_at': time.time(),
+            'finished_at': None,
+            'error': None,
+        }
+        with self._progress_lock:
+            self._progress.append(progress)
+            # Keep finished entries for a while, bounded
+            finished = [p for p in self._progress if p['status'] != 'downloading']
+            for old in finished[:max(0, len(finished) - config.DOWNLOAD_HISTORY_SIZE)]:
+                self._progress.remove(old)
+        return progress
+
+    def _progress_finish(self, progress, status, error=None, sha256=None):
+        progress['status'] = status
+        progress['error'] = error
+        progress['finished_at'] = time.time()
+        if sha256:
+            progress['sha256'] = sha256
+
+    def get_progress(self):
+        """Active and recent downloads (for /api/downloads)"""
+        now = time.time()
+        with self._progress_lock:
+            items = [dict(p) for p in self._progress]
+        for item in items:
+            elapsed = (item['finished_at'] or now) - item['started_at']
+            transferred = item['bytes'] - item['resumed_from']
+            item['speed_bps'] = transferred / elapsed if elapsed > 0 else 0
+            item['percent'] = round(item['bytes'] * 100 / item['total'], 1) if item['total'] else None
+        return items
+
+    def download_all(self, jobs):
+        """Download [(filename, coin_dir, sha256), ...] concurrently
+
+        Returns {job: bool}. Total time is bounded by the slowest file rather
+        than the sum of all files.
+        """
+        unique_jobs = list(dict.fromkeys(jobs))
+        futures = {job: self._executor.submit(self.download, *job) for job in unique_jobs}
+        return {job: future.result() for job, future in futures.items()}
+
+
+class _RestartDownload(Exception):
+    """Partial file was discarded, retry from byte 0"""
+
+
+_RETRYABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    _RestartDownload,
+)
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _load_part_meta(part_path):
+    try:
+        with open(part_path + '.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_part_meta(part_path, meta):
+    with open(part_path + '.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def _remove_part(part_path):
+    for path in (part_path, part_path + '.json'):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _content_range_total(content_range):
+    """'bytes 100-199/200' -> 200 (None if unknown)"""
+    try:
+        total = content_range.rsplit('/', 1)[1]
+        return None if total == '*' else int(total)
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def _is_executable_name(filename):
+    """Mining tools are executable on Linux (except for .dll files)"""
+    return os.name == 'posix' and not filename.endswith('.dll')
@@ -0,0 +1,153 @@
+"""
+Mining Management API - Signal escalation engine
+Stops many processes / process groups concurrently: SIGINT -> SIGTERM -> SIGKILL per target
+"""
+
+import os
+import signal
+import time
+
+import psutil
+
+import process_group
+
+# How often targets are checked while waiting (seconds)
+POLL_INTERVAL = 0.02
+# Wait after the final stage when the overall deadline forced it early (seconds)
+DEADLINE_KILL_WAIT = 1.0
+
+
+def _signal_name(sig):
+    try:
+        return signal.Signals(sig).name
+    except ValueError:
+        return str(sig)
+
+
+class Target:
+    """One thing to stop: a process group (pgid) or a single PID
+
+    The psutil handle is taken up front, so a PID reused by an unrelated
+    process after ours died is never signalled (psutil checks create time).
+    """
+
+    def __init__(self, pid, pgid=None, stages=None, label=None):
+        self.pid = pid
+        self.pgid = pgid
+        self.stages = stages
+        self.label = label
+        self.stage = -1
+        self.stage_deadline = None
+        self.signals_sent = []
+        self.stopped = False
+        self.ended_by = None
+        self.elapsed = None
+        self.error = None
+        self._proc = None
+        if pgid is None or os.name != 'posix':
+            self.pgid = None
+            try:
+                self._proc = psutil.Process(pid)
+            except psutil.NoSuchProcess:
+                self.stopped = True
+            except psutil.AccessDenied as e:
+                self.error = str(e)
+
+    def alive(self):
+        if self.pgid is not None:
+            return process_group.group_alive(self.pgid)
+        if self._proc is None:
+            return False
+        try:
+            return self._proc.is_running() and self._proc.status() != psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            return False
+        except psutil.AccessDenied:
+            return True
+
+    def send(self, sig):
+        self.signals_sent.append(_signal_name(sig))
+        try:
+            if self.pgid is not None:
+                os.killpg(self.pgid, sig)
+            elif sig == process_group.SIGKILL:
+                self._proc.kill()
+            elif sig == signal.SIGTERM:
+                self._proc.terminate()
+            else:
+                self._proc.send_signal(sig)
+        except (ProcessLookupError, psutil.NoSuchProcess):
+            pass
+        except (PermissionError, psutil.AccessDenied, ValueError) as e:
+            # ValueError: signal not supported on this platform (SIGINT on Windows)
+            self.error = str(e)
+
+    def to_dict(self):
+        return {
+            'pid': self.pid,
+            'pgid': self.pgid,
+            'label': self.label,
+            'stopped': self.stopped,
+            'signal': self.ended_by,
+            'signals_sent': self.signals_sent,
+            'elapsed_ms': round(self.elapsed * 1000, 1) if self.elapsed is not None else None,
+            'error': self.error,
+        }
+
+
+def escalate(targets, stages, deadline=None, log=print):
+    """Signal all targets concurrently through their escalation stages
+
+    stages: default [(signal, max_wait)] for targets without their own plan.
+    Every target advances to its next stage as soon as its current wait
+    expires, independent of the others; targets that exit are dropped
+    immediately. When the overall deadline passes, remaining targets jump to
+    their final stage. Returns one result dict per target (see Target.to_dict).
+    """
+    started = time.monotonic()
+    end = started + deadline if deadline else None
+    alive = []
+
+    for target in targets:
+        target.stages = target.stages or stages
+        if target.stopped:
+            target.elapsed = 0.0
+            continue
+        _advance(target, started)
+        alive.append(target)
+
+    while alive:
+        time.sleep(POLL_INTERVAL)
+        now = time.monotonic()
+        past_deadline = end is not None and now >= end
+        for target in list(alive):
+            if not target.alive():
+                target.stopped = True
+                target.ended_by = target.signals_sent[-1] if target.signals_sent else None
+                target.elapsed = now - started
+                alive.remove(target)
+                continue
+
+            final = target.stage >= len(target.stages) - 1
+            if now >= target.stage_deadline:
+                if final:
+                    target.elapsed = now - started
+                    alive.remove(target)
+                    log(f"[ESCALATE] ❌ PID {target.pid} vẫn còn sống sau {target.signals_sent[-1]}")
+                    continue
+                _advance(target, now)
+            elif past_deadline and not final:
+                # Overall deadline: go straight to the last stage (SIGKILL)
+                target.stage = len(target.stages) - 2
+                _advance(target, now, max_wait=DEADLINE_KILL_WAIT)
+
+    return [target.to_dict() for target in targets]
+
+
+def _advance(target, now, max_wait=None):
+    target.stage += 1
+    sig, wait = target.stages[target.stage]
+    if max_wait is not None:
+        wait = min(wait, max_wait)
+    target.send(sig)
+    target.stage_deadline = now + wait
@@ -0,0 +1,109 @@
+"""
+Mining Management API - Hash rate history
+Fixed-size ring buffer of (timestamp, hash rate) samples per miner
+"""
+
+import threading
+import time
+from array import array
+
+
+class HashRateHistory:
+    """Array-backed ring buffer of (timestamp, hash_rate) samples
+
+    Memory is allocated once (2 doubles per slot), so it stays constant
+    no matter how long the miner runs. Timestamps are appended in order.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self._ts = array('d', bytes(8 * self.capacity))
+        self._values = array('d', bytes(8 * self.capacity))
+        self._start = 0  # Physical index of oldest sample
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, hash_rate, timestamp=None):
+        """Add one sample, overwriting the oldest one when full"""
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            if self._count < self.capacity:
+                idx = (self._start + self._count) % self.capacity
+                self._count += 1
+            else:
+                idx = self._start
+                self._start = (self._start + 1) % self.capacity
+            self._ts[idx] = timestamp
+            self._values[idx] = hash_rate
+
+    def latest(self):
+        """Return newest (timestamp, hash_rate) or None"""
+        with self._lock:
+            if not self._count:
+                return None
+            idx = (self._start + self._count - 1) % self.capacity
+            return self._ts[idx], self._values[idx]
+
+    def _lower_bound(self, timestamp):
+        """First logical index with ts >= timestamp (caller holds lock)"""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts[(self._start + mid) % self.capacity] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def samples(self, start, end):
+        """Hash rate values with start <= ts <= end, oldest first"""
+        values = []
+        with self._lock:
+            i = self._lower_bound(start)
+            while i < self._count:
+                idx = (self._start + i) % self.capacity
+                if self._ts[idx] > end:
+                    break
+                values.append(self._values[idx])
+                i += 1
+        return values
+
+    def downsample(self, start, end, step):
+        """Aggregate samples in [start, end] into buckets of `step` seconds
+
+        Returns list of {'t', 'min', 'avg', 'max', 'count'} for non-empty
+        buckets. Walks the ring in place, nothing is copied.
+        """
+        buckets = []
+        with self._lock:
+            i = self._lower_bound(start)
+            current = None
+            while i < self._count:
+                idx = (self._start + i) % self.capacity
+                ts = self._ts[idx]
+                if ts > end:
+                    break
+                value = self._values[idx]
+                bucket_start = start + int((ts - start) // step) * step
+                if current is None or current['t'] != bucket_start:
+                    if current is not None:
+                        buckets.append(current)
+                    current = {'t': bucket_start, 'min': value, 'max': value, 'sum': value, 'count': 1}
+                else:
+                    if value < current['min']:
+                        current['min'] = value
+                    if value > current['max']:
+                        current['max'] = value
+                    current['sum'] += value
+                    current['count'] += 1
+                i += 1
+            if current is not None:
+                buckets.append(current)
+
+        for bucket in buckets:
+            bucket['avg'] = bucket.pop('sum') / bucket['count']
+        return buckets
@@ -0,0 +1,106 @@
+"""
+Mining Management API - Hash rate parsers
+Registry of precompiled hash rate parsers, keyed by mining_tool
+"""
+
+import re
+
+# Remove ANSI color codes that some miners use (like astrominer)
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+# Unit prefix -> multiplier to MH/s (internal unit used by miner['hash_rate'])
+UNIT_TO_MH = {
+    '': 1 / 1000000,  # H/s to MH/s
+    'k': 1 / 1000,    # kH/s to MH/s
+    'm': 1,           # MH/s stays the same
+    'g': 1000,        # GH/s to MH/s
+    't': 1000000,     # TH/s to MH/s
+}
+
+
+def to_mh(value, unit):
+    """Convert a value with unit like 'kH/s' to MH/s"""
+    prefix = unit[:1].lower() if unit else ''
+    if prefix == 'h':
+        prefix = ''
+    return value * UNIT_TO_MH.get(prefix, UNIT_TO_MH[''])
+
+
+class HashRateParser:
+    """Precompiled hash rate patterns for one mining tool
+
+    prefilter: substrings that must ALL be present in the raw line,
+    checked before ANSI stripping or any regex runs.
+    """
+
+    def __init__(self, tool, patterns, prefilter=()):
+        self.tool = tool
+        self.patterns = [re.compile(p, re.IGNORECASE) for p in patterns]
+        self.prefilter = tuple(prefilter)
+
+    def accepts(self, line):
+        """Cheap substring check - reject lines that can't contain a hash rate"""
+        for token in self.prefilter:
+            if token not in line:
+                return False
+        return True
+
+    def parse(self, line):
+        """Return hash rate in MH/s or None"""
+        if not self.accepts(line):
+            return None
+
+        if '\x1b' in line:
+            line = ANSI_ESCAPE.sub('', line)
+
+        for pattern in self.patterns:
+            match = pattern.search(line)
+            if match:
+                try:
+                    return to_mh(float(match.group(1)), match.group(2))
+                except (ValueError, IndexError):
+                    continue
+        return None
+
+
+PARSERS = {
+    # CCMiner:
+    # "accepted: 7/7 (diff 436900.000), 2451.53 kH/s yes!"
+    # "GPU #0: GeForce GTX 1080, 25.50 MH/s"
+    'ccminer': HashRateParser('ccminer', [
+        r'accepted:\s*\d+\/\d+\s*\(diff\s*[\d\.]+\),\s*(\d+\.?\d*)\s*([kmgt]?h\/s)\s*yes!',
+        r'GPU #\d+:.*?(\d+\.?\d*)\s*([kmgt]?h/s)',
+        r'total:\s*(\d+\.?\d*)\s*([kmgt]?h/s)',
+        r'(\d+\.?\d*)\s*([kmgt]?h/s)',
+    ], prefilter=('accepted', '/s')),
+
+    # XMRig: "speed 10s/60s/15m 1000.0 1000.0 1000.0 H/s max 1010.0 H/s"
+    'xmrig': HashRateParser('xmrig', [
+        r'speed\s+\S+\s+(\d+\.?\d*)\s+(?:\d+\.?\d*|n/a)\s+(?:\d+\.?\d*|n/a)\s*([kmgt]?h/s)',
+        r'(\d+\.?\d*)\s*([kmgt]?h/s)',
+    ], prefilter=('speed', '/s')),
+
+    # Astrominer:
+    # "[dero] 16-10-2025 03:29:57 [dero.rabidmining.com:10300] Accepted 159 | Rejected 0 | ... | Hashrate 0.956KH/s"
+    'astrominer': HashRateParser('astrominer', [
+        r'hashrate\s+(\d+\.?\d*)\s*([kmgt]?h/s)',
+        r'(\d+\.?\d*)\s*([kmgt]?h/s)',
+    ], prefilter=('ashrate', '/')),
+}
+
+# Generic patterns for unknown tools
+GENERIC_PARSER = HashRateParser('generic', [
+    r'(\d+\.?\d*)\s*([kmgt]?h/s)',
+    r'hashrate[:\s]+(\d+\.?\d*)\s*([kmgt]?h/s)',
+    r'speed[:\s]+(\d+\.?\d*)\s*([kmgt]?h/s)',
+], prefilter=('/',))
+
+
+def get_parser(mining_tool):
+    """Get hash rate parser for a mining tool (falls back to generic)"""
+    return PARSERS.get((mining_tool or '').lower(), GENERIC_PARSER)
+
+
+def parse_hash_rate(line, mining_tool=''):
+    """Extract hash rate (MH/s) from one line of miner output"""
+    return get_parser(mining_tool).parse(line)
@@ -0,0 +1,171 @@
+"""
+Mining Management API - Hash rate watchdog
+Learns a per-miner, per-config baseline and flags miners that are alive but not hashing
+"""
+
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import deque
+
+
+def config_fingerprint(miner):
+    """Stable key for the settings that determine a miner's expected hash rate"""
+    data = {
+        'coin_name': miner.get('coin_name'),
+        'mining_tool': miner.get('mining_tool'),
+        'config': miner.get('config'),
+    }
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:12]
+
+
+class _Baseline:
+    """Slow exponentially weighted average of healthy hash rate samples"""
+
+    def __init__(self):
+        self.value = None
+        self.samples = 0
+        self.updated_at = None
+
+
+class MinerWatchdog:
+    """Degradation detector for one miner
+
+    Two time-weighted averages are kept: a slow baseline (tau = baseline_tau)
+    per config fingerprint and a fast current rate (tau = current_tau). The
+    miner is degraded when the current rate stays below low_fraction of the
+    baseline for low_seconds, or stalled when no hash rate line arrived for
+    stall_seconds (only once the config has a trusted baseline). Samples taken during warmup or while degraded do not move
+    the baseline, so a slow decline can't teach it a lower normal.
+    """
+
+    def __init__(self, low_fraction, low_seconds, stall_seconds, warmup_seconds,
+                 baseline_tau, current_tau, min_samples, cooldown, max_events):
+        self.low_fraction = low_fraction
+        self.low_seconds = low_seconds
+        self.stall_seconds = stall_seconds
+        self.warmup_seconds = warmup_seconds
+        self.baseline_tau = baseline_tau
+        self.current_tau = current_tau
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.events = deque(maxlen=max_events)
+        self._baselines = {}  # config fingerprint -> _Baseline
+        self._baseline = _Baseline()
+        self.config_key = None
+        self.run_start = None
+        self.current = None
+        self.last_sample_at = None
+        self.low_since = None
+        self.last_action_at = None
+        self._lock = threading.Lock()
+
+    def new_run(self, config_key, now=None):
+        """Call when the miner (re)starts; selects the baseline of its config"""
+        now = now or time.time()
+        with self._lock:
+            self.config_key = config_key
+            self._baseline = self._baselines.setdefault(config_key, _Baseline())
+            self.run_start = now
+            self.current = None
+            self.last_sample_at = None
+            self.low_since = None
+
+    def observe(self, hash_rate, now=None):
+        """Feed one parsed hash rate sample (MH/s)"""
+        now = now or time.time()
+        with self._lock:
+            dt = now - self.last_sample_at if self.last_sample_at else 0
+            self.current = hash_rate if self.current is None else _ewma(self.current, hash_rate, dt, self.current_tau)
+            self.last_sample_at = now
+
+            baseline = self._baseline
+            if self.run_start is None or now - self.run_start < self.warmup_seconds:
+                return
+            if baseline.value is not None and baseline.samples >= self.min_samples \
+                    and hash_rate < baseline.value * self.low_fraction:
+                return
+            if baseline.value is None:
+                baseline.value = hash_rate
+            else:
+                baseline.value = _ewma(baseline.value, hash_rate, now - baseline.updated_at, self.baseline_tau)
+            baseline.samples += 1
+            baseline.updated_at = now
+
+    def check(self, now=None):
+        """Return a trigger dict ('low_hashrate' / 'stalled') or None; call periodically while running"""
+        now = now or time.time()
+        with self._lock:
+            if self.run_start is None or now - self.run_start < self.warmup_seconds:
+                return None
+            if self.last_action_at and now - self.last_action_at < self.cooldown:
+                return None
+
+            baseline = self._baseline
+            trigger = None
+
+            # Only a config that has produced a trusted baseline can stall: a
+            # tool whose output is never parsed must not be restarted forever
+            trusted = baseline.value is not None and baseline.samples >= self.min_samples
+            last = self.last_sample_at or self.run_start
+            if trusted and now - last >= self.stall_seconds:
+                trigger = {
+                    'type': 'stalled',
+                    'message': f'Không có dòng hash rate mới trong {int(now - last)}s',
+                    'seconds_since_sample': round(now - last, 1),
+                }
+            elif trusted and self.current is not None:
+                threshold = baseline.value * self.low_fraction
+                if self.current < threshold:
+                    if self.low_since is None:
+                        self.low_since = now
+                    elif now - self.low_since >= self.low_seconds:
+                        trigger = {
+                            'type': 'low_hashrate',
+                            'message': f'Hash rate {self.current:.4f} MH/s < {self.low_fraction:.0%} baseline ({baseline.value:.4f} MH/s) trong {int(now - self.low_since)}s',
+                            'seconds_below': round(now - self.low_since, 1),
+                        }
+                else:
+                    self.low_since = None
+
+            if trigger is None:
+                return None
+            self.last_action_at = now
+            self.low_since = None
+            trigger.update({
+                'timestamp': now,
+                'baseline': baseline.value,
+                'current': self.current,
+                'config_key': self.config_key,
+            })
+            return trigger
+
+    def record(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def to_dict(self, max_events=None):
+        with self._lock:
+            events = list(self.events)
+            if max_events is not None:
+                events = events[-max_events:]
+            return {
+                'config_key': self.config_key,
+                'baseline': self._baseline.value,
+                'baseline_samples': self._baseline.samples,
+                'current': self.current,
+                'last_sample_at': self.last_sample_at,
+                'low_since': self.low_since,
+                'last_action_at': self.last_action_at,
+                'events': events,
+            }
+
+
+def _ewma(previous, value, dt, tau):
+    """Time-weighted moving average step (irregular sample spacing)"""
+    if dt <= 0:
+        return previous
+    alpha = 1 - math.exp(-dt / tau)
+    return previous + alpha * (value - previous)
@@ -0,0 +1,161 @@
+"""
+Mining Management API - Prometheus metrics
+Builds the /metrics text exposition in a background thread; scrapes only read the snapshot
+"""
+
+import threading
+import time
+
+import psutil
+
+import config
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+MINER_STATUSES = ['running', 'stopped', 'error', 'restarting', 'crashloop']
+
+
+def _escape_label(value):
+    """Escape label value per Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + '}'
+
+
+class MetricsCollector:
+    """Periodically renders miner metrics into a cached text snapshot"""
+
+    def __init__(self, manager, interval=None):
+        self.manager = manager
+        self.interval = interval or config.METRICS_REFRESH_INTERVAL
+        self._snapshot = None
+        self._snapshot_time = 0
+        self._lock = threading.Lock()
+        self._procs = {}  # pid -> psutil.Process (kept for cpu_percent deltas)
+        self._thread = None
+
+    def start(self):
+        """Start background refresh thread (idempotent)"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='metrics-refresh', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                with self._lock:
+                    self.refresh()
+            except Exception as e:
+                self.manager.log_info(f"[METRICS] Lỗi khi cập nhật metrics: {e}")
+            time.sleep(self.interval)
+
+    def get(self):
+        """Return the latest snapshot (builds one if none exists yet)
+
+        Starts the refresh thread on first use, so the snapshot keeps updating
+        when the app is served by a WSGI server instead of __main__.
+        """
+        self.start()
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self.refresh()
+                snapshot = self._snapshot
+        return snapshot
+
+    def _process_usage(self, pid):
+        """Sum CPU percent and RSS over the miner process tree"""
+        cpu = 0.0
+        rss = 0
+        try:
+            root = self._procs.get(pid)
+            if root is None or not root.is_running():
+                root = psutil.Process(pid)
+                self._procs[pid] = root
+            tree = [root]
+            try:
+                tree += root.children(recursive=True)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            for proc in tree:
+                cached = self._procs.setdefault(proc.pid, proc)
+                try:
+                    cpu += cached.cpu_percent(interval=None)
+                    rss += cached.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+        return cpu, rss
+
+    def refresh(self):
+        """Rebuild the exposition text from current miner state"""
+        now = time.time()
+        rows = []
+        for name, miner in list(self.manager.miners.items()):
+            status = miner.get('status', 'stopped')
+            pid = miner.get('pid')
+            cpu, rss = 0.0, 0
+            if status == 'running' and pid:
+                cpu, rss = self._process_usage(pid)
+            start_time = miner.get('start_time')
+            shares = self.manager.share_stats.get(name)
+            rows.append({
+                'labels': {
+                    'miner': name,
+                    'coin_name': miner.get('coin_name', ''),
+                    'mining_tool': miner.get('mining_tool', ''),
+                },
+                'status': status,
+                'hash_rate': (miner.get('hash_rate') or 0) * 1_000_000,  # MH/s -> H/s
+                'uptime': now - start_time if status == 'running' and start_time else 0,
+                'restarts': miner.get('restart_count', 0),
+                'accepted': shares.accepted if shares else 0,
+                'rejected': shares.rejected if shares else 0,
+                'cpu': cpu,
+                'rss': rss,
+            })
+
+        # Forget processes that are gone
+        for pid in list(self._procs):
+            if not self._procs[pid].is_running():
+                del self._procs[pid]
+
+        metrics = [
+            ('mining_miner_hash_rate_hashes_per_second', 'gauge', 'Current hash rate in H/s', 'hash_rate'),
+            ('mining_miner_uptime_seconds', 'gauge', 'Seconds since the miner was started', 'uptime'),
+            ('mining_miner_restarts_total', 'counter', 'Number of times the miner was restarted', 'restarts'),
+            ('mining_miner_shares_accepted_total', 'counter', 'Accepted shares reported by the miner', 'accepted'),
+            ('mining_miner_shares_rejected_total', 'counter', 'Rejected shares reported by the miner', 'rejected'),
+            ('mining_miner_cpu_percent', 'gauge', 'CPU usage of the miner process tree (100 = one core)', 'cpu'),
+            ('mining_miner_memory_rss_bytes', 'gauge', 'Resident memory of the miner process tree', 'rss'),
+        ]
+
+        lines = []
+        for metric, metric_type, help_text, key in metrics:
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} {metric_type}')
+            for row in rows:
+                lines.append(f"{metric}{_labels(**row['labels'])} {row[key]}")
+
+        lines.append('# HELP mining_miner_status Miner status (1 for the current status)')
+        lines.append('# TYPE mining_miner_status gauge')
+        for row in rows:
+            statuses = MINER_STATUSES if row['status'] in MINER_STATUSES else MINER_STATUSES + [row['status']]
+            for status in statuses:
+                value = 1 if row['status'] == status else 0
+                lines.append(f"mining_miner_status{_labels(**row['labels'], status=status)} {value}")
+
+        lines.append('# HELP mining_metrics_snapshot_timestamp_seconds When this snapshot was built')
+        lines.append('# TYPE mining_metrics_snapshot_timestamp_seconds gauge')
+        lines.append(f'mining_metrics_snapshot_timestamp_seconds {now}')
+
+        self._snapshot = ('\n'.join(lines) + '\n').encode('utf-8')
+        self._snapshot_time = now
+        return self._snapshot
@@ -0,0 +1,155 @@
+"""
+Mining Management API - Miner event fan-out
+One hub per miner; a single producer thread serializes new output and state
+events once and hands them to every SSE subscriber's bounded queue
+"""
+
+import json
+import queue
+import threading
+from collections import deque
+
+# State events (status / hash rate changes) kept for late or slow subscribers
+MAX_STATE_EVENTS = 256
+# Max output lines serialized per producer wakeup (and per catch-up read)
+MAX_LINES_PER_BATCH = 500
+# Batches queued per subscriber; a subscriber this far behind is disconnected
+# (the client reconnects with Last-Event-ID and resumes from the OutputRing)
+MAX_QUEUED_BATCHES = 256
+
+
+class _Subscriber:
+    def __init__(self, start_seq):
+        self.start_seq = start_seq  # Producer's line cursor when it joined
+        self.queue = queue.Queue(maxsize=MAX_QUEUED_BATCHES)
+        self.overflowed = False
+
+
+class MinerEventHub:
+    """Fan-out point for one miner
+
+    Output lines are not copied here: the producer reads them from the
+    miner's OutputRing with one shared cursor, formats each batch as SSE text
+    once and puts the same string on every subscriber queue. The producer
+    thread runs only while there are subscribers. Subscribers resuming from
+    an older seq replay the gap from the ring themselves before reading
+    their queue.
+    """
+
+    def __init__(self, output_ring):
+        self.output_ring = output_ring
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=MAX_STATE_EVENTS)  # (event_seq, type, data)
+        self._event_seq = 0
+        self._subscribers = set()
+        self._producer = None
+        self._line_cursor = 0  # Last output seq handed to subscribers
+        self._event_cursor = 0  # Last event seq handed to subscribers
+
+    @property
+    def event_seq(self):
+        return self._event_seq
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def notify(self):
+        """Wake the producer after new output was appended to the ring"""
+        if self._subscribers:
+            with self._cond:
+                self._cond.notify_all()
+
+    def publish(self, event_type, data):
+        """Record a state event (status, hash_rate) and wake the producer"""
+        with self._cond:
+            self._event_seq += 1
+            self._events.append((self._event_seq, event_type, data))
+            self._cond.notify_all()
+
+    def events_since(self, since):
+        with self._cond:
+            return [event for event in self._events if event[0] > since]
+
+    def subscribe(self):
+        """Register a subscriber; it receives everything after the current cursors"""
+        with self._cond:
+            if self._producer is None:
+                self._line_cursor = self.output_ring.last_seq
+                self._event_cursor = self._event_seq
+                self._producer = threading.Thread(target=self._run, name='sse-producer', daemon=True)
+                self._producer.start()
+            subscriber = _Subscriber(self._line_cursor)
+            self._subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._cond:
+            self._subscribers.discard(subscriber)
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: not self._subscribers
+                                    or self.output_ring.last_seq > self._line_cursor
+                                    or self._event_seq > self._event_cursor)
+                if not self._subscribers:
+                    self._producer = None
+                    return
+
+                entries, _, _ = self.output_ring.read_since(self._line_cursor, MAX_LINES_PER_BATCH)
+                events = [event for event in self._events if event[0] > self._event_cursor]
+                if entries:
+                    self._line_cursor = entries[-1][0]
+                if events:
+                    self._event_cursor = events[-1][0]
+                batch = _output_batch(entries) + ''.join(_sse(event_type, data) for _, event_type, data in events)
+                if not batch:
+                    continue
+
+                for subscriber in list(self._subscribers):
+                    try:
+                        subscriber.queue.put_nowait(batch)
+                    except queue.Full:
+                        subscriber.overflowed = True
+                        self._subscribers.discard(subscriber)
+
+    def stream(self, line_cursor, keepalive, initial_state=None):
+        """Generator of Server-Sent Events text for one subscriber"""
+        subscriber = self.subscribe()
+        try:
+            if initial_state is not None:
+                yield _sse('status', initial_state)
+
+            # Lines between the requested cursor and the point we joined the live feed
+            while line_cursor < subscriber.start_seq:
+                entries, _, _ = self.output_ring.read_since(line_cursor, MAX_LINES_PER_BATCH)
+                entries = [entry for entry in entries if entry[0] <= subscriber.start_seq]
+                if not entries:
+                    break
+                yield _output_batch(entries)
+                line_cursor = entries[-1][0]
+
+            while True:
+                try:
+                    yield subscriber.queue.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                if subscriber.overflowed and subscriber.queue.empty():
+                    return  # Too slow: dropped from the feed, the client resumes by seq
+        finally:
+            self.unsubscribe(subscriber)
+
+
+def _output_batch(entries):
+    return ''.join(_sse('output', {'seq': seq, 'line': line}, event_id=seq) for seq, line in entries)
+
+
+def _sse(event_type, data, event_id=None):
+    message = ''
+    if event_id is not None:
+        message += f'id: {event_id}\n'
+    message += f'event: {event_type}\n'
+    message += f'data: {json.dumps(data, ensure_ascii=False)}\n\n'
+    return message
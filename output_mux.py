@@ -0,0 +1,214 @@
+"""
+Mining Management API - Output multiplexer
+One selector-based I/O thread drains stdout of every miner
+"""
+
+import os
+import selectors
+import threading
+import time
+
+# Max bytes read per os.read() call
+READ_CHUNK_SIZE = 65536
+# Max chunks drained from one pipe per loop iteration (fairness between miners)
+MAX_CHUNKS_PER_WAKEUP = 4
+# Partial lines longer than this are flushed as-is (protects against output without newlines)
+MAX_LINE_LENGTH = 65536
+
+try:
+    import fcntl
+    F_GETPIPE_SZ = getattr(fcntl, 'F_GETPIPE_SZ', 1032)
+except ImportError:  # Windows
+    fcntl = None
+    F_GETPIPE_SZ = None
+
+
+def _pipe_capacity(fd):
+    """Kernel pipe buffer size (Linux), 64 KiB default elsewhere"""
+    if fcntl is not None:
+        try:
+            return fcntl.fcntl(fd, F_GETPIPE_SZ)
+        except OSError:
+            pass
+    return 65536
+
+
+class _Stream:
+    """Per-miner pipe state: line buffer and counters"""
+
+    def __init__(self, name, fileobj, on_line, on_eof, on_stall):
+        self.name = name
+        self.fileobj = fileobj
+        self.fd = fileobj.fileno()
+        self.on_line = on_line
+        self.on_eof = on_eof
+        self.on_stall = on_stall
+        self.buffer = bytearray()
+        self.capacity = _pipe_capacity(self.fd)
+        self.bytes_read = 0
+        self.lines = 0
+        self.stalls = 0
+        self.last_stall = None
+
+
+class OutputMultiplexer:
+    """Drains many miner pipes from a single thread using selectors (epoll on Linux)
+
+    register() can be called from any thread; callbacks run on the I/O thread
+    and must not block.
+    """
+
+    supported = os.name == 'posix'
+
+    def __init__(self, log=print):
+        self.log = log
+        self._selector = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._streams = {}  # fd -> _Stream
+        self._wake_r = None
+        self._wake_w = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._selector = selectors.DefaultSelector()
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+            os.set_blocking(self._wake_w, False)
+            self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+            self._thread = threading.Thread(target=self._run, name='output-mux', daemon=True)
+            self._thread.start()
+
+    def register(self, name, fileobj, on_line, on_eof=None, on_stall=None):
+        """Start draining fileobj; on_line(str) per line, on_eof() once the pipe closes"""
+        self._ensure_started()
+        os.set_blocking(fileobj.fileno(), False)
+        stream = _Stream(name, fileobj, on_line, on_eof, on_stall)
+        with self._lock:
+            self._pending.append(stream)
+        self._wake()
+        return stream
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Wakeup already pending
+
+    def stats(self):
+        """Per-stream counters for diagnostics"""
+        return [{
+            'name': s.name,
+            'fd': s.fd,
+            'bytes_read': s.bytes_read,
+            'lines': s.lines,
+            'pipe_capacity': s.capacity,
+            'stalls': s.stalls,
+            'last_stall': s.last_stall,
+        } for s in list(self._streams.values())]
+
+    def _run(self):
+        while True:
+            try:
+                events = self._selector.select(timeout=1.0)
+            except Exception as e:
+                self.log(f"[OUTPUT-MUX] Lỗi select: {e}")
+                time.sleep(0.1)
+                continue
+
+            for key, _ in events:
+                if key.data is None:
+                    self._accept_pending()
+                else:
+                    self._drain(key.data)
+
+    def _accept_pending(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for stream in pending:
+            try:
+                self._selector.register(stream.fd, selectors.EVENT_READ, stream)
+                self._streams[stream.fd] = stream
+            except Exception as e:
+                self.log(f"[OUTPUT-MUX] Không thể đăng ký {stream.name}: {e}")
+                self._close(stream)
+
+    def _drain(self, stream):
+        total = 0
+        eof = False
+        for _ in range(MAX_CHUNKS_PER_WAKEUP):
+            try:
+                chunk = os.read(stream.fd, READ_CHUNK_SIZE)
+            except BlockingIOError:
+                break
+            except OSError:
+                eof = True
+                break
+            if not chunk:
+                eof = True
+                break
+            total += len(chunk)
+            stream.buffer += chunk
+            if len(chunk) < READ_CHUNK_SIZE:
+                break
+
+        stream.bytes_read += total
+
+        # A wakeup that finds the pipe full means the miner was (or is about to be)
+        # blocked in write() waiting for us
+        if total >= stream.capacity:
+            stream.stalls += 1
+            stream.last_stall = time.time()
+            if stream.on_stall:
+                self._call(stream, stream.on_stall, total)
+
+        self._emit_lines(stream, flush=eof)
+
+        if eof:
+            self._close(stream)
+            if stream.on_eof:
+                self._call(stream, stream.on_eof)
+
+    def _emit_lines(self, stream, flush=False):
+        buffer = stream.buffer
+        start = 0
+        while True:
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                break
+            self._emit(stream, bytes(buffer[start:end + 1]))
+            start = end + 1
+        if start:
+            del buffer[:start]
+        if buffer and (flush or len(buffer) > MAX_LINE_LENGTH):
+            self._emit(stream, bytes(buffer))
+            buffer.clear()
+
+    def _emit(self, stream, raw):
+        stream.lines += 1
+        self._call(stream, stream.on_line, raw.decode('utf-8', errors='replace'))
+
+    def _call(self, stream, callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            self.log(f"[OUTPUT-MUX] Lỗi callback cho {stream.name}: {e}")
+
+    def _close(self, stream):
+        try:
+            self._selector.unregister(stream.fd)
+        except (KeyError, ValueError):
+            pass
+        self._streams.pop(stream.fd, None)
+        try:
+            stream.fileobj.close()
+        except Exception:
+            pass
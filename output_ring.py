@@ -0,0 +1,83 @@
+"""
+Mining Management API - Output ring buffer
+Line-oriented, byte-budgeted buffer of recent miner output with sequence numbers
+"""
+
+import threading
+from collections import deque
+from itertools import islice
+
+
+class OutputRing:
+    """Keeps the most recent output lines within a byte budget
+
+    Every line gets a monotonically increasing sequence number (starting at 1),
+    so pollers can ask for "lines after seq N" instead of re-reading everything.
+    Size is counted in characters of the decoded line (= bytes for ASCII output).
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max(1, int(max_bytes))
+        self._lines = deque()  # (seq, line)
+        self._bytes = 0
+        self._last_seq = 0
+        self._lock = threading.Lock()
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    @property
+    def first_seq(self):
+        """Sequence number of the oldest retained line (last_seq + 1 when empty)"""
+        with self._lock:
+            return self._lines[0][0] if self._lines else self._last_seq + 1
+
+    def append(self, line):
+        """Add one line, evicting the oldest lines when over budget. Returns its seq."""
+        size = len(line)
+        with self._lock:
+            self._last_seq += 1
+            self._lines.append((self._last_seq, line))
+            self._bytes += size
+            # Always keep at least the newest line, even if it alone exceeds the budget
+            while self._bytes > self.max_bytes and len(self._lines) > 1:
+                _, old = self._lines.popleft()
+                self._bytes -= len(old)
+            return self._last_seq
+
+    def read_since(self, since=0, limit=None):
+        """Return (entries, first_seq, last_seq) for lines with seq > since
+
+        Only the requested tail of the buffer is walked. If `since` is older than
+        the oldest retained line, everything retained is returned (caller can
+        detect the gap by comparing since + 1 with first_seq).
+        """
+        with self._lock:
+            last_seq = self._last_seq
+            first_seq = self._lines[0][0] if self._lines else last_seq + 1
+            available = min(max(0, last_seq - max(0, since)), len(self._lines))
+            skip = 0
+            if limit is not None:
+                skip = available - min(available, max(0, int(limit)))
+            # Walk from the newest end; with a limit, return the oldest `limit` new lines
+            entries = list(islice(reversed(self._lines), skip, available))
+        entries.reverse()
+        return entries, first_seq, last_seq
+
+    def text(self):
+        """Whole retained output as one string"""
+        with self._lock:
+            return ''.join(line for _, line in self._lines)
+
+    def tail_text(self, max_chars):
+        """Last max_chars characters of retained output"""
+        with self._lock:
+            parts = []
+            total = 0
+            for _, line in reversed(self._lines):
+                parts.append(line)
+                total += len(line)
+                if total >= max_chars:
+                    break
+        return ''.join(reversed(parts))[-max_chars:]
@@ -0,0 +1,144 @@
+"""
+Mining Management API - Owned process registry
+Tracks the miner processes this manager started, so kill-all never has to guess by name
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+import psutil
+
+from config_store import ConfigStore
+
+# Environment markers set on every miner we spawn (inherited by its children)
+ENV_OWNER = 'MINING_MANAGER_OWNER'
+ENV_MINER = 'MINING_MANAGER_MINER'
+
+
+def default_owner_tag():
+    """Stable tag for this installation (same working directory = same tag across restarts)"""
+    return hashlib.sha1(os.path.abspath(os.getcwd()).encode('utf-8')).hexdigest()[:12]
+
+
+class OwnedProcessRegistry:
+    """PIDs (and process groups) of miners started by this manager
+
+    Entries are persisted (atomically, in the background) so a restarted
+    manager can find processes left over by the previous instance. A
+    persisted entry is only trusted if the PID still has the same create
+    time and, where readable, carries our ENV_OWNER marker - a recycled PID
+    is never mistaken for one of ours.
+    """
+
+    def __init__(self, path, tag=None, log=print):
+        self.tag = tag or default_owner_tag()
+        self.log = log
+        self._store = ConfigStore(path, debounce=0.2, max_delay=1.0, log=log)
+        self._entries = {}  # pid -> {'name', 'pid', 'pgid', 'create_time', 'started_at', 'previous_run'}
+        self._lock = threading.Lock()
+
+    def env(self, name):
+        """Environment for a new miner process: ours plus the ownership markers"""
+        env = dict(os.environ)
+        env[ENV_OWNER] = self.tag
+        env[ENV_MINER] = name
+        return env
+
+    def add(self, name, process, pgid=None):
+        try:
+            create_time = psutil.Process(process.pid).create_time()
+        except psutil.Error:
+            create_time = None
+        with self._lock:
+            self._entries[process.pid] = {
+                'name': name,
+                'pid': process.pid,
+                'pgid': pgid,
+                'create_time': create_time,
+                'started_at': time.time(),
+                'previous_run': False,
+            }
+        self._save()
+
+    def remove(self, pid):
+        with self._lock:
+            removed = self._entries.pop(pid, None)
+        if removed:
+            self._save()
+
+    def entries(self):
+        """Entries whose process is still alive (dead ones are dropped)"""
+        with self._lock:
+            entries = list(self._entries.values())
+        live = [entry for entry in entries if self._is_ours(entry)]
+        if len(live) != len(entries):
+            live_pids = {entry['pid'] for entry in live}
+            with self._lock:
+                for entry in entries:
+                    if entry['pid'] not in live_pids:
+                        self._entries.pop(entry['pid'], None)
+            self._save()
+        return live
+
+    def load(self):
+        """Re-attach entries persisted by a previous manager instance; returns the live ones"""
+        data, _ = self._store.load()
+        found = []
+        for entry in (data or {}).get('processes', []):
+            entry = dict(entry, previous_run=True)
+            if self._is_ours(entry):
+                found.append(entry)
+        with self._lock:
+            for entry in found:
+                self._entries.setdefault(entry['pid'], entry)
+        self._save()
+        return found
+
+    def scan(self):
+        """Opt-in host-wide scan for processes carrying our ENV_OWNER marker (slow on busy hosts)"""
+        found = []
+        for proc in psutil.process_iter(['pid', 'environ', 'create_time']):
+            try:
+                environ = proc.info.get('environ') or {}
+                if environ.get(ENV_OWNER) != self.tag:
+                    continue
+                found.append({
+                    'name': environ.get(ENV_MINER, ''),
+                    'pid': proc.info['pid'],
+                    'pgid': None,
+                    'create_time': proc.info['create_time'],
+                    'started_at': proc.info['create_time'],
+                    'previous_run': proc.info['pid'] not in self._entries,
+                })
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        return found
+
+    def flush(self):
+        return self._store.flush()
+
+    def _is_ours(self, entry):
+        try:
+            proc = psutil.Process(entry['pid'])
+            if entry.get('create_time') is not None and abs(proc.create_time() - entry['create_time']) > 0.01:
+                return False  # PID recycled
+            if proc.status() == psutil.STATUS_ZOMBIE:
+                return False
+            try:
+                return proc.environ().get(ENV_OWNER) == self.tag
+            except (psutil.AccessDenied, OSError):
+                return entry.get('create_time') is not None
+        except psutil.NoSuchProcess:
+            return False
+        except psutil.AccessDenied:
+            return True
+
+    def _save(self):
+        self._store.schedule(self._snapshot)
+
+    def _snapshot(self):
+        with self._lock:
+            processes = [dict(entry, previous_run=False) for entry in self._entries.values()]
+        return {'owner': self.tag, 'processes': processes}
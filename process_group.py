@@ -0,0 +1,39 @@
+"""
+Mining Management API - Process groups
+Each miner runs in its own session, so its whole process tree is signalled with one killpg()
+"""
+
+import os
+import signal
+import subprocess
+
+SIGKILL = getattr(signal, 'SIGKILL', signal.SIGTERM)  # Windows has no SIGKILL
+
+
+def popen_group_kwargs():
+    """Popen arguments that put the child in a new session / process group"""
+    if os.name == 'posix':
+        return {'start_new_session': True}
+    return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+
+
+def stop_stages(sigint_count, sigint_wait, sigterm_wait, kill_wait=3):
+    """Escalation plan [(signal, max_wait)]: SIGINT (repeated for tools that ask y/n), SIGTERM, SIGKILL"""
+    stages = []
+    if sigint_count > 0:
+        stages.append((signal.SIGINT, sigint_wait))
+        stages.extend([(signal.SIGINT, 1)] * (sigint_count - 1))
+    stages.append((signal.SIGTERM, sigterm_wait))
+    stages.append((SIGKILL, kill_wait))
+    return stages
+
+
+def group_alive(pgid):
+    """True while any process of the group exists"""
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
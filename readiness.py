@@ -0,0 +1,56 @@
+"""
+Mining Management API - Startup readiness probes
+Decides from miner output when a freshly launched miner is actually up
+"""
+
+
+class ReadinessProbe:
+    """Output tokens that mean a miner has reached its pool, per mining tool
+
+    Matching is a case-insensitive substring test. A parsed hash rate always
+    counts as ready, whatever the tool (handled by the caller).
+    """
+
+    def __init__(self, tool, signals):
+        self.tool = tool
+        self.signals = tuple((name, token.lower()) for name, token in signals)
+
+    def check(self, line):
+        """Return the name of the readiness signal found in line, or None"""
+        line_lower = line.lower()
+        for name, token in self.signals:
+            if token in line_lower:
+                return name
+        return None
+
+
+PROBES = {
+    # "Stratum difficulty set to 2000", "ap.luckpool.net:3956 verus block 3012345, diff ..."
+    'ccminer': ReadinessProbe('ccminer', [
+        ('difficulty', 'difficulty set'),
+        ('new_job', ' block '),
+        ('connected', 'connected to'),
+    ]),
+
+    # "net use pool pool.example.com:3333 ...", "net new job from pool.example.com:3333 diff 120000"
+    'xmrig': ReadinessProbe('xmrig', [
+        ('connected', 'use pool'),
+        ('new_job', 'new job'),
+    ]),
+
+    # "Connected to dero.rabidmining.com:10300", "New job received height 6076870 diff 20000"
+    'astrominer': ReadinessProbe('astrominer', [
+        ('connected', 'connected to'),
+        ('new_job', 'new job'),
+    ]),
+}
+
+GENERIC_PROBE = ReadinessProbe('generic', [
+    ('connected', 'connected to'),
+    ('new_job', 'new job'),
+])
+
+
+def get_probe(mining_tool):
+    """Get readiness probe for a mining tool (falls back to generic)"""
+    return PROBES.get((mining_tool or '').lower(), GENERIC_PROBE)
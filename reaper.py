@@ -0,0 +1,150 @@
+"""
+Mining Management API - Child process reaper
+Reports miner exits as they happen (pidfd on Linux, blocking waitpid elsewhere)
+"""
+
+import os
+import selectors
+import signal
+import threading
+import time
+
+
+def describe_exit(return_code):
+    """Human readable exit reason for a Popen return code"""
+    if return_code is None:
+        return 'unknown'
+    if return_code < 0:
+        try:
+            return f'killed by {signal.Signals(-return_code).name}'
+        except ValueError:
+            return f'killed by signal {-return_code}'
+    if return_code == 0:
+        return 'exited normally'
+    return f'exit code {return_code}'
+
+
+class _Watch:
+    """One watched child: Popen object and exit callback"""
+
+    def __init__(self, process, on_exit):
+        self.process = process
+        self.on_exit = on_exit
+        self.pidfd = None
+
+
+class ProcessReaper:
+    """Waits for miner processes to exit and calls on_exit(return_code, exit_time)
+
+    On Linux every child gets a pidfd and one thread waits on all of them with
+    a selector; the pidfd becomes readable the moment the process terminates and
+    Popen.wait() then reaps it. Where pidfd_open is missing (Windows, macOS,
+    kernels < 5.3) each child gets a daemon thread blocked in Popen.wait().
+    Either way the callback runs once per process, right after it exits.
+    """
+
+    def __init__(self, log=print):
+        self.log = log
+        self.supported = hasattr(os, 'pidfd_open')
+        self._selector = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._watches = {}  # pidfd -> _Watch
+        self._wake_r = None
+        self._wake_w = None
+
+    def watch(self, process, on_exit):
+        """Call on_exit(return_code, exit_time) once process has exited"""
+        watch = _Watch(process, on_exit)
+        if self.supported:
+            try:
+                watch.pidfd = os.pidfd_open(process.pid)
+            except OSError as e:
+                if process.poll() is not None:
+                    # Already exited (and possibly reaped) before we could open it
+                    self._finish(watch)
+                    return
+                self.log(f"[REAPER] pidfd_open lỗi cho PID {process.pid}: {e}, dùng thread chờ")
+        if watch.pidfd is None:
+            thread = threading.Thread(target=self._wait_blocking, args=(watch,), name=f'reaper-{process.pid}', daemon=True)
+            thread.start()
+            return
+
+        self._ensure_started()
+        with self._lock:
+            self._pending.append(watch)
+        self._wake()
+
+    def watched(self):
+        """Number of processes currently watched via pidfd"""
+        return len(self._watches) + len(self._pending)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._selector = selectors.DefaultSelector()
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+            os.set_blocking(self._wake_w, False)
+            self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+            self._thread = threading.Thread(target=self._run, name='reaper', daemon=True)
+            self._thread.start()
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Wakeup already pending
+
+    def _run(self):
+        while True:
+            try:
+                events = self._selector.select(timeout=None)
+            except Exception as e:
+                self.log(f"[REAPER] Lỗi select: {e}")
+                time.sleep(0.1)
+                continue
+
+            for key, _ in events:
+                if key.data is None:
+                    self._accept_pending()
+                else:
+                    self._reap(key.data)
+
+    def _accept_pending(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for watch in pending:
+            self._watches[watch.pidfd] = watch
+            self._selector.register(watch.pidfd, selectors.EVENT_READ, watch)
+
+    def _reap(self, watch):
+        try:
+            self._selector.unregister(watch.pidfd)
+        except (KeyError, ValueError):
+            pass
+        self._watches.pop(watch.pidfd, None)
+        os.close(watch.pidfd)
+        self._finish(watch)
+
+    def _wait_blocking(self, watch):
+        self._finish(watch)
+
+    def _finish(self, watch):
+        try:
+            # Process is already dead on the pidfd path, so this only collects the status
+            return_code = watch.process.wait()
+        except Exception as e:
+            self.log(f"[REAPER] Không thể lấy mã thoát PID {watch.process.pid}: {e}")
+            return_code = watch.process.returncode
+        try:
+            watch.on_exit(return_code, time.time())
+        except Exception as e:
+            self.log(f"[REAPER] Lỗi callback cho PID {watch.process.pid}: {e}")
@@ -0,0 +1,291 @@
+"""
+Mining Management API - Per-miner resource governance
+nice / ionice priority and cgroup v2 cpu.max / memory.max limits
+"""
+
+import os
+import re
+import shutil
+import sys
+
+import psutil
+
+CPU_PERIOD = 100000  # cpu.max period used when a quota is given in cores (microseconds)
+
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+_IONICE_CLASSES = ('idle', 'best-effort', 'realtime')
+
+
+def parse_resources(value):
+    """Validate a miner "resources" object -> normalized dict (raises ValueError)
+
+    {"nice": 10, "ionice": "idle" | "best-effort[:0-7]", "cpu_max": 1.5 (cores)
+    or "150000 100000", "memory_max": "2G" | bytes | "max"}
+    """
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise ValueError('resources phải là object')
+    unknown = set(value) - {'nice', 'ionice', 'cpu_max', 'memory_max'}
+    if unknown:
+        raise ValueError(f'Trường không hỗ trợ: {sorted(unknown)}')
+
+    resources = {}
+    if value.get('nice') is not None:
+        nice = value['nice']
+        if isinstance(nice, bool) or not isinstance(nice, int) or not -20 <= nice <= 19:
+            raise ValueError(f'nice phải là số nguyên -20..19: {nice!r}')
+        resources['nice'] = nice
+    if value.get('ionice') is not None:
+        resources['ionice'] = _parse_ionice(value['ionice'])
+    if value.get('cpu_max') is not None:
+        resources['cpu_max'] = _parse_cpu_max(value['cpu_max'])
+    if value.get('memory_max') is not None:
+        resources['memory_max'] = _parse_memory_max(value['memory_max'])
+    return resources
+
+
+def _parse_ionice(value):
+    ioclass, _, level = str(value).partition(':')
+    if ioclass not in _IONICE_CLASSES:
+        raise ValueError(f'ionice phải là một trong {_IONICE_CLASSES}: {value!r}')
+    if level and (not level.isdigit() or int(level) > 7):
+        raise ValueError(f'Mức ionice phải là 0..7: {value!r}')
+    return f'{ioclass}:{level}' if level else ioclass
+
+
+def _parse_cpu_max(value):
+    """Cores (1.5) -> '150000 100000'; '<quota|max> [period]' is passed through"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if value <= 0:
+            raise ValueError(f'cpu_max phải > 0: {value!r}')
+        return f'{max(1000, int(value * CPU_PERIOD))} {CPU_PERIOD}'
+    if isinstance(value, str) and re.fullmatch(r'(max|\d+)( \d+)?', value.strip()):
+        return value.strip()
+    raise ValueError(f'cpu_max không hợp lệ: {value!r}')
+
+
+def _parse_memory_max(value):
+    """'2G' / '512M' / bytes -> bytes string for memory.max ('max' = unlimited)"""
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return str(value)
+    if str(value).strip() == 'max':
+        return 'max'
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([KMGT]?)B?', str(value).strip(), re.IGNORECASE)
+    if not match:
+        raise ValueError(f'memory_max không hợp lệ: {value!r}')
+    return str(int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()]))
+
+
+def _tasks(proc):
+    """Thread IDs of a process on Linux (priority is per thread there), else the process itself"""
+    if sys.platform.startswith('linux'):
+        return [thread.id for thread in proc.threads()]
+    return [proc.pid]
+
+
+def apply_priority(pid, nice=None, ionice=None):
+    """Set nice / ionice on every thread of a process and its descendants; returns tasks changed"""
+    if nice is None and ionice is None:
+        return 0
+    root = psutil.Process(pid)
+    changed = 0
+    for proc in [root] + root.children(recursive=True):
+        try:
+            for tid in _tasks(proc):
+                task = proc if tid == proc.pid else psutil.Process(tid)
+                if nice is not None:
+                    _set_nice(task, nice)
+                if ionice is not None:
+                    _set_ionice(task, ionice)
+                changed += 1
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            pass
+    return changed
+
+
+def _set_nice(proc, nice):
+    if os.name == 'nt':
+        # Windows has priority classes instead of nice values
+        if nice >= 10:
+            proc.nice(psutil.IDLE_PRIORITY_CLASS)
+        elif nice > 0:
+            proc.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            proc.nice(psutil.NORMAL_PRIORITY_CLASS)
+    elif sys.platform.startswith('linux'):
+        os.setpriority(os.PRIO_PROCESS, proc.pid, nice)
+    else:
+        proc.nice(nice)
+
+
+def _set_ionice(proc, ionice):
+    if not hasattr(proc, 'ionice'):
+        return  # macOS / BSD
+    ioclass, _, level = ionice.partition(':')
+    if os.name == 'nt':
+        proc.ionice(psutil.IOPRIO_VERYLOW if ioclass == 'idle' else psutil.IOPRIO_LOW)
+    elif ioclass == 'idle':
+        proc.ionice(psutil.IOPRIO_CLASS_IDLE)
+    elif ioclass == 'realtime':
+        proc.ionice(psutil.IOPRIO_CLASS_RT, int(level or 4))
+    else:
+        proc.ionice(psutil.IOPRIO_CLASS_BE, int(level or 4))
+
+
+def _is_cgroupfs(path):
+    """True if path lives on a mounted cgroup2 filesystem (False for a plain directory)"""
+    path = os.path.abspath(path)
+    best = None
+    try:
+        with open('/proc/self/mounts', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mountpoint = fields[1]
+                if path == mountpoint or path.startswith(mountpoint.rstrip('/') + '/'):
+                    if best is None or len(mountpoint) > len(best[0]):
+                        best = (mountpoint, fields[2])
+    except OSError:
+        return False
+    return best is not None and best[1] == 'cgroup2'
+
+
+class CgroupManager:
+    """One cgroup v2 child per miner process under a root the manager owns
+
+    <root>/<miner>.<pid> gets cpu.max / memory.max and the miner's PIDs; it
+    is removed when the process exits. root may also be a plain directory (a
+    fake cgroupfs for tests): the same files are written and read, and
+    cleanup removes the directory tree instead of rmdir'ing a cgroup.
+    """
+
+    def __init__(self, root, enabled=True, log=print):
+        self.root = root
+        self.enabled = enabled
+        self.log = log
+        self.real = enabled and _is_cgroupfs(root)
+        self.ready = False
+        self.last_error = None
+
+    def setup(self):
+        """Create the root and delegate cpu/memory to its children; False if unusable"""
+        if not self.enabled:
+            return False
+        if self.ready:
+            return True
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            self._write(self.root, 'cgroup.subtree_control', '+cpu +memory')
+            self.ready = True
+        except OSError as e:
+            self.last_error = str(e)
+            self.log(f"[CGROUP] ❌ Không thể dùng cgroup root {self.root}: {e}")
+        return self.ready
+
+    def create(self, name, pid, cpu_max=None, memory_max=None):
+        """Create <root>/<name>.<pid>, apply limits, move the process tree in; returns the path
+        (raises OSError after removing the directory again if any step fails)"""
+        if not self.setup():
+            return None
+        path = os.path.join(self.root, f"{re.sub(r'[^A-Za-z0-9_-]', '_', name)}.{pid}")
+        os.makedirs(path, exist_ok=True)
+        try:
+            self._write(path, 'cpu.max', cpu_max or 'max')
+            self._write(path, 'memory.max', memory_max or 'max')
+            try:
+                proc = psutil.Process(pid)
+                pids = [pid] + [child.pid for child in proc.children(recursive=True)]
+            except psutil.NoSuchProcess:
+                pids = []
+            for member in pids:
+                try:
+                    self._write(path, 'cgroup.procs', str(member), append=True)
+                except ProcessLookupError:
+                    pass
+        except OSError:
+            self.remove(path)  # Don't leave a half-configured cgroup behind
+            raise
+        return path
+
+    def remove(self, path):
+        if not path:
+            return
+        try:
+            if self.real:
+                os.rmdir(path)  # Interface files vanish with the cgroup
+            else:
+                shutil.rmtree(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.log(f"[CGROUP] ⚠️ Không thể xóa {path}: {e}")
+
+    def cleanup_stale(self):
+        """Remove per-process cgroups left behind by a previous manager instance"""
+        if not self.enabled or not os.path.isdir(self.root):
+            return 0
+        removed = 0
+        for entry in os.listdir(self.root):
+            path = os.path.join(self.root, entry)
+            if os.path.isdir(path) and not self._members(path):
+                self.remove(path)
+                removed += 1
+        return removed
+
+    def stats(self, path):
+        """cpu.stat (usage and throttling) plus memory usage/limit events of a miner cgroup"""
+        if not path:
+            return None
+        cpu = _read_keyed(os.path.join(path, 'cpu.stat'))
+        periods = cpu.get('nr_periods', 0)
+        return {
+            'path': path,
+            'cpu_max': _read_text(os.path.join(path, 'cpu.max')),
+            'memory_max': _read_text(os.path.join(path, 'memory.max')),
+            'cpu_stat': cpu,
+            'throttled_ratio': round(cpu.get('nr_throttled', 0) / periods, 4) if periods else 0.0,
+            'memory_current': _read_int(os.path.join(path, 'memory.current')),
+            'memory_events': _read_keyed(os.path.join(path, 'memory.events')),
+        }
+
+    def _members(self, path):
+        text = _read_text(os.path.join(path, 'cgroup.procs')) or ''
+        return [int(pid) for pid in text.split() if pid.isdigit() and psutil.pid_exists(int(pid))]
+
+    def _write(self, path, filename, value, append=False):
+        with open(os.path.join(path, filename), 'a' if append and not self.real else 'w') as f:
+            f.write(value + ('\n' if append else ''))
+
+    def to_dict(self):
+        return {
+            'enabled': self.enabled,
+            'root': self.root,
+            'cgroupfs': self.real,
+            'ready': self.ready,
+            'last_error': self.last_error,
+        }
+
+
+def _read_text(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_int(path):
+    text = _read_text(path)
+    return int(text) if text and text.isdigit() else None
+
+
+def _read_keyed(path):
+    """'key value' lines (cpu.stat, memory.events) -> {key: int}"""
+    values = {}
+    for line in (_read_text(path) or '').splitlines():
+        key, _, value = line.partition(' ')
+        if value.strip().isdigit():
+            values[key] = int(value)
+    return values
@@ -0,0 +1,156 @@
+"""
+Mining Management API - Share accounting
+Parses accepted/rejected share counters from miner output
+"""
+
+import re
+import threading
+import time
+from collections import deque
+
+from hash_parsers import ANSI_ESCAPE
+
+
+class ShareParser:
+    """Precompiled share counter patterns for one mining tool
+
+    Each pattern yields named groups 'accepted' and/or 'rejected' (cumulative
+    counts as printed by the miner), 'total' (accepted + rejected) and 'reason'.
+    """
+
+    def __init__(self, tool, patterns, prefilter=()):
+        self.tool = tool
+        self.patterns = [re.compile(p, re.IGNORECASE) for p in patterns]
+        self.prefilter = tuple(prefilter)
+
+    def parse(self, line):
+        """Return dict of parsed fields or None"""
+        for token in self.prefilter:
+            if token in line:
+                break
+        else:
+            return None
+
+        if '\x1b' in line:
+            line = ANSI_ESCAPE.sub('', line)
+
+        for pattern in self.patterns:
+            match = pattern.search(line)
+            if match:
+                fields = {k: v for k, v in match.groupdict().items() if v is not None}
+                if 'total' in fields:
+                    fields['rejected'] = int(fields.pop('total')) - int(fields['accepted'])
+                for key in ('accepted', 'rejected'):
+                    if key in fields:
+                        fields[key] = int(fields[key])
+                if 'reason' in fields:
+                    fields['reason'] = fields['reason'].strip()
+                return fields
+        return None
+
+
+SHARE_PARSERS = {
+    # "accepted: 7/8 (diff 0.027), 2457.66 kH/s yes!" / "... booooo"
+    # "reject reason: Invalid nonce"
+    'ccminer': ShareParser('ccminer', [
+        r'accepted:\s*(?P<accepted>\d+)/(?P<total>\d+)',
+        r'reject reason:\s*(?P<reason>.+)',
+    ], prefilter=('accepted', 'reject')),
+
+    # "accepted (1/0) diff 120000 (41 ms)"
+    # "rejected (2/1) diff 120000 "Low difficulty share" (40 ms)"
+    'xmrig': ShareParser('xmrig', [
+        r'(?:accepted|rejected)\s*\((?P<accepted>\d+)/(?P<rejected>\d+)\)(?:\s*diff\s*\S+\s*"(?P<reason>[^"]*)")?',
+    ], prefilter=('accepted', 'rejected')),
+
+    # "Accepted 159 | Rejected 0 | Height 6076878 | ..."
+    'astrominer': ShareParser('astrominer', [
+        r'Accepted\s+(?P<accepted>\d+)\s*\|\s*Rejected\s+(?P<rejected>\d+)',
+    ], prefilter=('ccepted',)),
+}
+
+
+def get_share_parser(mining_tool):
+    """Get share parser for a mining tool (None if unsupported)"""
+    return SHARE_PARSERS.get((mining_tool or '').lower())
+
+
+class ShareStats:
+    """Per-miner share counters with a rolling acceptance window
+
+    Miners print cumulative counters that restart from zero with the
+    process, so totals here are accumulated from deltas and keep growing
+    across restarts.
+    """
+
+    def __init__(self, window_seconds):
+        self.window_seconds = window_seconds
+        self.accepted = 0
+        self.rejected = 0
+        self.stale = 0
+        self.reasons = {}
+        self._last_accepted = 0
+        self._last_rejected = 0
+        self._window = deque()  # (timestamp, accepted_delta, rejected_delta)
+        self._lock = threading.Lock()
+
+    def new_run(self):
+        """Reset per-process baselines (call when the miner is (re)started)"""
+        with self._lock:
+            self._last_accepted = 0
+            self._last_rejected = 0
+
+    def update(self, fields, now=None):
+        """Apply one parsed share line"""
+        now = now or time.time()
+        with self._lock:
+            accepted_delta = 0
+            rejected_delta = 0
+
+            if 'accepted' in fields:
+                value = fields['accepted']
+                accepted_delta = value - self._last_accepted if value >= self._last_accepted else value
+                self._last_accepted = value
+            if 'rejected' in fields:
+                value = fields['rejected']
+                rejected_delta = value - self._last_rejected if value >= self._last_rejected else value
+                self._last_rejected = value
+
+            reason = fields.get('reason')
+            if reason:
+                self.reasons[reason] = self.reasons.get(reason, 0) + 1
+                if 'stale' in reason.lower():
+                    self.stale += 1
+
+            self.accepted += accepted_delta
+            self.rejected += rejected_delta
+            if accepted_delta or rejected_delta:
+                self._window.append((now, accepted_delta, rejected_delta))
+            self._trim(now)
+
+    def _trim(self, now):
+        cutoff = now - self.window_seconds
+        while self._window and self._window[0][0] < cutoff:
+            self._window.popleft()
+
+    def acceptance_ratio(self, now=None):
+        """Accepted / (accepted + rejected) over the rolling window, None if no shares"""
+        with self._lock:
+            self._trim(now or time.time())
+            accepted = sum(item[1] for item in self._window)
+            rejected = sum(item[2] for item in self._window)
+        if accepted + rejected == 0:
+            return None
+        return accepted / (accepted + rejected)
+
+    def to_dict(self):
+        ratio = self.acceptance_ratio()
+        with self._lock:
+            return {
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'stale': self.stale,
+                'rejection_reasons': dict(self.reasons),
+                'acceptance_ratio': round(ratio, 4) if ratio is not None else None,
+                'window_seconds': self.window_seconds,
+            }
@@ -0,0 +1,142 @@
+"""
+Mining Management API - Status snapshot
+Versioned, pre-serialized /api/status payload with ETags and long-poll support
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+
+class StatusSnapshot:
+    """Status of all miners, rebuilt in the background instead of per request
+
+    A writer thread calls build() when invalidate() signals a state change
+    and at least every `interval` seconds (counters, hash rates). The result
+    is serialized once; the version only increases when the serialized
+    content actually changed, so it doubles as an ETag and as the cursor for
+    wait_for_change().
+
+    `volatile` lists key paths inside each miner status (e.g. ('resources',
+    'cgroup') with its cpu.stat counters) that tick on every rebuild. They
+    are left out of change detection; a change there alone is published at
+    most every `volatile_interval` seconds.
+    """
+
+    def __init__(self, build, interval=1.0, dumps=None, log=print, volatile=(), volatile_interval=30.0):
+        self.build = build
+        self.interval = interval
+        self.volatile = volatile
+        self.volatile_interval = volatile_interval
+        self.dumps = dumps or (lambda data: json.dumps(data, sort_keys=True))
+        self.log = log
+        self.version = 0
+        self.data = None
+        self.body = None
+        self.etag = None  # Unquoted entity tag of body
+        self.miners = {}  # name -> (status dict, etag)
+        self._content = None  # Serialized data without version and volatile fields, for change detection
+        self._full = None  # Serialized data without the version
+        self._published_at = 0.0
+        self._dirty = threading.Event()
+        self._cond = threading.Condition()
+        self._build_lock = threading.Lock()
+        self._thread = None
+
+    def invalidate(self):
+        """Something changed: rebuild as soon as possible"""
+        self._dirty.set()
+
+    def get(self):
+        """Current (version, etag, body, data); builds synchronously the first time"""
+        self._ensure_started()
+        if self.data is None:
+            self.refresh()
+        with self._cond:
+            return self.version, self.etag, self.body, self.data
+
+    def get_miner(self, name):
+        """(status dict, etag) of one miner from the current snapshot, or None"""
+        self.get()
+        return self.miners.get(name)
+
+    def wait_for_change(self, version, timeout):
+        """Block until the version differs from `version` (or timeout); returns get()"""
+        self.get()
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout)
+        return self.get()
+
+    def refresh(self):
+        """Rebuild now; returns True if the content changed"""
+        with self._build_lock:
+            data = self.build()
+            content = self.dumps(self._stable(data))
+            full = self.dumps(data) if self.volatile else content
+            now = time.monotonic()
+            with self._cond:
+                if content == self._content and (full == self._full or now - self._published_at < self.volatile_interval):
+                    return False
+                miners = {}
+                for status in data.get('miners', []):
+                    body = self.dumps(status)
+                    miners[status['name']] = (status, _digest(body))
+                self.version += 1
+                self.data = dict(data, version=self.version)
+                self.body = self.dumps(self.data)
+                # Content hash too: versions restart at 1 when the manager restarts
+                self.etag = f'{self.version}-{_digest(content)}'
+                self.miners = miners
+                self._content = content
+                self._full = full
+                self._published_at = now
+                self._cond.notify_all()
+            return True
+
+    def _stable(self, data):
+        """data without the volatile fields of each miner status"""
+        if not self.volatile:
+            return data
+        miners = []
+        for status in data.get('miners', []):
+            status = dict(status)
+            for path in self.volatile:
+                _drop(status, path)
+            miners.append(status)
+        return dict(data, miners=miners)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._build_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='status-snapshot', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            self._dirty.wait(self.interval)
+            self._dirty.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                self.log(f"[STATUS] Lỗi khi cập nhật snapshot: {e}")
+
+    def to_dict(self):
+        return {'version': self.version, 'interval': self.interval, 'miners': len(self.miners)}
+
+
+def _drop(status, path):
+    """Remove status[path[0]]...[path[-1]], copying the dicts on the way (status is a shallow copy)"""
+    parent = status
+    for key in path[:-1]:
+        child = parent.get(key)
+        if not isinstance(child, dict):
+            return
+        parent[key] = child = dict(child)
+        parent = child
+    parent.pop(path[-1], None)
+
+
+def _digest(body):
+    return hashlib.sha1(body.encode('utf-8')).hexdigest()[:16]
@@ -0,0 +1,105 @@
+"""
+Mining Management API - Crash-restart supervisor
+Per-miner restart policy: exponential backoff with jitter and crash-loop parking
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+
+class RestartPolicy:
+    """Decides if and when a miner that exited on its own gets restarted
+
+    Consecutive crashes double the delay (base, 2*base, 4*base ... capped at
+    max_delay) with +/- jitter so miners that died together don't come back in
+    lockstep. A run that lasted stable_seconds resets the backoff. max_failures
+    crashes inside window_seconds park the miner (crash loop) until it is
+    started manually or its config changes.
+    """
+
+    def __init__(self, base_delay, max_delay, jitter, max_failures, window_seconds, stable_seconds, rng=random.random):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.max_failures = max_failures
+        self.window_seconds = window_seconds
+        self.stable_seconds = stable_seconds
+        self.rng = rng
+        self.attempt = 0  # Consecutive crashes since the last stable run
+        self.crash_count = 0
+        self.parked = False
+        self.parked_at = None
+        self.last_exit_reason = None
+        self.next_restart_at = None
+        self._failures = deque()  # Crash timestamps inside the window
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def record_exit(self, reason, uptime, now=None):
+        """Register an unexpected exit; returns the restart delay, or None if parked"""
+        now = now or time.time()
+        with self._lock:
+            if uptime is not None and uptime >= self.stable_seconds:
+                self.attempt = 0
+            self.crash_count += 1
+            self.last_exit_reason = reason
+            self._failures.append(now)
+            while self._failures and self._failures[0] < now - self.window_seconds:
+                self._failures.popleft()
+
+            if len(self._failures) >= self.max_failures:
+                self.parked = True
+                self.parked_at = now
+                self.next_restart_at = None
+                return None
+
+            self.attempt += 1
+            delay = min(self.max_delay, self.base_delay * (2 ** (self.attempt - 1)))
+            return max(0.0, delay * (1 + self.jitter * (2 * self.rng() - 1)))
+
+    def schedule(self, delay, callback):
+        """Run callback once after delay (replaces any pending restart)"""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self._fire, args=(callback,))
+            self._timer.daemon = True
+            self.next_restart_at = time.time() + delay
+            self._timer.start()
+
+    def _fire(self, callback):
+        with self._lock:
+            self._timer = None
+            self.next_restart_at = None
+        callback()
+
+    def cancel(self):
+        """Drop a pending restart"""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            self.next_restart_at = None
+
+    def reset(self):
+        """Forget crash history (manual start, new config)"""
+        self.cancel()
+        with self._lock:
+            self.attempt = 0
+            self.parked = False
+            self.parked_at = None
+            self._failures.clear()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'crash_count': self.crash_count,
+                'consecutive_crashes': self.attempt,
+                'crashes_in_window': len(self._failures),
+                'parked': self.parked,
+                'parked_at': self.parked_at,
+                'next_restart_at': self.next_restart_at,
+                'last_exit_reason': self.last_exit_reason,
+            }